@@ -0,0 +1,158 @@
+"""
+Benchmarks for the CHK checkout pricing hot path.
+
+    Record results:
+       PYTHONPATH=lib python benchmarks/checkout_benchmark.py run -o bench.json
+
+    Compare against a baseline (exits 1 if any benchmark got slower than the
+    threshold allows or is missing from the current results):
+       PYTHONPATH=lib python benchmarks/checkout_benchmark.py compare \
+           baseline.json bench.json --threshold 0.1
+
+Each benchmark is timed in ``repeat`` rounds of ``number`` calls, giving one
+mean per-call time per round; the JSON holds the min, median and max of those
+round means, in seconds. Single calls are too short to time on their own, so
+there are no per-call percentiles.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+from solutions.CHK.checkout_solution import (
+    DISCOUNTS,
+    Basket,
+    checkout,
+    compute_discounts,
+)
+
+WORKLOADS = {
+    "empty": "",
+    "single": "A",
+    "all_skus": "ABCDEFGHIJKLMNOPQRSTUVWXYZABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    "group_heavy": "STXYZ" * 60,
+    "bulk_10k": ("ABCDEFGHIJKLMNOPQRSTUVWXYZ" * 385)[:10000],
+}
+INVALID_WORKLOADS = {
+    "invalid_lowercase": "abc",
+    "invalid_late": "A" * 100 + "-",
+}
+GROUP_DISCOUNT = next(discount for discount in DISCOUNTS if discount.choose)
+
+
+def _benchmarks() -> List[Tuple[str, Callable[[], object]]]:
+    benchmarks = []
+    for name, skus in {**WORKLOADS, **INVALID_WORKLOADS}.items():
+        benchmarks.append((f"checkout[{name}]", lambda skus=skus: checkout(skus)))
+    for name, skus in WORKLOADS.items():
+        basket = Basket(skus)
+        small = Basket(skus[:3])
+        benchmarks += [
+            (
+                f"compute_discounts[{name}]",
+                lambda skus=skus: compute_discounts(skus),
+            ),
+            (f"Basket.__init__[{name}]", lambda skus=skus: Basket(skus)),
+            (f"Basket.__copy__[{name}]", basket.__copy__),
+            (
+                f"Basket.__sub__[{name}]",
+                lambda basket=basket, small=small: basket.__copy__() - small,
+            ),
+        ]
+    for name in ("group_heavy", "bulk_10k"):
+        basket = Basket(WORKLOADS[name])
+        benchmarks.append(
+            (
+                f"Discount.choose_items_to_remove[{name}]",
+                lambda basket=basket: GROUP_DISCOUNT.choose_items_to_remove(basket),
+            )
+        )
+    return benchmarks
+
+
+def run(repeat: int, selected: str) -> Dict:
+    results = {}
+    for name, fn in _benchmarks():
+        if selected and selected not in name:
+            continue
+        timer = timeit.Timer(fn)
+        number, _ = timer.autorange()
+        number = max(1, number // 5)
+        times = [total / number for total in timer.repeat(repeat, number)]
+        results[name] = {
+            "min": min(times),
+            "median": statistics.median(times),
+            "max_round_mean": max(times),
+            "number": number,
+            "repeat": repeat,
+        }
+        print(f"{name:<50} {results[name]['median'] * 1e6:12.2f} us")
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Returns the benchmarks whose median got slower than ``threshold``.
+
+    Benchmarks of the baseline missing from ``current`` are returned too.
+    """
+    regressions = []
+    for name, before in baseline["results"].items():
+        after = current["results"].get(name)
+        if after is None:
+            regressions.append(name)
+            print(f"{name:<50} {before['median'] * 1e6:10.2f} us -> MISSING")
+            continue
+        ratio = after["median"] / before["median"]
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "REGRESSION"
+        print(
+            f"{name:<50} {before['median'] * 1e6:10.2f} us "
+            f"-> {after['median'] * 1e6:10.2f} us  x{ratio:5.2f} {flag}"
+        )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("-o", "--output", help="write results as JSON")
+    run_parser.add_argument("--repeat", type=int, default=20)
+    run_parser.add_argument("-k", default="", help="only names containing this")
+    compare_parser = commands.add_parser("compare", help="compare two JSON results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run(args.repeat, args.k)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(
+            f"{len(regressions)} benchmark(s) regressed by more than "
+            f"{args.threshold:.0%} or are missing"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
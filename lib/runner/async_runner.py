@@ -0,0 +1,212 @@
+import asyncio
+import dataclasses
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from tdl.queue.abstractions.response.fatal_error_response import FatalErrorResponse
+from tdl.queue.abstractions.response.valid_response import ValidResponse
+from tdl.queue.queue_based_implementation_runner import QueueBasedImplementationRunner
+
+from .batching import MicroBatcher
+from .concurrent_runner import (
+    ConcurrentQueueBasedImplementationRunnerBuilder,
+    _DrainingRemoteBroker,
+)
+from .tracing import TracedSolution
+
+
+@dataclasses.dataclass(frozen=True)
+class BatchingConfig:
+    """Micro-batching of requests for methods with a batch implementation."""
+
+    max_batch_size: int = 256
+    max_wait: float = 0.002
+
+
+def _batch_of_requests(batch_implementation: Callable) -> Callable:
+    """Takes ``(request id, item)`` pairs and passes the items on.
+
+    A traced batch implementation records its span under every request id.
+    """
+
+    def batch(requests):
+        request_ids, items = zip(*requests)
+        implementation = batch_implementation
+        if isinstance(implementation, TracedSolution):
+            implementation = implementation.for_requests(*request_ids)
+        return implementation(list(items))
+
+    return batch
+
+
+class AsyncApplyProcessingRules:
+    """Handling strategy that feeds requests into an asyncio event loop.
+
+    Methods with a batch implementation are gathered into micro-batches, the
+    others run on the loop's default thread pool. Responses are published in
+    the order the requests arrived.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        implementations: Dict[str, Callable],
+        batch_implementations: Dict[str, Callable],
+        audit,
+        config: BatchingConfig,
+    ):
+        self._loop = loop
+        self._implementations = implementations
+        self._audit = audit
+        self._batchers = {
+            method: MicroBatcher(
+                _batch_of_requests(batch_implementation),
+                config.max_batch_size,
+                config.max_wait,
+            )
+            for method, batch_implementation in batch_implementations.items()
+        }
+        self._responses: asyncio.Queue = asyncio.Queue()
+        self._in_flight = 0
+        self._idle = threading.Condition()
+
+    def process_next_request_from(self, remote_broker, headers, request):
+        """Called on the broker's thread for every request."""
+        with self._idle:
+            self._in_flight += 1
+        self._loop.call_soon_threadsafe(self._accept, remote_broker, headers, request)
+
+    def _accept(self, remote_broker, headers, request):
+        response = asyncio.ensure_future(self._respond(request))
+        self._responses.put_nowait((remote_broker, headers, request, response))
+
+    async def _respond(self, request):
+        try:
+            batcher = self._batchers.get(request.method)
+            if batcher is not None and len(request.params) == 1:
+                result = await batcher.submit((request.id, request.params[0]))
+            elif request.method in self._implementations:
+                result = await self._loop.run_in_executor(
+                    None, self._implementations[request.method], *request.params
+                )
+            else:
+                return FatalErrorResponse(
+                    f"method '{request.method}' did not match any processing rule"
+                )
+        except Exception as e:
+            print(getattr(e, "message", str(e)))
+            return FatalErrorResponse("user implementation raised exception")
+        return ValidResponse(request.id, result)
+
+    async def publish_responses(self):
+        while True:
+            remote_broker, headers, request, response = await self._responses.get()
+            response = await response
+            self._audit.start_line()
+            self._audit.log(request)
+            self._audit.log(response)
+            try:
+                if isinstance(response, FatalErrorResponse):
+                    remote_broker.stop()
+                else:
+                    remote_broker.respond_to(headers, response)
+            except Exception as e:
+                print(f"ERROR: Failed to publish response: {e}")
+            self._audit.end_line()
+            with self._idle:
+                self._in_flight -= 1
+                if not self._in_flight:
+                    self._idle.notify_all()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Waits on a non-loop thread until every request has been published."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._in_flight, timeout)
+
+
+class AsyncQueueBasedImplementationRunner(QueueBasedImplementationRunner):
+    def __init__(
+        self,
+        config,
+        deploy_processing_rules,
+        implementations,
+        batch_implementations,
+        batching,
+    ):
+        super().__init__(config, deploy_processing_rules)
+        self._implementations = implementations
+        self._batch_implementations = batch_implementations
+        self._batching = batching
+
+    def run(self):
+        start_time = time.monotonic()
+        try:
+            asyncio.run(self.run_async())
+        except Exception as e:
+            self._audit.log_exception("There was a problem processing messages", e)
+        self.total_processing_time_millis = (time.monotonic() - start_time) * 1000.0
+
+    async def run_async(self, remote_broker=None):
+        """Handles requests until the broker disconnects.
+
+        Parameters
+        ----------
+        remote_broker : optional
+            Broker to subscribe to; a connection to the configured host if None.
+        """
+        self._audit.log_line("Starting client")
+        strategy = AsyncApplyProcessingRules(
+            asyncio.get_running_loop(),
+            self._implementations,
+            self._batch_implementations,
+            self._audit,
+            self._batching,
+        )
+        if remote_broker is None:
+            remote_broker = await asyncio.to_thread(
+                _DrainingRemoteBroker,
+                self._config.get_hostname(),
+                self._config.get_port(),
+                self._config.get_request_queue_name(),
+                self._config.get_response_queue_name(),
+                self._config.get_time_to_wait_for_request(),
+            )
+        remote_broker.handling_strategy = strategy
+        publisher = asyncio.ensure_future(strategy.publish_responses())
+        self._audit.log_line("Waiting for requests")
+        remote_broker.subscribe(strategy, self._audit)
+        while remote_broker.is_connected():
+            await asyncio.sleep(0.1)
+        await asyncio.to_thread(strategy.drain, 1.0)
+        publisher.cancel()
+        self._audit.log_line("Stopping client")
+
+
+class AsyncQueueBasedImplementationRunnerBuilder(
+    ConcurrentQueueBasedImplementationRunnerBuilder
+):
+    """Builds an asyncio runner that micro-batches requests.
+
+    ``with_batch_solution_for`` registers a function taking a list of first
+    parameters and returning the list of results, e.g. ``checkout_many`` for
+    ``checkout``.
+    """
+
+    def __init__(self, batching: BatchingConfig = BatchingConfig()):
+        super().__init__()
+        self._batching = batching
+        self._batch_implementations: Dict[str, Callable] = {}
+
+    def with_batch_solution_for(self, method_name, batch_implementation):
+        self._batch_implementations[method_name] = batch_implementation
+        return self
+
+    def create(self):
+        return AsyncQueueBasedImplementationRunner(
+            self._config,
+            self._deploy_processing_rules,
+            self._implementations,
+            self._batch_implementations,
+            self._batching,
+        )
@@ -0,0 +1,82 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional, Sequence, Set
+
+
+class MicroBatcher:
+    """Gathers single calls into batches for a vectorized implementation.
+
+    Items submitted within ``max_wait`` seconds of the first item of a batch
+    are handed to ``batch_fn`` together, or as soon as ``max_batch_size``
+    items are waiting. Each caller gets the result at its item's position.
+
+    Parameters
+    ----------
+    batch_fn : callable
+        Takes a list of items and returns a sequence of results in order,
+        e.g. ``checkout_many``.
+    max_batch_size : int
+    max_wait : float
+        Seconds to wait for more items after the first one.
+    executor : Executor, optional
+        Where ``batch_fn`` runs; the default thread pool of the loop if None.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 256,
+        max_wait: float = 0.002,
+        executor: Optional[Executor] = None,
+    ):
+        if max_batch_size <= 0:
+            raise ValueError(f"Expected positive max_batch_size, got {max_batch_size}")
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.executor = executor
+        self._items: List[Any] = []
+        self._futures: List[asyncio.Future] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+        self.batches = 0
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append(item)
+        self._futures.append(future)
+        if len(self._items) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, futures = self._items, self._futures
+        self._items, self._futures = [], []
+        if items:
+            self.batches += 1
+            task = asyncio.ensure_future(self._run(items, futures))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, items: List[Any], futures: List[asyncio.Future]):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, self.batch_fn, items)
+            if len(results) != len(items):
+                raise ValueError(
+                    f"Expected {len(items)} results from batch, got {len(results)}"
+                )
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,296 @@
+import copy
+import dataclasses
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, FrozenSet, Optional
+
+from tdl.queue.abstractions.request import Request
+from tdl.queue.abstractions.response.fatal_error_response import FatalErrorResponse
+from tdl.queue.abstractions.response.valid_response import ValidResponse
+from tdl.queue.queue_based_implementation_runner import (
+    QueueBasedImplementationRunner,
+    QueueBasedImplementationRunnerBuilder,
+)
+from tdl.queue.transport.listener import Listener
+from tdl.queue.transport.remote_broker import RemoteBroker
+
+from .dispatch import OrderedDispatcher
+from .tracing import TRACER, TracedSolution, disable_inherited_tracing
+
+
+@dataclasses.dataclass(frozen=True)
+class ConcurrencyConfig:
+    """How requests are spread over workers.
+
+    ``threads`` workers run every method unless it is listed in
+    ``process_methods``, which run on ``processes`` worker processes instead
+    (for pure-CPU solutions such as ``checkout``). At most ``max_in_flight``
+    requests are accepted before their responses are published.
+    ``process_initializer`` runs once in each worker process, e.g. to watch
+    the catalogue file there.
+    """
+
+    threads: int = 4
+    processes: int = 0
+    process_methods: FrozenSet[str] = frozenset()
+    max_in_flight: int = 64
+    process_initializer: Optional[Callable[[], None]] = None
+
+
+def _start_worker(initializer: Optional[Callable[[], None]]):
+    disable_inherited_tracing()
+    if initializer is not None:
+        initializer()
+
+
+def _response_for(request, future: Future):
+    try:
+        return ValidResponse(request.id, future.result())
+    except Exception as e:
+        print(getattr(e, "message", str(e)))
+        return FatalErrorResponse("user implementation raised exception")
+
+
+class ConcurrentApplyProcessingRules:
+    """Handling strategy that dispatches requests to worker pools.
+
+    Responses are published in the order the requests arrived, and the
+    broker is stopped on the first fatal error as in the sequential runner.
+
+    Worker processes do not trace; while ``TRACER`` is enabled, a request
+    handled by one is recorded as a ``worker`` span in this process instead,
+    from its submission until its result is back.
+    """
+
+    def __init__(
+        self,
+        implementations: Dict[str, Callable],
+        audit,
+        config: ConcurrencyConfig,
+    ):
+        self._implementations = implementations
+        self._audit = audit
+        self._config = config
+        self._dispatcher = OrderedDispatcher(config.max_in_flight)
+        self._threads = ThreadPoolExecutor(
+            max_workers=config.threads, thread_name_prefix="solution"
+        )
+        self._processes = (
+            ProcessPoolExecutor(
+                max_workers=config.processes,
+                initializer=_start_worker,
+                initargs=(config.process_initializer,),
+            )
+            if config.processes and config.process_methods
+            else None
+        )
+
+    def _executor_for(self, method: str):
+        if self._processes is not None and method in self._config.process_methods:
+            return self._processes
+        return self._threads
+
+    def process_next_request_from(self, remote_broker, headers, request):
+        implementation = self._implementations.get(request.method)
+        if implementation is None:
+            message = f"method '{request.method}' did not match any processing rule"
+            executor, implementation = None, lambda *_: None
+        else:
+            message = None
+            executor = self._executor_for(request.method)
+            if isinstance(implementation, TracedSolution):
+                implementation = implementation.for_requests(request.id)
+
+        def publish(future: Future):
+            if message is None:
+                response = _response_for(request, future)
+            else:
+                response = FatalErrorResponse(message)
+            self._audit.start_line()
+            self._audit.log(request)
+            self._audit.log(response)
+            if isinstance(response, FatalErrorResponse):
+                remote_broker.stop()
+            else:
+                remote_broker.respond_to(headers, response)
+            self._audit.end_line()
+
+        submitted_ns = time.perf_counter_ns()
+        future = self._dispatcher.submit(
+            executor, implementation, request.params, publish
+        )
+        if TRACER.enabled and executor is not None and executor is self._processes:
+            future.add_done_callback(
+                lambda _: TRACER.record(
+                    "worker",
+                    submitted_ns,
+                    time.perf_counter_ns(),
+                    request.method,
+                    request.id,
+                )
+            )
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        return self._dispatcher.drain(timeout)
+
+    def shutdown(self):
+        self._dispatcher.drain()
+        self._threads.shutdown()
+        if self._processes is not None:
+            self._processes.shutdown()
+
+
+# Passes the method of a request on to respond_to for its spans
+_TRACE_METHOD_HEADER = "trace-method"
+
+
+class _TracingListener(Listener):
+    """Records broker, decode and dispatch spans of every request.
+
+    ``broker`` runs from the message's ``timestamp`` header, set by the broker
+    when it accepted the message, to its arrival here.
+    """
+
+    def on_message(self, frame):
+        received_ns = time.perf_counter_ns()
+        headers = copy.copy(frame.headers)
+        self._stop_timer()
+        try:
+            request = Request.deserialize(frame.body, self._audit)
+        except Exception:
+            TRACER.record("decode", received_ns, time.perf_counter_ns())
+            raise
+        method, request_id = request.method, request.id
+        decoded_ns = time.perf_counter_ns()
+        TRACER.record("decode", received_ns, decoded_ns, method, request_id)
+        timestamp = headers.get("timestamp")
+        if timestamp is not None and timestamp.isdigit():
+            queued_ns = time.time_ns() - int(timestamp) * 1_000_000
+            if queued_ns > 0:
+                TRACER.record(
+                    "broker", received_ns - queued_ns, received_ns, method, request_id
+                )
+        headers[_TRACE_METHOD_HEADER] = method
+        self._handling_strategy.process_next_request_from(
+            self._remote_broker, headers, request
+        )
+        TRACER.record(
+            "dispatch", decoded_ns, time.perf_counter_ns(), method, request_id
+        )
+        self._start_timer()
+
+
+class _DrainingRemoteBroker(RemoteBroker):
+    """Waits for in-flight requests before closing on the idle timeout.
+
+    While ``TRACER`` is enabled, requests are traced from their arrival to
+    the publishing of their response.
+    """
+
+    handling_strategy: Optional[ConcurrentApplyProcessingRules] = None
+
+    def subscribe(self, handling_strategy, audit):
+        if not TRACER.enabled:
+            return super().subscribe(handling_strategy, audit)
+        listener = _TracingListener(
+            self, handling_strategy, self.start_timer, self.stop_timer, audit
+        )
+        self.conn.set_listener("listener", listener)
+        self.conn.subscribe(
+            destination=self.request_queue_name, id="this", ack="client-individual"
+        )
+        self.start_timer()
+
+    def respond_to(self, headers, response):
+        if not TRACER.enabled:
+            return super().respond_to(headers, response)
+        method = headers.get(_TRACE_METHOD_HEADER)
+        start_ns = time.perf_counter_ns()
+        body = json.dumps(
+            OrderedDict(
+                [("result", response.result), ("error", None), ("id", response.id)]
+            ),
+            separators=(",", ":"),
+        )
+        encoded_ns = time.perf_counter_ns()
+        self.acknowledge(headers)
+        self.conn.send(body=body, destination=self.response_queue_name)
+        TRACER.record("encode", start_ns, encoded_ns, method, response.id)
+        TRACER.record(
+            "publish", encoded_ns, time.perf_counter_ns(), method, response.id
+        )
+
+    def close(self):
+        if self.handling_strategy is not None:
+            self.handling_strategy.drain()
+        super().close()
+
+
+class ConcurrentQueueBasedImplementationRunner(QueueBasedImplementationRunner):
+    def __init__(self, config, deploy_processing_rules, implementations, concurrency):
+        super().__init__(config, deploy_processing_rules)
+        self._implementations = implementations
+        self._concurrency = concurrency
+
+    def run(self):
+        start_time = time.monotonic()
+        strategy = None
+        try:
+            self._audit.log_line("Starting client")
+            remote_broker = _DrainingRemoteBroker(
+                self._config.get_hostname(),
+                self._config.get_port(),
+                self._config.get_request_queue_name(),
+                self._config.get_response_queue_name(),
+                self._config.get_time_to_wait_for_request(),
+            )
+            strategy = ConcurrentApplyProcessingRules(
+                self._implementations, self._audit, self._concurrency
+            )
+            remote_broker.handling_strategy = strategy
+            self._audit.log_line("Waiting for requests")
+            remote_broker.subscribe(strategy, self._audit)
+            while remote_broker.is_connected():
+                time.sleep(0.1)
+            self._audit.log_line("Stopping client")
+        except Exception as e:
+            self._audit.log_exception("There was a problem processing messages", e)
+        finally:
+            if strategy is not None:
+                strategy.shutdown()
+        self.total_processing_time_millis = (time.monotonic() - start_time) * 1000.0
+
+
+class ConcurrentQueueBasedImplementationRunnerBuilder(
+    QueueBasedImplementationRunnerBuilder
+):
+    """Builds a runner that handles requests on worker pools.
+
+    Solutions used in ``ConcurrencyConfig.process_methods`` must be picklable,
+    i.e. module-level functions.
+    """
+
+    def __init__(self, concurrency: ConcurrencyConfig = ConcurrencyConfig()):
+        super().__init__()
+        self._concurrency = concurrency
+        self._implementations: Dict[str, Callable] = {
+            "display_description": _display_description
+        }
+
+    def with_solution_for(self, method_name, user_implementation):
+        self._implementations[method_name] = user_implementation
+        return super().with_solution_for(method_name, user_implementation)
+
+    def create(self):
+        return ConcurrentQueueBasedImplementationRunner(
+            self._config,
+            self._deploy_processing_rules,
+            self._implementations,
+            self._concurrency,
+        )
+
+
+def _display_description(*_):
+    return "OK"
@@ -1,25 +1,149 @@
+import dataclasses
 import os
+import threading
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+CONFIG_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "..", "config", "credentials.config"
+)
+
+# Types of the keys the runner reads; values from the file or the environment
+# are converted and checked when the config is loaded.
+KEY_TYPES = {
+    "tdl_journey_id": str,
+    "tdl_hostname": str,
+    "tdl_use_coloured_output": bool,
+    "tdl_require_rec": bool,
+    "tdl_request_queue_name": str,
+    "tdl_response_queue_name": str,
+    "tdl_enable_experimental": bool,
+    "runner_threads": int,
+    "runner_processes": int,
+    "runner_process_methods": str,
+    "runner_max_in_flight": int,
+    "runner_async": bool,
+    "runner_max_batch_size": int,
+    "runner_max_batch_wait_ms": float,
+    "runner_prewarm": str,
+    "runner_trace": bool,
+    "runner_trace_file": str,
+    "runner_trace_format": str,
+    "runner_trace_interval_s": float,
+    "runner_trace_capacity": int,
+}
 
 
 def read_from_config_file(key):
-    properties = read_properties_file()
-    return properties[key]
+    return get_config()[key]
 
 
 def read_from_config_file_with_default(key, default_value):
-    properties = read_properties_file()
-    return properties.get(key, default_value)
+    return get_config().get(key, default_value)
+
+
+@dataclasses.dataclass(frozen=True)
+class CredentialsConfig:
+    """Parsed credentials.config with environment overrides applied.
+
+    The keys the runner reads (``KEY_TYPES``) can be overridden by an
+    environment variable of the same name in upper case, e.g. ``TDL_HOSTNAME``
+    for ``tdl_hostname``. Other keys, such as the recording credentials, only
+    come from the file.
+    """
+
+    path: str
+    properties: Mapping[str, Any]
+    mtime_ns: int
+    size: int
+
+    def __getitem__(self, key):
+        return self.properties[key]
+
+    def get(self, key, default_value=None):
+        return self.properties.get(key, default_value)
+
+
+def _convert(key, value):
+    expected = KEY_TYPES.get(key)
+    if expected is None:
+        return value
+    if expected is str:
+        return value if isinstance(value, str) else str(value).lower()
+    if expected is bool:
+        if isinstance(value, bool):
+            return value
+        if value in ("true", "false"):
+            return value == "true"
+    elif not isinstance(value, bool):
+        try:
+            return expected(value)
+        except ValueError:
+            pass
+    raise ValueError(f"Expected {expected.__name__} for {key}, got {value!r}")
+
+
+def load_config(filepath: str = CONFIG_FILE, environ=None) -> CredentialsConfig:
+    """Reads and checks ``filepath`` once.
+
+    Raises
+    ------
+    ValueError
+        A known key (see ``KEY_TYPES``) has a value of the wrong type.
+    """
+    if environ is None:
+        environ = os.environ
+    properties = load_properties(filepath)
+    stat = os.stat(filepath)
+    for key in KEY_TYPES:
+        if key.upper() in environ:
+            properties[key] = environ[key.upper()]
+    properties = {key: _convert(key, value) for key, value in properties.items()}
+    return CredentialsConfig(
+        path=filepath,
+        properties=MappingProxyType(properties),
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+    )
+
+
+_config: Optional[CredentialsConfig] = None
+_config_lock = threading.Lock()
+
+
+def get_config() -> CredentialsConfig:
+    """The config, read from the file on first use only."""
+    global _config
+    config = _config
+    if config is None:
+        with _config_lock:
+            if _config is None:
+                _config = load_config()
+            config = _config
+    return config
+
+
+def reload_config(force: bool = False) -> CredentialsConfig:
+    """Reads the file again if it changed since it was loaded (or ``force``)."""
+    global _config
+    with _config_lock:
+        config = _config
+        if config is not None and not force:
+            try:
+                stat = os.stat(config.path)
+            except OSError:
+                return config
+            if (stat.st_mtime_ns, stat.st_size) == (config.mtime_ns, config.size):
+                return config
+        _config = load_config(config.path if config is not None else CONFIG_FILE)
+        return _config
 
 
 # ~~~~ Helpers
 
 
 def read_properties_file():
-    current_dir = os.path.dirname(__file__)
-    properties = load_properties(
-        os.path.join(current_dir, "..", "..", "config", "credentials.config")
-    )
-    return properties
+    return dict(get_config().properties)
 
 
 def load_properties(filepath, sep="=", comment_char="#"):
@@ -0,0 +1,84 @@
+import collections
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Optional
+
+
+class OrderedDispatcher:
+    """Runs calls concurrently but publishes their results in submission order.
+
+    ``submit`` blocks while ``max_in_flight`` calls are waiting to be published,
+    which pushes back on whoever is feeding requests in.
+    """
+
+    def __init__(self, max_in_flight: int = 16):
+        if max_in_flight <= 0:
+            raise ValueError(f"Expected positive max_in_flight, got {max_in_flight}")
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._pending = collections.deque()
+        self._pending_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._idle = threading.Condition(self._pending_lock)
+
+    def submit(
+        self,
+        executor: Optional[Executor],
+        fn: Callable,
+        args: tuple,
+        publish: Callable[[Future], Any],
+    ) -> Future:
+        """Runs ``fn(*args)`` on ``executor`` (inline if None).
+
+        ``publish`` is called with the finished future once every earlier
+        submission has been published.
+        """
+        self._slots.acquire()
+        if executor is None:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            try:
+                future = executor.submit(fn, *args)
+            except Exception:
+                self._slots.release()
+                raise
+        with self._pending_lock:
+            self._pending.append((future, publish))
+        future.add_done_callback(lambda _: self._flush())
+        return future
+
+    @property
+    def in_flight(self) -> int:
+        with self._pending_lock:
+            return len(self._pending)
+
+    def _flush(self):
+        with self._publish_lock:
+            while True:
+                with self._pending_lock:
+                    if not self._pending or not self._pending[0][0].done():
+                        return
+                    future, publish = self._pending[0]
+                try:
+                    publish(future)
+                except Exception as e:
+                    print(f"ERROR: Failed to publish response: {e}")
+                with self._pending_lock:
+                    self._pending.popleft()
+                    if not self._pending:
+                        self._idle.notify_all()
+                self._slots.release()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every submitted call has been published.
+
+        Returns
+        -------
+        bool
+            False if ``timeout`` seconds passed first.
+        """
+        with self._pending_lock:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
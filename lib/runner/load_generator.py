@@ -0,0 +1,318 @@
+"""Replays request payloads against a runner through a LocalBroker.
+
+Payload files have one JSON request per line, as the challenge server sends
+them: ``{"method": "checkout", "params": ["AAB"]}`` (an ``id`` is ignored,
+every request sent gets a unique one).
+
+    PYTHONPATH=lib python -m runner.load_generator payloads.jsonl \\
+        --rate 500 --arrival poisson --count 10000 --runner
+
+With ``--runner`` the project's runner (as built by send_command_to_server.py
+from config/credentials.config) is started in-process against the broker.
+Otherwise the broker waits for a runner, or any STOMP client consuming the
+request queue, to connect to localhost on ``--port``.
+"""
+import argparse
+import dataclasses
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from .credentials_config_file import read_from_config_file_with_default
+from .local_broker import DEFAULT_PORT, Headers, LocalBroker
+from .tracing import stop_tracing
+
+ARRIVALS = ("uniform", "poisson")
+PERCENTILES = (50, 95, 99)
+
+
+def load_payloads(path: str) -> List[dict]:
+    """Requests from a JSON lines file, without their ids.
+
+    Raises
+    ------
+    ValueError
+        A line is not a JSON object with ``method`` and ``params``.
+    """
+    payloads = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            payload = json.loads(line)
+            if not isinstance(payload, dict) or not {"method", "params"} <= set(
+                payload
+            ):
+                raise ValueError(
+                    f"Expected method and params on line {line_number} of {path}"
+                )
+            payloads.append({"method": payload["method"], "params": payload["params"]})
+    return payloads
+
+
+def arrival_offsets(
+    count: int, rate: Optional[float], arrival: str = "uniform", seed: int = 0
+) -> Iterator[float]:
+    """Seconds from the start at which each of ``count`` requests is sent.
+
+    With no ``rate`` every request is sent at once; otherwise requests are
+    evenly spaced (``uniform``) or a Poisson process (``poisson``) of ``rate``
+    requests per second. Either way the schedule does not wait for responses.
+    """
+    if arrival not in ARRIVALS:
+        raise ValueError(f"Expected arrival in {ARRIVALS}, got {arrival!r}")
+    if rate is None:
+        return itertools.repeat(0.0, count)
+    if rate <= 0:
+        raise ValueError(f"Expected positive rate, got {rate}")
+    if arrival == "uniform":
+        return (index / rate for index in range(count))
+    generator = random.Random(seed)
+    return itertools.accumulate(generator.expovariate(rate) for _ in range(count))
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank ``q``-th percentile of sorted ``values`` (nan if empty)."""
+    if not values:
+        return math.nan
+    return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+
+@dataclasses.dataclass(frozen=True)
+class LoadReport:
+    """Outcome of a load run; latencies are in seconds.
+
+    Latency runs from when a request was scheduled to be sent until its
+    response arrived, so a runner that falls behind is charged for the
+    queueing too. Requests without a response within the timeout are
+    ``lost``.
+    """
+
+    sent: int
+    received: int
+    elapsed: float
+    latencies: Dict[int, float]
+    max_latency: float
+
+    @property
+    def lost(self) -> int:
+        return self.sent - self.received
+
+    @property
+    def throughput(self) -> float:
+        """Responses per second."""
+        return self.received / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "sent": self.sent,
+            "received": self.received,
+            "lost": self.lost,
+            "elapsed_seconds": self.elapsed,
+            "throughput_per_second": self.throughput,
+            **{f"p{q}_seconds": latency for q, latency in self.latencies.items()},
+            "max_seconds": self.max_latency,
+        }
+
+    def format(self) -> str:
+        latencies = " ".join(
+            f"p{q}={latency * 1000:.2f}ms" for q, latency in self.latencies.items()
+        )
+        return (
+            f"sent {self.sent}, received {self.received}, lost {self.lost} "
+            f"in {self.elapsed:.2f}s: {self.throughput:.0f}/s, {latencies} "
+            f"max={self.max_latency * 1000:.2f}ms"
+        )
+
+
+def run_load(
+    broker: LocalBroker,
+    payloads: Sequence[dict],
+    request_queue: str,
+    response_queue: str,
+    count: Optional[int] = None,
+    rate: Optional[float] = None,
+    arrival: str = "uniform",
+    timeout: float = 5.0,
+    seed: int = 0,
+) -> LoadReport:
+    """Sends ``count`` requests cycling through ``payloads`` and times them.
+
+    Parameters
+    ----------
+    broker : LocalBroker
+        Started broker whose ``request_queue`` a runner consumes.
+    payloads : sequence of dict
+        Requests with ``method`` and ``params``.
+    request_queue, response_queue : str
+    count : int, optional
+        Number of requests, ``len(payloads)`` by default.
+    rate : float, optional
+        Requests per second, as fast as possible if None.
+    arrival : {"uniform", "poisson"}
+    timeout : float
+        Seconds to wait for outstanding responses after the last send.
+    seed : int
+        Seed of the Poisson arrivals.
+
+    Returns
+    -------
+    LoadReport
+    """
+    if not payloads:
+        raise ValueError("Expected at least one payload")
+    if count is None:
+        count = len(payloads)
+    scheduled: Dict[str, float] = {}
+    received: Dict[str, float] = {}
+    done = threading.Condition()
+
+    def on_response(headers: Headers, body: str):
+        now = time.perf_counter()
+        try:
+            request_id = json.loads(body)["id"]
+        except (ValueError, KeyError, TypeError):
+            return
+        with done:
+            if request_id in scheduled and request_id not in received:
+                received[request_id] = now
+                if len(received) == count:
+                    done.notify_all()
+
+    broker.subscribe(response_queue, on_response)
+    try:
+        start = time.perf_counter()
+        messages = zip(
+            arrival_offsets(count, rate, arrival, seed), itertools.cycle(payloads)
+        )
+        for index, (offset, payload) in enumerate(messages):
+            due = start + offset
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            request_id = f"L{index}"
+            with done:
+                scheduled[request_id] = due
+            broker.send(
+                request_queue,
+                json.dumps({**payload, "id": request_id}, separators=(",", ":")),
+            )
+        with done:
+            done.wait_for(lambda: len(received) == count, timeout)
+            times = dict(received)
+        elapsed = (max(times.values()) if times else time.perf_counter()) - start
+    finally:
+        broker.unsubscribe(response_queue, on_response)
+    latencies = sorted(
+        times[request_id] - scheduled[request_id] for request_id in times
+    )
+    return LoadReport(
+        sent=count,
+        received=len(times),
+        elapsed=elapsed,
+        latencies={q: percentile(latencies, q) for q in PERCENTILES},
+        max_latency=latencies[-1] if latencies else math.nan,
+    )
+
+
+# The tdl client starts its idle timer just after subscribing, and a request
+# arriving before then leaves a timer that disconnects it mid-run.
+_SUBSCRIBE_GRACE = 0.1
+
+
+def _start_runner(
+    port: int, request_queue: str, response_queue: str, idle_timeout: float
+):
+    """Runs the project's runner against localhost on a daemon thread.
+
+    The runner disconnects once no request arrived for ``idle_timeout``
+    seconds, as it does with the challenge server after 500ms.
+    """
+    # Imported here so that the broker and generator work without tdl
+    from runner.utils import Utils
+    from send_command_to_server import build_runner, prewarm_solutions
+
+    prewarm_solutions()
+    runner = build_runner(
+        Utils.get_runner_config()
+        .set_hostname("localhost")
+        .set_port(port)
+        .set_request_queue_name(request_queue)
+        .set_response_queue_name(response_queue)
+        .set_time_to_wait_for_request(idle_timeout * 1000)
+    )
+    thread = threading.Thread(target=runner.run, name="runner", daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m runner.load_generator",
+        description="Load-tests a runner through a local stand-in broker.",
+    )
+    parser.add_argument("payloads", help="JSON lines file of requests")
+    parser.add_argument("--count", type=int, help="requests to send")
+    parser.add_argument("--rate", type=float, help="requests per second")
+    parser.add_argument("--arrival", choices=ARRIVALS, default="uniform")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--request-queue", help="tdl_request_queue_name from the config by default"
+    )
+    parser.add_argument(
+        "--response-queue", help="tdl_response_queue_name from the config by default"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=5.0, help="seconds to wait for stragglers"
+    )
+    parser.add_argument(
+        "--runner", action="store_true", help="start the project's runner in-process"
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    if args.request_queue is None:
+        args.request_queue = read_from_config_file_with_default(
+            "tdl_request_queue_name", "requests"
+        )
+    if args.response_queue is None:
+        args.response_queue = read_from_config_file_with_default(
+            "tdl_response_queue_name", "responses"
+        )
+
+    payloads = load_payloads(args.payloads)
+    with LocalBroker(port=args.port) as broker:
+        if args.runner:
+            _start_runner(
+                broker.port, args.request_queue, args.response_queue, args.timeout
+            )
+        else:
+            print(f"Waiting for a runner on localhost:{broker.port}")
+        if not broker.wait_for_subscriber(args.request_queue, timeout=60):
+            print(f"ERROR: Nothing subscribed to {args.request_queue}")
+            return 1
+        time.sleep(_SUBSCRIBE_GRACE)
+        report = run_load(
+            broker,
+            payloads,
+            args.request_queue,
+            args.response_queue,
+            count=args.count,
+            rate=args.rate,
+            arrival=args.arrival,
+            timeout=args.timeout,
+            seed=args.seed,
+        )
+    if args.runner:
+        # Writes the runner's trace, if runner_trace is set
+        stop_tracing()
+    print(json.dumps(report.to_dict()) if args.json else report.format())
+    return 0 if report.lost == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,333 @@
+import collections
+import itertools
+import socket
+import threading
+import time
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# The challenge server's broker port, which ImplementationRunnerConfig uses
+# unless told otherwise.
+DEFAULT_PORT = 61613
+
+Headers = Dict[str, str]
+Consumer = Callable[[Headers, str], None]
+
+_ESCAPES = {"\\": "\\\\", "\n": "\\n", "\r": "\\r", ":": "\\c"}
+_UNESCAPES = {"\\\\": "\\", "\\n": "\n", "\\r": "\r", "\\c": ":"}
+
+
+def _escape(value: str) -> str:
+    return "".join(_ESCAPES.get(char, char) for char in value)
+
+
+def _unescape(value: str) -> str:
+    if "\\" not in value:
+        return value
+    chars = []
+    position = 0
+    while position < len(value):
+        pair = value[position : position + 2]
+        if pair in _UNESCAPES:
+            chars.append(_UNESCAPES[pair])
+            position += 2
+        else:
+            chars.append(value[position])
+            position += 1
+    return "".join(chars)
+
+
+def encode_frame(command: str, headers: Headers, body: str = "") -> bytes:
+    """A STOMP frame, with a content-length header for bodies."""
+    data = body.encode("utf-8")
+    lines = [command]
+    lines += [f"{_escape(key)}:{_escape(value)}" for key, value in headers.items()]
+    if data:
+        lines.append(f"content-length:{len(data)}")
+    return "\n".join(lines).encode("utf-8") + b"\n\n" + data + b"\0"
+
+
+def decode_frames(buffer: bytearray) -> List[Tuple[str, Headers, str]]:
+    """Removes the complete frames at the start of ``buffer`` and returns them.
+
+    Heart-beat newlines between frames are skipped, and an incomplete frame
+    is left in ``buffer`` for the next read.
+    """
+    frames = []
+    while True:
+        start = 0
+        while start < len(buffer) and buffer[start] in b"\r\n":
+            start += 1
+        end_of_headers = buffer.find(b"\n\n", start)
+        if end_of_headers < 0:
+            del buffer[:start]
+            return frames
+        command, *header_lines = (
+            buffer[start:end_of_headers].decode("utf-8").replace("\r", "").split("\n")
+        )
+        headers: Headers = {}
+        for line in header_lines:
+            key, _, value = line.partition(":")
+            # The first occurrence of a repeated header wins
+            headers.setdefault(_unescape(key), _unescape(value))
+        body_start = end_of_headers + 2
+        if "content-length" in headers:
+            body_end = body_start + int(headers["content-length"])
+            if len(buffer) <= body_end:
+                del buffer[:start]
+                return frames
+        else:
+            body_end = buffer.find(b"\0", body_start)
+            if body_end < 0:
+                del buffer[:start]
+                return frames
+        frames.append((command, headers, buffer[body_start:body_end].decode("utf-8")))
+        del buffer[: body_end + 1]
+
+
+class _Connection:
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._lock = threading.Lock()
+
+    def send(self, command: str, headers: Headers, body: str = ""):
+        with self._lock:
+            self.sock.sendall(encode_frame(command, headers, body))
+
+
+class _Queue:
+    def __init__(self):
+        self.pending: Deque[Tuple[Headers, str]] = collections.deque()
+        # (connection, subscription id) for STOMP clients, (None, consumer)
+        # for in-process consumers
+        self.subscribers: List[Tuple[Optional[_Connection], object]] = []
+        self.next_subscriber = 0
+
+
+class LocalBroker:
+    """A stand-in for the challenge server's message broker.
+
+    Speaks enough STOMP 1.1/1.2 on localhost for the tdl runner (and any STOMP
+    client) to connect, subscribe to a request queue and publish responses to
+    a response queue, so runners can be exercised without the challenge
+    server. Point a runner at it with ``hostname`` ``localhost`` and ``port``
+    set to ``LocalBroker.port``.
+
+    Messages sent to a queue nobody subscribes to are kept until someone does;
+    with several subscribers they take turns. Acknowledgements are accepted
+    and ignored, nothing is redelivered.
+
+    In-process code can use ``send`` and ``subscribe`` directly, as the load
+    generator does.
+
+    Examples
+    --------
+    >>> with LocalBroker(port=0) as broker:
+    ...     broker.subscribe("responses", print)
+    ...     broker.send("requests", '{"method":"sum","params":[1,2],"id":"X1"}')
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self._server: Optional[socket.socket] = None
+        self._queues: Dict[str, _Queue] = collections.defaultdict(_Queue)
+        self._connections: List[_Connection] = []
+        self._lock = threading.Lock()
+        self._subscribed = threading.Condition(self._lock)
+        self._message_ids = itertools.count(1)
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "LocalBroker":
+        """Starts accepting connections; with ``port`` 0 a free port is chosen."""
+        self._server = socket.create_server((self.host, self.port))
+        self.port = self._server.getsockname()[1]
+        self._spawn(self._accept, "broker-accept")
+        return self
+
+    def stop(self):
+        """Closes the listening socket and every client connection."""
+        if self._server is not None:
+            try:
+                # Wakes up the accept thread, which close alone does not
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+            self._server = None
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            self._close(connection)
+        for thread in self._threads:
+            thread.join(1.0)
+
+    def __enter__(self) -> "LocalBroker":
+        return self.start()
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def send(self, queue: str, body: str, headers: Optional[Headers] = None):
+        """Puts a message on ``queue``, delivering it if anyone subscribes."""
+        message = (dict(headers or {}), body)
+        # When the broker accepted it, in milliseconds since the epoch as
+        # ActiveMQ sets it
+        message[0]["timestamp"] = str(time.time_ns() // 1_000_000)
+        with self._lock:
+            target = self._queues[queue]
+            if not target.subscribers:
+                target.pending.append(message)
+                return
+            subscriber = self._next_subscriber(target)
+        self._deliver(queue, subscriber, message)
+
+    def subscribe(self, queue: str, consumer: Consumer):
+        """Calls ``consumer(headers, body)`` for messages on ``queue``.
+
+        The consumer runs on the thread of whoever sent the message, so it
+        should return quickly.
+        """
+        self._add_subscriber(queue, (None, consumer))
+
+    def unsubscribe(self, queue: str, consumer: Consumer):
+        self._remove_subscriber(queue, (None, consumer))
+
+    def wait_for_subscriber(self, queue: str, timeout: Optional[float] = None) -> bool:
+        """Waits until something subscribes to ``queue``; False on timeout."""
+        with self._subscribed:
+            return self._subscribed.wait_for(
+                lambda: bool(self._queues[queue].subscribers), timeout
+            )
+
+    def _next_subscriber(self, target: _Queue):
+        subscriber = target.subscribers[
+            target.next_subscriber % len(target.subscribers)
+        ]
+        target.next_subscriber += 1
+        return subscriber
+
+    def _add_subscriber(self, queue: str, subscriber):
+        with self._lock:
+            target = self._queues[queue]
+            target.subscribers.append(subscriber)
+            pending = list(target.pending)
+            target.pending.clear()
+            self._subscribed.notify_all()
+        for message in pending:
+            self._deliver(queue, subscriber, message)
+
+    def _remove_subscriber(self, queue: str, subscriber):
+        with self._lock:
+            target = self._queues[queue]
+            if subscriber in target.subscribers:
+                target.subscribers.remove(subscriber)
+
+    def _deliver(self, queue: str, subscriber, message: Tuple[Headers, str]):
+        connection, target = subscriber
+        headers, body = message
+        if connection is None:
+            target(headers, body)
+            return
+        frame_headers = dict(headers)
+        frame_headers.update(
+            {
+                "destination": queue,
+                "subscription": target,
+                "message-id": str(next(self._message_ids)),
+            }
+        )
+        # STOMP 1.2 clients acknowledge by the ack header
+        frame_headers["ack"] = frame_headers["message-id"]
+        try:
+            connection.send("MESSAGE", frame_headers, body)
+        except OSError:
+            self._close(connection)
+
+    def _spawn(self, target, name, *args):
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _accept(self):
+        server = self._server
+        while True:
+            try:
+                sock, _ = server.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection = _Connection(sock)
+            with self._lock:
+                self._connections.append(connection)
+            self._spawn(self._serve, "broker-connection", connection)
+
+    def _close(self, connection: _Connection):
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+            for target in self._queues.values():
+                target.subscribers = [
+                    subscriber
+                    for subscriber in target.subscribers
+                    if subscriber[0] is not connection
+                ]
+        try:
+            connection.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        connection.sock.close()
+
+    def _serve(self, connection: _Connection):
+        buffer = bytearray()
+        try:
+            while True:
+                data = connection.sock.recv(65536)
+                if not data:
+                    return
+                buffer += data
+                for command, headers, body in decode_frames(buffer):
+                    if not self._handle(connection, command, headers, body):
+                        return
+        except OSError:
+            return
+        finally:
+            self._close(connection)
+
+    def _handle(
+        self, connection: _Connection, command: str, headers: Headers, body: str
+    ) -> bool:
+        """Acts on one client frame; False once the client disconnects."""
+        if command in ("CONNECT", "STOMP"):
+            versions = headers.get("accept-version", "1.0").split(",")
+            connection.send(
+                "CONNECTED",
+                {
+                    "version": "1.2" if "1.2" in versions else versions[-1],
+                    "heart-beat": "0,0",
+                    "server": "LocalBroker",
+                },
+            )
+        elif command == "SEND":
+            self.send(
+                headers.get("destination", ""),
+                body,
+                {
+                    key: value
+                    for key, value in headers.items()
+                    if key not in ("destination", "content-length", "receipt")
+                },
+            )
+        elif command == "SUBSCRIBE":
+            self._add_subscriber(
+                headers["destination"], (connection, headers.get("id", ""))
+            )
+        elif command == "UNSUBSCRIBE":
+            with self._lock:
+                queues = list(self._queues)
+            for queue in queues:
+                self._remove_subscriber(queue, (connection, headers.get("id", "")))
+        elif command not in ("ACK", "NACK", "DISCONNECT"):
+            connection.send("ERROR", {"message": f"Unsupported command {command}"})
+        if "receipt" in headers:
+            connection.send("RECEIPT", {"receipt-id": headers["receipt"]})
+        return command != "DISCONNECT"
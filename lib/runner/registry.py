@@ -0,0 +1,139 @@
+import importlib
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+
+class LazySolution:
+    """A solution function imported on its first call.
+
+    ``on_load`` is called with the module name once the function has been
+    loaded, along with how long the import took, or None if something else
+    had imported the module already.
+
+    Picklable, so it can be sent to worker processes, which import the
+    module themselves on first use.
+    """
+
+    def __init__(
+        self,
+        module: str,
+        attribute: str,
+        on_load: Optional[Callable[[str, Optional[float]], None]] = None,
+    ):
+        self.module = module
+        self.attribute = attribute
+        self._on_load = on_load
+        self._function: Optional[Callable] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Callable:
+        function = self._function
+        if function is None:
+            with self._lock:
+                if self._function is None:
+                    imported = self.module in sys.modules
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.module)
+                    elapsed = time.perf_counter() - start
+                    self._function = getattr(module, self.attribute)
+                    if self._on_load is not None:
+                        self._on_load(self.module, None if imported else elapsed)
+                function = self._function
+        return function
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __getstate__(self):
+        return {"module": self.module, "attribute": self.attribute}
+
+    def __setstate__(self, state):
+        self.__init__(state["module"], state["attribute"])
+
+    def __repr__(self):
+        return f"LazySolution({self.module}.{self.attribute})"
+
+
+class SolutionRegistry:
+    """Maps runner method names to solutions imported on first request.
+
+    ``import_times`` records how long each module took to import (including
+    the modules it imported first), and ``on_load`` callbacks run once per
+    module, when the first of its solutions is loaded.
+
+    Examples
+    --------
+    >>> solutions = SolutionRegistry().register("sum", "solutions.SUM.sum_solution",
+    ...                                         "compute")
+    >>> solutions.prewarm(["sum"])
+    >>> builder.with_solution_for("sum", solutions["sum"])
+    """
+
+    def __init__(self):
+        self._solutions: Dict[str, LazySolution] = {}
+        self._on_load: Dict[str, Callable] = {}
+        self._loaded: Set[str] = set()
+        self._lock = threading.Lock()
+        self.import_times: Dict[str, float] = {}
+
+    def register(
+        self,
+        method: str,
+        module: str,
+        attribute: str,
+        on_load: Optional[Callable] = None,
+    ) -> "SolutionRegistry":
+        """Registers ``module.attribute`` as the solution of ``method``.
+
+        ``on_load`` is called with the module the first time one of its
+        solutions is loaded through this registry, even if something else
+        imported it before.
+        """
+        self._solutions[method] = LazySolution(module, attribute, self._record)
+        if on_load is not None:
+            self._on_load[module] = on_load
+        return self
+
+    def _record(self, module: str, seconds: Optional[float]):
+        with self._lock:
+            if module in self._loaded:
+                return
+            self._loaded.add(module)
+            if seconds is not None:
+                self.import_times[module] = seconds
+            on_load = self._on_load.get(module)
+        if on_load is not None:
+            on_load(sys.modules[module])
+
+    def __getitem__(self, method: str) -> LazySolution:
+        return self._solutions[method]
+
+    def __contains__(self, method: str) -> bool:
+        return method in self._solutions
+
+    def items(self) -> Iterable[Tuple[str, LazySolution]]:
+        return self._solutions.items()
+
+    def prewarm(self, methods: Optional[Iterable[str]] = None):
+        """Imports the solutions of ``methods`` (every method if None) now.
+
+        Raises
+        ------
+        KeyError
+            A method is not registered.
+        """
+        if methods is None:
+            methods = list(self._solutions)
+        for method in methods:
+            self._solutions[method].load()
+
+    def report(self) -> str:
+        """Import time of each module loaded so far, slowest first."""
+        return "\n".join(
+            f"{module}: {seconds * 1000:.1f}ms"
+            for module, seconds in sorted(
+                self.import_times.items(), key=lambda item: -item[1]
+            )
+        )
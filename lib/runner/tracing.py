@@ -0,0 +1,290 @@
+import collections
+import dataclasses
+import json
+import os
+import threading
+import time
+from typing import Callable, Deque, List, NamedTuple, Optional, Tuple
+
+FORMATS = ("chrome", "json")
+
+
+@dataclasses.dataclass(frozen=True)
+class TracingConfig:
+    """Where and how often the runner's request spans are exported.
+
+    ``capacity`` spans are kept in memory, the oldest dropped first, and
+    written to ``path`` every ``interval`` seconds (and when the runner
+    stops) as a Chrome trace (``chrome://tracing``, Perfetto) or plain JSON.
+    """
+
+    path: str = "trace.json"
+    format: str = "chrome"
+    interval: float = 10.0
+    capacity: int = 65536
+
+
+class Span(NamedTuple):
+    """One stage of handling a request; times are ``perf_counter_ns``."""
+
+    name: str
+    method: Optional[str]
+    request_id: Optional[str]
+    start_ns: int
+    duration_ns: int
+    thread_id: int
+
+
+class _SpanTimer:
+    __slots__ = ("tracer", "name", "method", "request_id", "start_ns")
+
+    def __init__(self, tracer, name, method, request_id):
+        self.tracer = tracer
+        self.name = name
+        self.method = method
+        self.request_id = request_id
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *_):
+        self.tracer.record(
+            self.name,
+            self.start_ns,
+            time.perf_counter_ns(),
+            self.method,
+            self.request_id,
+        )
+
+
+class _NullSpanTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+
+_NULL_SPAN_TIMER = _NullSpanTimer()
+
+
+class Tracer:
+    """Ring buffer of request spans, recorded only while ``enabled``.
+
+    Hooks check ``enabled`` before doing anything else, so tracing costs an
+    attribute lookup per hook when it is off. Recording appends a tuple to a
+    bounded deque, which is safe from any thread without a lock.
+
+    Examples
+    --------
+    >>> tracer = Tracer()
+    >>> tracer.enabled = True
+    >>> with tracer.span("solution", method="checkout", request_id="CHK_R1_001"):
+    ...     checkout("AAB")
+    >>> tracer.export("trace.json")
+    """
+
+    def __init__(self, capacity: int = 65536):
+        if capacity <= 0:
+            raise ValueError(f"Expected positive capacity, got {capacity}")
+        self.enabled = False
+        self._spans: Deque[Span] = collections.deque(maxlen=capacity)
+        self._exporter: Optional[threading.Thread] = None
+        self._stop_exporting = threading.Event()
+
+    @property
+    def capacity(self) -> int:
+        return self._spans.maxlen
+
+    def resize(self, capacity: int):
+        """Keeps the most recent ``capacity`` spans from now on."""
+        if capacity <= 0:
+            raise ValueError(f"Expected positive capacity, got {capacity}")
+        self._spans = collections.deque(self._spans, maxlen=capacity)
+
+    def record(
+        self,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        method: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ):
+        self._spans.append(
+            Span(
+                name,
+                method,
+                request_id,
+                start_ns,
+                end_ns - start_ns,
+                threading.get_ident(),
+            )
+        )
+
+    def span(
+        self, name: str, method: Optional[str] = None, request_id: Optional[str] = None
+    ):
+        """Context manager recording the time spent in its block."""
+        if not self.enabled:
+            return _NULL_SPAN_TIMER
+        return _SpanTimer(self, name, method, request_id)
+
+    def spans(self) -> List[Span]:
+        """The recorded spans, oldest first."""
+        return list(self._spans)
+
+    def clear(self):
+        self._spans.clear()
+
+    def to_chrome_trace(self) -> dict:
+        """Spans as complete events of the Chrome trace event format."""
+        pid = os.getpid()
+        spans = self.spans()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        events = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": thread_id,
+                "args": {"name": names.get(thread_id, str(thread_id))},
+            }
+            for thread_id in sorted({span.thread_id for span in spans})
+        ]
+        for span in spans:
+            args = {}
+            if span.method is not None:
+                args["method"] = span.method
+            if span.request_id is not None:
+                args["id"] = span.request_id
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.method or "runner",
+                    "ph": "X",
+                    "ts": span.start_ns / 1000,
+                    "dur": span.duration_ns / 1000,
+                    "pid": pid,
+                    "tid": span.thread_id,
+                    "args": args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_dict(self) -> dict:
+        return {"spans": [span._asdict() for span in self.spans()]}
+
+    def export(self, path: str, format: str = "chrome"):
+        """Writes the spans to ``path``, replacing it atomically.
+
+        Raises
+        ------
+        ValueError
+            ``format`` is not one of ``FORMATS``.
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Expected format in {FORMATS}, got {format!r}")
+        document = self.to_chrome_trace() if format == "chrome" else self.to_dict()
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(document, f)
+        os.replace(temp_path, path)
+
+    def start_exporting(self, path: str, interval: float, format: str = "chrome"):
+        """Exports to ``path`` every ``interval`` seconds until stopped."""
+        self.stop_exporting()
+        self._stop_exporting.clear()
+
+        def export_periodically():
+            while not self._stop_exporting.wait(interval):
+                self._export_logging_errors(path, format)
+            self._export_logging_errors(path, format)
+
+        self._exporter = threading.Thread(
+            target=export_periodically, name="trace-exporter", daemon=True
+        )
+        self._exporter.start()
+
+    def _export_logging_errors(self, path: str, format: str):
+        try:
+            self.export(path, format)
+        except OSError as e:
+            print(f"ERROR: Failed to export trace: {e}")
+
+    def stop_exporting(self):
+        """Stops exporting periodically, after one last export."""
+        if self._exporter is not None:
+            self._stop_exporting.set()
+            self._exporter.join()
+            self._exporter = None
+
+
+TRACER = Tracer()
+
+
+def start_tracing(config: TracingConfig) -> Tracer:
+    """Enables TRACER and exports its spans as ``config`` says."""
+    if config.format not in FORMATS:
+        raise ValueError(f"Expected format in {FORMATS}, got {config.format!r}")
+    TRACER.resize(config.capacity)
+    TRACER.enabled = True
+    TRACER.start_exporting(config.path, config.interval, config.format)
+    return TRACER
+
+
+def stop_tracing():
+    """Disables TRACER and writes what it recorded one last time."""
+    TRACER.enabled = False
+    TRACER.stop_exporting()
+
+
+def disable_inherited_tracing():
+    """Disables TRACER in a forked worker process.
+
+    Workers inherit an enabled TRACER but not its exporter thread, so their
+    spans would never be written.
+    """
+    TRACER.enabled = False
+    TRACER.clear()
+
+
+class TracedSolution:
+    """A solution whose calls are recorded as ``name`` spans of ``method``.
+
+    ``for_requests`` gives a copy recording its spans under the ids of the
+    requests it handles, one span per request for a batch. Picklable if the
+    solution is, for worker processes, but worker processes do not trace
+    (see ``disable_inherited_tracing``).
+    """
+
+    def __init__(
+        self,
+        method: str,
+        solution: Callable,
+        name: str = "solution",
+        request_ids: Tuple[str, ...] = (),
+    ):
+        self.method = method
+        self.solution = solution
+        self.name = name
+        self.request_ids = request_ids
+
+    def for_requests(self, *request_ids: str) -> "TracedSolution":
+        return TracedSolution(self.method, self.solution, self.name, request_ids)
+
+    def __call__(self, *args, **kwargs):
+        if not TRACER.enabled:
+            return self.solution(*args, **kwargs)
+        start = time.perf_counter_ns()
+        try:
+            return self.solution(*args, **kwargs)
+        finally:
+            end = time.perf_counter_ns()
+            for request_id in self.request_ids or (None,):
+                TRACER.record(self.name, start, end, self.method, request_id)
+
+    def __repr__(self):
+        return f"TracedSolution({self.method}, {self.solution!r})"
@@ -3,10 +3,13 @@ import os
 from tdl.queue.implementation_runner_config import ImplementationRunnerConfig
 from tdl.runner.challenge_session_config import ChallengeSessionConfig
 
+from .async_runner import BatchingConfig
+from .concurrent_runner import ConcurrencyConfig
 from .credentials_config_file import (
     read_from_config_file,
     read_from_config_file_with_default,
 )
+from .tracing import TracingConfig
 
 
 class Utils:
@@ -33,3 +36,56 @@ class Utils:
             .set_response_queue_name(read_from_config_file("tdl_response_queue_name"))
             .set_hostname(read_from_config_file("tdl_hostname"))
         )
+
+    @staticmethod
+    def get_concurrency_config():
+        """Worker pools for the runner, or None to handle one request at a time"""
+        threads = read_from_config_file_with_default("runner_threads", 0)
+        if threads <= 0:
+            return None
+        process_methods = read_from_config_file_with_default(
+            "runner_process_methods", ""
+        )
+        return ConcurrencyConfig(
+            threads=threads,
+            processes=read_from_config_file_with_default("runner_processes", 0),
+            process_methods=frozenset(
+                method.strip()
+                for method in process_methods.split(",")
+                if method.strip()
+            ),
+            max_in_flight=read_from_config_file_with_default(
+                "runner_max_in_flight", 64
+            ),
+        )
+
+    @staticmethod
+    def get_batching_config():
+        """Micro-batching for the asyncio runner, or None to not use it"""
+        if not read_from_config_file_with_default("runner_async", False):
+            return None
+        return BatchingConfig(
+            max_batch_size=read_from_config_file_with_default(
+                "runner_max_batch_size", 256
+            ),
+            max_wait=read_from_config_file_with_default("runner_max_batch_wait_ms", 2)
+            / 1000,
+        )
+
+    @staticmethod
+    def get_prewarm_methods():
+        """Methods whose solutions are imported at startup rather than lazily"""
+        methods = read_from_config_file_with_default("runner_prewarm", "")
+        return [method.strip() for method in methods.split(",") if method.strip()]
+
+    @staticmethod
+    def get_tracing_config():
+        """Request tracing of the runner, or None to not trace"""
+        if not read_from_config_file_with_default("runner_trace", False):
+            return None
+        return TracingConfig(
+            path=read_from_config_file_with_default("runner_trace_file", "trace.json"),
+            format=read_from_config_file_with_default("runner_trace_format", "chrome"),
+            interval=read_from_config_file_with_default("runner_trace_interval_s", 10),
+            capacity=read_from_config_file_with_default("runner_trace_capacity", 65536),
+        )
@@ -40,35 +40,128 @@
          * Anything really, provided that this file stays runnable.
 
 """
+import dataclasses
+import signal
 import sys
 
+from runner.async_runner import AsyncQueueBasedImplementationRunnerBuilder
+from runner.concurrent_runner import (
+    ConcurrencyConfig,
+    ConcurrentQueueBasedImplementationRunnerBuilder,
+)
+from runner.registry import LazySolution, SolutionRegistry
+from runner.tracing import TracedSolution, start_tracing, stop_tracing
 from runner.user_input_action import get_user_input
 from runner.utils import Utils
-from solutions.ARRS import array_sum
-from solutions.CHK import checkout
-from solutions.CHL import checklite_solution
-from solutions.FIZ import fizz_buzz_solution
-from solutions.HLO import hello_solution
-from solutions.IRNG import int_range
-from solutions.SUM import sum_solution
 from tdl.queue.queue_based_implementation_runner import (
     QueueBasedImplementationRunnerBuilder,
 )
 from tdl.runner.challenge_session import ChallengeSession
 
-runner = (
-    QueueBasedImplementationRunnerBuilder()
-    .set_config(Utils.get_runner_config())
-    .with_solution_for("sum", sum_solution.compute)
-    .with_solution_for("hello", hello_solution.hello)
-    .with_solution_for("array_sum", array_sum.compute)
-    .with_solution_for("int_range", int_range.generate)
-    .with_solution_for("fizz_buzz", fizz_buzz_solution.fizz_buzz)
-    .with_solution_for("checkout", checkout)
-    .with_solution_for("checklite", checklite_solution.checklite)
-    .create()
+CHECKOUT_MODULE = "solutions.CHK.checkout_solution"
+
+
+def watch_catalogue(checkout_solution):
+    """Picks up catalogue.json changes without restarting the runner"""
+    checkout_solution.watch_catalogue()
+
+
+def reload_catalogue(*_):
+    """SIGHUP handler: reloads the catalogue if checkout has been loaded"""
+    checkout_solution = sys.modules.get(CHECKOUT_MODULE)
+    if checkout_solution is not None:
+        try:
+            checkout_solution.STORE.reload()
+        except Exception as e:
+            print(f"ERROR: Failed to reload catalogue: {e}")
+
+
+# Solutions are imported on the first request for their method. List methods
+# in runner_prewarm (comma separated) in config/credentials.config to import
+# them at startup instead.
+solutions = (
+    SolutionRegistry()
+    .register("sum", "solutions.SUM.sum_solution", "compute")
+    .register("hello", "solutions.HLO.hello_solution", "hello")
+    .register("array_sum", "solutions.ARRS.array_sum", "compute")
+    .register("int_range", "solutions.IRNG.int_range", "generate")
+    .register("fizz_buzz", "solutions.FIZ.fizz_buzz_solution", "fizz_buzz")
+    .register("checkout", CHECKOUT_MODULE, "checkout", on_load=watch_catalogue)
+    .register("checkout_many", CHECKOUT_MODULE, "checkout_many")
+    .register("checklite", "solutions.CHL.checklite_solution", "checklite")
 )
 
-ChallengeSession.for_runner(runner).with_config(
-    Utils.get_config()
-).with_action_provider(lambda: get_user_input(sys.argv[1:])).start()
+
+def build_runner(runner_config):
+    """The runner chosen in config/credentials.config, with every solution.
+
+    Set runner_async=true (and optionally runner_max_batch_size,
+    runner_max_batch_wait_ms) to micro-batch checkout requests on an asyncio
+    runner, or runner_threads (and optionally runner_processes,
+    runner_process_methods, runner_max_in_flight) to handle requests on
+    worker pools.
+
+    Set runner_trace=true (and optionally runner_trace_file,
+    runner_trace_format, runner_trace_interval_s, runner_trace_capacity) to
+    record how long each request spends in the broker, decoding, dispatch,
+    the solution, encoding and publishing, and export it periodically.
+    """
+    batching = Utils.get_batching_config()
+    concurrency = Utils.get_concurrency_config()
+    tracing = Utils.get_tracing_config()
+
+    def traced(method, solution, name="solution"):
+        if tracing is None:
+            return solution
+        return TracedSolution(method, solution, name)
+
+    if tracing is not None and batching is None and concurrency is None:
+        # The tracing hooks live in the worker pool runners; a single worker
+        # handles requests one at a time like the default runner.
+        concurrency = ConcurrencyConfig(threads=1, max_in_flight=1)
+    if batching is not None:
+        runner_builder = AsyncQueueBasedImplementationRunnerBuilder(
+            batching
+        ).with_batch_solution_for(
+            "checkout",
+            traced("checkout", solutions["checkout_many"], "batch"),
+        )
+    elif concurrency is not None:
+        if concurrency.processes and "checkout" in concurrency.process_methods:
+            # Worker processes hold their own catalogue, which the parent's
+            # polling and SIGHUP do not reach
+            concurrency = dataclasses.replace(
+                concurrency,
+                process_initializer=LazySolution(CHECKOUT_MODULE, "watch_catalogue"),
+            )
+        runner_builder = ConcurrentQueueBasedImplementationRunnerBuilder(concurrency)
+    else:
+        runner_builder = QueueBasedImplementationRunnerBuilder()
+
+    runner_builder.set_config(runner_config)
+    for method, solution in solutions.items():
+        runner_builder.with_solution_for(method, traced(method, solution))
+    if tracing is not None:
+        start_tracing(tracing)
+    return runner_builder.create()
+
+
+def prewarm_solutions():
+    prewarm = Utils.get_prewarm_methods()
+    if prewarm:
+        solutions.prewarm(prewarm)
+        print(solutions.report())
+
+
+if __name__ == "__main__":
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, reload_catalogue)
+    prewarm_solutions()
+    runner = build_runner(Utils.get_runner_config())
+
+    try:
+        ChallengeSession.for_runner(runner).with_config(
+            Utils.get_config()
+        ).with_action_provider(lambda: get_user_input(sys.argv[1:])).start()
+    finally:
+        stop_tracing()
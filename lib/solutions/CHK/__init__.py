@@ -1 +1,8 @@
-from .checkout_solution import checkout
+from .checkout_solution import (
+    checkout,
+    checkout_detailed,
+    checkout_many,
+    checkout_stream,
+    checkout_with_version,
+)
+from .session import CheckoutSession
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import collections
+import dataclasses
+import mmap
+import os
+import struct
+import threading
+from typing import Hashable, Optional, Tuple
+
+
+@dataclasses.dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    size: int
+    maxsize: int
+
+
+class CheckoutCache:
+    """Bounded least-recently-used cache of basket totals.
+
+    Entries belong to one catalogue: looking up with a different ``catalogue``
+    than the entries were stored under empties the cache first, so a catalogue
+    reload never serves stale totals.
+
+    Parameters
+    ----------
+    maxsize : int
+        Number of totals kept before the least recently used is evicted.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        if maxsize <= 0:
+            raise ValueError(f"Expected positive maxsize, got {maxsize}")
+        self.maxsize = maxsize
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self._catalogue: object = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_catalogue(self, catalogue: object):
+        if catalogue is not self._catalogue:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._catalogue = catalogue
+
+    def get(self, key: Hashable, catalogue: object) -> Optional[int]:
+        """Returns the cached total of ``key`` or None.
+
+        Parameters
+        ----------
+        key : hashable
+            Canonical basket key, e.g. the count vector as a tuple.
+        catalogue : object
+            The catalogue (or its price table) the total is for.
+        """
+        with self._lock:
+            self._check_catalogue(catalogue)
+            total = self._entries.get(key)
+            if total is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return total
+
+    def put(self, key: Hashable, catalogue: object, total: int):
+        with self._lock:
+            self._check_catalogue(catalogue)
+            self._entries[key] = total
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            invalidations=self.invalidations,
+            size=len(self._entries),
+            maxsize=self.maxsize,
+        )
+
+
+# Layout of a SharedCheckoutCache file: a header, then fixed-size slots of a
+# sequence number, the catalogue tag, the key, the total and a checksum.
+_SHARED_MAGIC = b"CHKS0001"
+_SHARED_HEADER = struct.Struct("=8sII")
+_KEY_LENGTH = 27  # (optimal, *counts)
+_SEQUENCE = struct.Struct("=I")
+_SLOT = struct.Struct(f"=IQ{_KEY_LENGTH}IqQ")
+_MASK64 = (1 << 64) - 1
+_MAX_KEY_VALUE = (1 << 32) - 1
+_MAX_TOTAL = (1 << 63) - 1
+
+
+class SharedCheckoutCache:
+    """Cache of basket totals in a memory-mapped file shared by processes.
+
+    Every process that opens the same ``path`` maps the same pages, so a
+    total computed by one worker is a hit for all the others, and a worker
+    started later begins with the cache already warm. Put the file on a
+    memory-backed filesystem such as ``/dev/shm`` to keep it off disk.
+
+    The file is a fixed number of slots, each holding one entry, addressed by
+    a hash of the key; a new entry overwrites whatever was in its slot. No
+    lock is taken: a writer makes the slot's sequence number odd while it
+    writes, and readers treat an odd or changed sequence number, or an entry
+    whose checksum does not match, as a miss. Two processes writing the same
+    slot at once can lose an entry, never serve a wrong total.
+
+    Entries are tagged with a hash of the catalogue they were computed
+    against, so a catalogue reload makes old entries misses without clearing
+    the file. The catalogue must hash the same in every process, which a
+    ``PriceTable`` does.
+
+    Keys are ``(optimal, *counts)`` tuples of 27 ints, as built by
+    ``price_basket``; keys with counts of 2**32 or more are not cached.
+
+    Parameters
+    ----------
+    path : str
+        Created with ``slots`` slots if missing; an existing file keeps the
+        number of slots it was created with.
+    slots : int
+        Number of entries the cache holds at most.
+    """
+
+    def __init__(self, path: str, slots: int = 65536):
+        if slots <= 0:
+            raise ValueError(f"Expected positive slots, got {slots}")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            size = _SHARED_HEADER.size + slots * _SLOT.size
+            if os.fstat(fd).st_size == 0:
+                # Every creator writes the same header, so racing is harmless
+                os.ftruncate(fd, size)
+                os.pwrite(fd, _SHARED_HEADER.pack(_SHARED_MAGIC, slots, _SLOT.size), 0)
+            self._map = mmap.mmap(fd, 0)
+        finally:
+            os.close(fd)
+        magic, slots, slot_size = _SHARED_HEADER.unpack_from(
+            self._map.read(_SHARED_HEADER.size).ljust(_SHARED_HEADER.size, b"\0")
+        )
+        if magic != _SHARED_MAGIC or slot_size != _SLOT.size:
+            self._map.close()
+            raise ValueError(f"{path} is not a shared checkout cache")
+        if len(self._map) != _SHARED_HEADER.size + slots * slot_size:
+            self._map.close()
+            raise ValueError(f"{path} is truncated")
+        self.path = path
+        self.maxsize = slots
+        self._catalogue: object = None
+        self._tag = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _tag_for(self, catalogue: object) -> int:
+        if catalogue is not self._catalogue:
+            tag = hash(catalogue) & _MASK64
+            if self._catalogue is not None and tag != self._tag:
+                self.invalidations += 1
+            self._tag = tag
+            self._catalogue = catalogue
+        return self._tag
+
+    def _locate(self, key: Hashable, catalogue: object) -> Tuple[int, int, int]:
+        tag = self._tag_for(catalogue)
+        key_hash = hash((tag, *key)) & _MASK64
+        offset = _SHARED_HEADER.size + (key_hash % self.maxsize) * _SLOT.size
+        return tag, key_hash, offset
+
+    def get(self, key: Hashable, catalogue: object) -> Optional[int]:
+        """Returns the cached total of ``key`` or None, see ``CheckoutCache``."""
+        if len(key) != _KEY_LENGTH:
+            self.misses += 1
+            return None
+        tag, key_hash, offset = self._locate(key, catalogue)
+        sequence, stored_tag, *stored_key, total, checksum = _SLOT.unpack_from(
+            self._map, offset
+        )
+        if (
+            sequence == 0
+            or sequence & 1
+            or stored_tag != tag
+            or tuple(stored_key) != tuple(key)
+            or checksum != hash((key_hash, total)) & _MASK64
+            or _SEQUENCE.unpack_from(self._map, offset)[0] != sequence
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return total
+
+    def put(self, key: Hashable, catalogue: object, total: int):
+        if (
+            len(key) != _KEY_LENGTH
+            or max(key) > _MAX_KEY_VALUE
+            or not 0 <= total <= _MAX_TOTAL
+        ):
+            return
+        tag, key_hash, offset = self._locate(key, catalogue)
+        sequence, stored_tag, *stored_key, _, _ = _SLOT.unpack_from(self._map, offset)
+        # Rewriting the same entry, e.g. after a racing miss, evicts nothing
+        if sequence and (stored_tag != tag or tuple(stored_key) != tuple(key)):
+            self.evictions += 1
+        writing = ((sequence + 1) | 1) & _MAX_KEY_VALUE
+        _SEQUENCE.pack_into(self._map, offset, writing)
+        _SLOT.pack_into(
+            self._map,
+            offset,
+            writing,
+            tag,
+            *key,
+            total,
+            hash((key_hash, total)) & _MASK64,
+        )
+        # Skips 0, which marks a slot never written
+        _SEQUENCE.pack_into(self._map, offset, (writing + 1) & _MAX_KEY_VALUE or 2)
+
+    def clear(self):
+        """Empties the cache for every process sharing it."""
+        self._map[_SHARED_HEADER.size :] = bytes(len(self._map) - _SHARED_HEADER.size)
+
+    def close(self):
+        self._map.close()
+
+    @property
+    def stats(self) -> CacheStats:
+        """Hits, misses and evictions of this process; size of the shared file."""
+        size = sum(
+            1
+            for offset in range(_SHARED_HEADER.size, len(self._map), _SLOT.size)
+            if _SEQUENCE.unpack_from(self._map, offset)[0]
+        )
+        return CacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            invalidations=self.invalidations,
+            size=size,
+            maxsize=self.maxsize,
+        )
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import signal
+import struct
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .pricing import SKU_COUNT, SKU_INDEX, SKUS, CompiledOffer, PriceTable
+
+DEFAULT_CATALOGUE = os.path.join(os.path.dirname(__file__), "catalogue.json")
+
+# Compiled catalogue file, a parse cache that saves later loads decoding the
+# JSON: magic, version, then a flat int32 array of
+# prices[26], offer count, and per offer (price, choose, n, n entries) where
+# entries are (index, quantity) pairs for fixed offers or member indices for
+# group offers.
+_MAGIC = b"CHKC0001"
+_HEADER = struct.Struct("=8s16s")
+
+
+@dataclasses.dataclass(frozen=True)
+class Catalogue:
+    """A compiled price/offer catalogue.
+
+    ``version`` identifies the source data, so two catalogues with the same
+    version price every basket the same.
+    """
+
+    version: str
+    table: PriceTable
+
+
+def _sku_index(sku: Any) -> int:
+    if sku not in SKU_INDEX:
+        raise ValueError(f"Expected SKU in [A-Z], got {sku!r}")
+    return SKU_INDEX[sku]
+
+
+def _positive(offer: Dict[str, Any], key: str) -> int:
+    value = offer.get(key)
+    if not isinstance(value, int) or value <= 0:
+        raise ValueError(f"Expected positive integer {key} in offer {offer}")
+    return value
+
+
+def compile_offer(offer: Dict[str, Any], prices: Dict[str, int]) -> CompiledOffer:
+    """Compiles one offer from the catalogue file.
+
+    Supported ``type`` values:
+
+    * ``multi_buy``: ``quantity`` of ``sku`` for ``price``.
+    * ``get_free``: buy ``quantity`` of ``sku`` and get one ``free_sku`` free.
+    * ``group``: any ``quantity`` of the ``skus`` for ``price``.
+
+    Raises
+    ------
+    ValueError
+    """
+    kind = offer.get("type")
+    if kind == "multi_buy":
+        return CompiledOffer(
+            price=_positive(offer, "price"),
+            removed=((_sku_index(offer.get("sku")), _positive(offer, "quantity")),),
+        )
+    if kind == "get_free":
+        sku, free_sku = offer.get("sku"), offer.get("free_sku")
+        quantity = _positive(offer, "quantity")
+        removed = {_sku_index(sku): quantity}
+        free_index = _sku_index(free_sku)
+        removed[free_index] = removed.get(free_index, 0) + 1
+        return CompiledOffer(
+            price=prices[sku] * quantity, removed=tuple(sorted(removed.items()))
+        )
+    if kind == "group":
+        skus = offer.get("skus")
+        if not isinstance(skus, str) or not skus:
+            raise ValueError(f"Expected skus string in offer {offer}")
+        members = sorted({_sku_index(sku) for sku in skus})
+        members.sort(key=lambda index: -prices[SKUS[index]])
+        return CompiledOffer(
+            price=_positive(offer, "price"),
+            choose=_positive(offer, "quantity"),
+            members=tuple(members),
+        )
+    raise ValueError(f"Unknown offer type {kind!r} in offer {offer}")
+
+
+def parse_catalogue(data: Dict[str, Any], version: str) -> Catalogue:
+    """Compiles the decoded contents of a catalogue file.
+
+    Parameters
+    ----------
+    data : dict
+        ``{"prices": {sku: price}, "offers": [offer, ...]}`` with offers in
+        the order they are applied, see ``compile_offer``.
+    version : str
+
+    Returns
+    -------
+    Catalogue
+
+    Raises
+    ------
+    ValueError
+    """
+    prices = data.get("prices", {})
+    missing = [sku for sku in SKUS if not isinstance(prices.get(sku), int)]
+    if missing:
+        raise ValueError(f"Expected integer prices for SKUs {missing}")
+    offers = tuple(compile_offer(offer, prices) for offer in data.get("offers", []))
+    return Catalogue(
+        version=version,
+        table=PriceTable(prices=tuple(prices[sku] for sku in SKUS), offers=offers),
+    )
+
+
+def dump_compiled(catalogue: Catalogue) -> bytes:
+    """Serializes a catalogue to the compiled binary format."""
+    values: List[int] = list(catalogue.table.prices)
+    values.append(len(catalogue.table.offers))
+    for offer in catalogue.table.offers:
+        if offer.choose:
+            entries = list(offer.members)
+        else:
+            entries = [value for pair in offer.removed for value in pair]
+        values.extend((offer.price, offer.choose, len(entries), *entries))
+    header = _HEADER.pack(_MAGIC, catalogue.version.encode("ascii"))
+    return header + struct.pack(f"={len(values)}i", *values)
+
+
+def load_compiled(buffer) -> Catalogue:
+    """Reads a catalogue from the compiled binary format.
+
+    Parameters
+    ----------
+    buffer : bytes-like
+        For example the contents of a file written from ``dump_compiled``.
+
+    Raises
+    ------
+    ValueError
+    """
+    magic, version = _HEADER.unpack_from(buffer)
+    if magic != _MAGIC:
+        raise ValueError("Not a compiled catalogue")
+    with memoryview(buffer) as view, view[_HEADER.size :].cast("i") as values:
+        prices = tuple(values[:SKU_COUNT])
+        position = SKU_COUNT + 1
+        offers = []
+        for _ in range(values[SKU_COUNT]):
+            price, choose, size = values[position : position + 3]
+            entries = tuple(values[position + 3 : position + 3 + size])
+            position += 3 + size
+            if choose:
+                offers.append(
+                    CompiledOffer(price=price, choose=choose, members=entries)
+                )
+            else:
+                removed = tuple(zip(entries[::2], entries[1::2]))
+                offers.append(CompiledOffer(price=price, removed=removed))
+    return Catalogue(
+        version=version.rstrip(b"\0").decode("ascii"),
+        table=PriceTable(prices=prices, offers=tuple(offers)),
+    )
+
+
+def load_catalogue(
+    path: str = DEFAULT_CATALOGUE, cache_dir: Optional[str] = None
+) -> Catalogue:
+    """Loads a JSON catalogue file, going through a compiled parse cache if given.
+
+    The version is a hash of the file contents. With ``cache_dir`` a compiled
+    copy is kept as ``<cache_dir>/<version>.chkc``, which later loads, in any
+    process, decode instead of parsing the JSON again. This only speeds up
+    starting: each process still builds its own PriceTable from it.
+
+    Parameters
+    ----------
+    path : str
+    cache_dir : str, optional
+
+    Returns
+    -------
+    Catalogue
+    """
+    with open(path, "rb") as f:
+        source = f.read()
+    version = hashlib.sha256(source).hexdigest()[:16]
+    if cache_dir is None:
+        return parse_catalogue(json.loads(source), version)
+    cache_path = os.path.join(cache_dir, f"{version}.chkc")
+    try:
+        with open(cache_path, "rb") as f:
+            return load_compiled(f.read())
+    except (OSError, ValueError, struct.error):
+        pass
+    catalogue = parse_catalogue(json.loads(source), version)
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(dump_compiled(catalogue))
+    os.replace(temp_path, cache_path)
+    return catalogue
+
+
+class CatalogueStore:
+    """Holds the current catalogue snapshot of a catalogue file.
+
+    ``snapshot`` is swapped as a whole when the file changes, so a caller that
+    reads it once keeps pricing against the same catalogue even if a reload
+    happens meanwhile.
+    """
+
+    def __init__(self, path: str = DEFAULT_CATALOGUE, cache_dir: Optional[str] = None):
+        self.path = path
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._stop_polling: Optional[threading.Event] = None
+        self._stat = self._file_stat()
+        self.snapshot = load_catalogue(path, cache_dir)
+
+    def _file_stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self) -> bool:
+        """Loads the catalogue file and swaps it in if its version changed.
+
+        Returns
+        -------
+        bool
+            Whether a new snapshot was swapped in.
+
+        Raises
+        ------
+        OSError, ValueError
+            The file could not be read or compiled; the current snapshot is
+            kept.
+        """
+        with self._lock:
+            self._stat = self._file_stat()
+            catalogue = load_catalogue(self.path, self.cache_dir)
+            if catalogue.version == self.snapshot.version:
+                return False
+            self.snapshot = catalogue
+            return True
+
+    def poll(self) -> bool:
+        """Reloads if the file's mtime or size changed since the last load.
+
+        Errors are reported and the current snapshot is kept.
+        """
+        if self._file_stat() == self._stat:
+            return False
+        return self._reload_or_keep()
+
+    def _reload_or_keep(self) -> bool:
+        try:
+            return self.reload()
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Keeping catalogue {self.snapshot.version}: {e}")
+            return False
+
+    def start_polling(self, interval: float = 1.0) -> threading.Thread:
+        """Polls the catalogue file every ``interval`` seconds in a thread."""
+        self.stop_polling()
+        stop = self._stop_polling = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.poll()
+
+        thread = threading.Thread(target=run, name="catalogue-poll", daemon=True)
+        thread.start()
+        return thread
+
+    def stop_polling(self):
+        if self._stop_polling is not None:
+            self._stop_polling.set()
+            self._stop_polling = None
+
+    def reload_on_signal(self, signum: int = getattr(signal, "SIGHUP", 0)):
+        """Reloads the catalogue file when the process receives ``signum``.
+
+        Must be called from the main thread.
+        """
+        if signum:
+            signal.signal(signum, lambda *_: self._reload_or_keep())
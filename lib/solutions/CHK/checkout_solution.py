@@ -1,11 +1,30 @@
 from __future__ import annotations
 
+import array
 import collections
 import dataclasses
 import functools
-import re
+import operator
+import os
+import time
 from enum import Enum
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .cache import CheckoutCache, SharedCheckoutCache
+from .catalogue import DEFAULT_CATALOGUE, CatalogueStore
+from .instrumentation import METRICS, price_counts_instrumented
+from .optimal import price_counts_optimal
+from .pricing import (
+    SKU_INDEX,
+    SKUS,
+    PriceBreakdown,
+    PriceTable,
+    count_skus,
+    first_invalid_index,
+    price_counts_detailed,
+    scan_skus,
+)
+from .stream import CHUNK_SIZE, count_stream
 
 
 @functools.total_ordering
@@ -37,28 +56,43 @@ class Discount:
             )
         return self._sorted_required_items
 
-    def choose_items_to_remove(self, basket: Basket):
+    def choose_items_to_remove(self, basket: Basket, times: int = 1):
+        """Picks the units of a group offer applied ``times`` times.
+
+        The most expensive eligible units are taken first, in one pass over
+        the members whatever ``times`` is.
+        """
         if self.choose is None:
             return
-        to_remove = self.choose
-        basket_copy = basket.__copy__()
-        skus = ""
+        to_remove = self.choose * times
+        removed = [0] * len(SKUS)
         for item in self.sorted_required_items:
             if to_remove <= 0:
                 break
-            if (
-                item.key in basket_copy.items
-                and basket_copy.items[item.key].quantity > 0
-            ):
-                can_remove = min(basket_copy.items[item.key].quantity, to_remove)
-                basket_copy.items[item.key].quantity -= can_remove
-                skus = f"{skus}{item.key * can_remove}"
-                to_remove -= can_remove
+            index = SKU_INDEX[item.key]
+            can_remove = min(basket.counts[index], to_remove)
+            removed[index] = can_remove
+            to_remove -= can_remove
         if to_remove > 0:
             raise TypeError("Offer not met")
-        self.removed_items = Basket(skus)
-
-    def apply_discount(self, basket: Basket):
+        self.removed_items = Basket.from_counts(removed)
+
+    def times_applicable(self, basket: Basket) -> int:
+        """Number of times the discount fits in ``basket``."""
+        counts = basket.counts
+        if self.choose is not None:
+            available = sum(
+                counts[SKU_INDEX[item.key]] for item in self.sorted_required_items
+            )
+            return available // self.choose
+        # What an application removes, e.g. EEB for 2E get one B free
+        return min(
+            counts[index] // quantity
+            for index, quantity in enumerate(self.removed_items.counts)
+            if quantity
+        )
+
+    def apply_discount(self, basket: Basket, times: int = 1):
         """
         Applies the discount to the provided basket.
 
@@ -66,28 +100,44 @@ class Discount:
         ----------
         basket : Basket
             The basket to which the discount will be applied.
+        times : int
+            Number of applications, all removed in one step.
 
         Returns
         -------
-        Basket
-            The basket after applying the discount.
+        int
+            The price charged for the applications.
 
         Raises
         ------
         ValueError,TypeError
         """
-        self.choose_items_to_remove(basket)
+        self.choose_items_to_remove(basket, times)
+        removed = self.removed_items
+        if self.choose is None and times != 1:
+            removed = Basket.from_counts([count * times for count in removed.counts])
+        basket -= removed
+        return self.discounted_price * times
 
-        basket -= self.removed_items
-        return self.discounted_price
+    def apply_all(self, basket: Basket) -> int:
+        """Applies the discount as many times as it fits, in one step.
 
+        Returns
+        -------
+        int
+            The price charged for the applications, 0 if none fit.
+        """
+        times = self.times_applicable(basket)
+        if not times:
+            return 0
+        return self.apply_discount(basket, times)
 
     def __le__(self, other):
         return self.total_discounted_price <= other.total_discounted_price
 
 
 @functools.total_ordering
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Item:
     key: str
     price: int
@@ -142,78 +192,88 @@ def combine_skus_duplicates(skus: str) -> Dict[str, int]:
 
 
 class Basket:
-    _items: Dict[str, Item]
+    """Quantities of each SKU, stored as a 26-slot ``array('i')``.
+
+    ``value`` and ``items`` are priced with the current catalogue snapshot.
+    ``items`` is a view built on access; changing the returned ``Item``
+    objects does not change the basket.
+    """
+
+    __slots__ = ("counts",)
 
     @property
     def value(self):
-        return sum([item.total_price for item in self.items.values()])
+        return sum(map(operator.mul, self.counts, STORE.snapshot.table.prices))
 
     @property
     def items(self) -> Dict[str, Item]:
-        if not hasattr(self, "_items"):
-            self._items = {}
-        return self._items
+        prices = STORE.snapshot.table.prices
+        return {
+            SKUS[index]: Item(key=SKUS[index], price=prices[index], quantity=count)
+            for index, count in enumerate(self.counts)
+            if count
+        }
 
     def __init__(self, skus):
-        combined = combine_skus_duplicates(skus)
-        for key, quantity in combined.items():
-            item = Items[key].value
-            self.items[key] = Item(key=key, quantity=quantity, price=item.total_price)
+        counts = count_skus(skus)
+        if sum(counts) != len(skus):
+            raise KeyError(f"Expected {skus} to only contain SKUs [A-Z]")
+        self.counts = array.array("i", counts)
+
+    @classmethod
+    def from_counts(cls, counts: Iterable[int]) -> Basket:
+        basket = cls.__new__(cls)
+        basket.counts = array.array("i", counts)
+        return basket
 
     def __sub__(self, other: Basket):
         """Subtracts another Basket instance from this one."""
         if not isinstance(other, Basket):
             raise TypeError(f"Unsupported operand type for -: {type(other)}")
         # VALIDATE FIRST
-        for item_key, other_item in other.items.items():
-            if item_key not in self.items:
-                raise TypeError(f"{item_key} not found")
-            result = self.items[item_key].quantity - other_item.quantity
-            if result < 0:
+        for index, (count, other_count) in enumerate(zip(self.counts, other.counts)):
+            if other_count > count:
+                if not count:
+                    raise TypeError(f"{SKUS[index]} not found")
                 raise ValueError("can't have negative quantity of items")
         # APPLY
-        for item_key, other_item in other.items.items():
-            result = self.items[item_key].quantity - other_item.quantity
-            self.items[item_key].quantity = result
-
-            # If quantity is zero, remove the item
-            if self.items[item_key].quantity == 0:
-                del self.items[item_key]
+        counts = self.counts
+        for index, other_count in enumerate(other.counts):
+            if other_count:
+                counts[index] -= other_count
+        return self
 
+    def __add__(self, other: Basket):
+        """Adds the items of another Basket instance to this one."""
+        if not isinstance(other, Basket):
+            raise TypeError(f"Unsupported operand type for +: {type(other)}")
+        counts = self.counts
+        for index, other_count in enumerate(other.counts):
+            if other_count:
+                counts[index] += other_count
         return self
 
     def __copy__(self):
-        skus = "".join(key * val.quantity for key, val in self.items.items())
-        return Basket(skus)
-
-
-class Items(Enum):
-    A = Item("A", 50)
-    B = Item("B", 30)
-    C = Item("C", 20)
-    D = Item("D", 15)
-    E = Item("E", 40)
-    F = Item("F", 10)
-    G = Item("G", 20)
-    H = Item("H", 10)
-    I = Item("I", 35)  # noqa
-    J = Item("J", 60)
-    K = Item("K", 70)
-    L = Item("L", 90)
-    M = Item("M", 15)
-    N = Item("N", 40)
-    O = Item("O", 10)  # noqa
-    P = Item("P", 50)
-    Q = Item("Q", 30)
-    R = Item("R", 50)
-    S = Item("S", 20)
-    T = Item("T", 20)
-    U = Item("U", 40)
-    V = Item("V", 50)
-    W = Item("W", 20)
-    X = Item("X", 17)
-    Y = Item("Y", 20)
-    Z = Item("Z", 21)
+        return Basket.from_counts(self.counts)
+
+    def __repr__(self):
+        skus = "".join(sku * count for sku, count in zip(SKUS, self.counts))
+        return f"Basket({skus!r})"
+
+
+STORE = CatalogueStore(
+    os.environ.get("CHK_CATALOGUE", DEFAULT_CATALOGUE),
+    cache_dir=os.environ.get("CHK_CATALOGUE_CACHE"),
+)
+
+
+def watch_catalogue(interval: float = 1.0):
+    """Picks up catalogue file changes in this process from now on.
+
+    Picklable, so it can be the initializer of worker processes, which each
+    hold their own STORE.
+    """
+    STORE.start_polling(interval)
 
 
 def validate_skus(skus):
@@ -222,155 +282,384 @@ def validate_skus(skus):
     ----------
     skus
 
+    Raises
+    ------
+    TypeError
+    skus is not a str, or holds a character other than [A-Z]; the message
+    gives the position of the first such character.
+    """
+    if not isinstance(skus, str):
+        raise TypeError(f"Expected str, got {type(skus)}")
+    index = first_invalid_index(skus)
+    if index >= 0:
+        raise TypeError(
+            f"Expected {skus} to match [A-Z]*, found {skus[index]!r} at {index}"
+        )
+
+
+def compute_discounts(
+    skus: str, optimal: bool = False, table: Optional[PriceTable] = None
+) -> int:
+    """Computest the total price given the frequency of skus as a str.
+    Parameters
+    ----------
+    skus : str
+    A string containing the SKUs to be counted. Each SKU should be an uppercase
+    letter [A-Z].
+    optimal : bool
+    Search for the cheapest combination of offers instead of applying them
+    greedily in DISCOUNTS order.
+    table : PriceTable, optional
+    Defaults to the current catalogue snapshot.
+
     Returns
     -------
 
     """
-    if skus == "":
-        return
-    pattern = "^[A-Z]+$"
-    if not re.fullmatch(pattern, skus):
-        raise TypeError(f"Expected {skus} to match {pattern}")
+    if table is None:
+        table = STORE.snapshot.table
+    return price_basket(count_skus(skus), table, optimal=optimal)
 
 
-def compute_discounts(skus: str) -> int:
-    """Computest the total price given the frequency of skus as a str.
+CACHE: Optional[Union[CheckoutCache, SharedCheckoutCache]] = None
+
+
+def enable_cache(maxsize: int = 4096) -> CheckoutCache:
+    """Puts a new CheckoutCache of ``maxsize`` totals in front of pricing."""
+    global CACHE
+    CACHE = CheckoutCache(maxsize)
+    return CACHE
+
+
+def enable_shared_cache(path: str, slots: int = 65536) -> SharedCheckoutCache:
+    """Puts the SharedCheckoutCache at ``path`` in front of pricing.
+
+    Worker processes that enable the same ``path`` share their totals.
+    """
+    global CACHE
+    CACHE = SharedCheckoutCache(path, slots)
+    return CACHE
+
+
+def disable_cache():
+    global CACHE
+    CACHE = None
+
+
+def price_basket(counts: List[int], table: PriceTable, optimal: bool = False) -> int:
+    """Prices a count vector, going through CACHE when it is enabled.
+
+    Parameters
+    ----------
+    counts : list of int
+    26-slot count vector, see ``count_skus``.
+    table : PriceTable
+    optimal : bool
+
+    Returns
+    -------
+    int
+    """
+    cache = CACHE
+    if cache is None:
+        if optimal:
+            return price_counts_optimal(counts, table)
+        return table.price_function(counts)
+    key = (optimal, *counts)
+    total = cache.get(key, table)
+    if total is None:
+        if optimal:
+            total = price_counts_optimal(counts, table)
+        else:
+            total = table.price_function(counts)
+        cache.put(key, table, total)
+    return total
+
+
+def compute_discounts_reference(skus: str, table: Optional[PriceTable] = None) -> int:
+    """Computes the total price by applying each Discount to a Basket.
+
+    Reference for ``compute_discounts`` built on the Discount model: each
+    offer is applied with ``Discount.apply_all``, all its applications at once.
+
     Parameters
     ----------
     skus : str
     A string containing the SKUs to be counted. Each SKU should be an uppercase
     letter [A-Z].
+    table : PriceTable, optional
+    Defaults to the current catalogue snapshot.
 
     Returns
     -------
 
     """
+    if table is None:
+        table = STORE.snapshot.table
     basket = Basket(skus)
     total_discount = 0
-    for discount in DISCOUNTS:
-        while True and len(basket.items) > 0:
-            try:
-                total_discount += discount.apply_discount(basket)
-            except (ValueError, TypeError):
-                break
-    return basket.value + total_discount  # Final price is the sum of the remaining
-    # basket value and total discounts applied
-
-
-DISCOUNTS = [
-    # | A    | 50    | 3A for 130, 5A for 200 |
-    Discount(
-        required_items=Basket("A" * 3),
-        removed_items=Basket("A" * 3),
-        discounted_price=130,
-    ),
-    Discount(
-        required_items=Basket("A" * 5),
-        removed_items=Basket("A" * 5),
-        discounted_price=200,
-    ),
-    # | B    | 30    | 2B for 45              |
-    Discount(
-        required_items=Basket("B" * 2),
-        removed_items=Basket("B" * 2),
-        discounted_price=45,
-    ),
-    # | E    | 40    | 2E get one B free      |
-    Discount(
-        required_items=Basket("EE"),
-        removed_items=Basket("EEB"),
-        discounted_price=Items.E.value.price * 2,
-    ),
-    # | F    | 10    | 2F get one F free      |
-    Discount(
-        required_items=Basket("F" * 3),
-        removed_items=Basket("F" * 3),
-        discounted_price=Items.F.value.price * 2,
-    ),
-    #   | H    | 10    | 5H for 45, 10H for 80  |
-    Discount(
-        required_items=Basket("H" * 5),
-        removed_items=Basket("H" * 5),
-        discounted_price=45,
-    ),
-    Discount(
-        required_items=Basket("H" * 10),
-        removed_items=Basket("H" * 10),
-        discounted_price=80,
-    ),
-    #   | K    | 80    | 2K for 120             |
-    Discount(
-        required_items=Basket("K" * 2),
-        removed_items=Basket("K" * 2),
-        discounted_price=120,
-    ),
-    #    | N    | 40    | 3N get one M free      |
-    Discount(
-        required_items=Basket("N" * 3),
-        removed_items=Basket("N" * 3 + "M"),
-        discounted_price=Items.N.value.price * 3,
-    ),
-    #     | P    | 50    | 5P for 200             |
-    Discount(
-        required_items=Basket("P" * 5),
-        removed_items=Basket("P" * 5),
-        discounted_price=200,
-    ),
-    # | Q    | 30    | 3Q for 80              |
-    Discount(
-        required_items=Basket("Q" * 3),
-        removed_items=Basket("Q" * 3),
-        discounted_price=80,
-    ),
-    # | R    | 50    | 3R get one Q free      |
-    Discount(
-        required_items=Basket("R" * 3),
-        removed_items=Basket("R" * 3 + "Q"),
-        discounted_price=Items.R.value.price * 3,
-    ),
-    # | U    | 40    | 3U get one U free      |
-    Discount(
-        required_items=Basket("U" * 3),
-        removed_items=Basket("U" * 4),
-        discounted_price=Items.U.value.price * 3,
-    ),
-    # | V    | 50    | 2V for 90, 3V for 130  |
-    Discount(
-        required_items=Basket("V" * 2),
-        removed_items=Basket("V" * 2),
-        discounted_price=90,
-    ),
-    Discount(
-        required_items=Basket("V" * 3),
-        removed_items=Basket("V" * 3),
-        discounted_price=130,
-    ),
-    # | Z    | 21    | buy any 3 of (S,T,X,Y,Z) for 45 |
-    Discount(
-        required_items=Basket("STXYZ"),
-        removed_items=Basket(""),
-        discounted_price=45,
-        choose=3,
-    ),
-]
-DISCOUNTS.sort(
-    reverse=True
-)  # Now discounts are sorted in descending order of discounted_price
-
-
-def checkout(skus: str) -> int:
+    for discount in _discounts(table):
+        total_discount += discount.apply_all(basket)
+    # Final price is the sum of the remaining basket value and total discounts
+    # applied
+    return sum(map(operator.mul, basket.counts, table.prices)) + total_discount
+
+
+def discounts_from_table(table: PriceTable) -> List[Discount]:
+    """Builds the Discount model of each offer of a compiled PriceTable.
+
+    Parameters
+    ----------
+    table : PriceTable
+
+    Returns
+    -------
+    list of Discount, in the order the offers are applied.
+    """
+    discounts = []
+    for offer in table.offers:
+        if offer.choose:
+            discounts.append(
+                Discount(
+                    required_items=Basket("".join(SKUS[i] for i in offer.members)),
+                    removed_items=Basket(""),
+                    discounted_price=offer.price,
+                    choose=offer.choose,
+                )
+            )
+        else:
+            skus = "".join(SKUS[i] * quantity for i, quantity in offer.removed)
+            discounts.append(
+                Discount(
+                    required_items=Basket(skus),
+                    removed_items=Basket(skus),
+                    discounted_price=offer.price,
+                )
+            )
+    return discounts
+
+
+_DISCOUNTS: Optional[Tuple[PriceTable, List[Discount]]] = None
+_ITEMS: Optional[Tuple[PriceTable, Enum]] = None
+
+
+def _discounts(table: Optional[PriceTable] = None) -> List[Discount]:
+    """DISCOUNTS of ``table``, the current snapshot's by default.
+
+    Built on first use rather than at import, and again after a reload.
+    """
+    global _DISCOUNTS
+    if table is None:
+        table = STORE.snapshot.table
+    cached = _DISCOUNTS
+    if cached is not None and cached[0] is table:
+        return cached[1]
+    discounts = discounts_from_table(table)
+    if table is STORE.snapshot.table:
+        _DISCOUNTS = (table, discounts)
+    return discounts
+
+
+def _items() -> Enum:
+    """Items of the current snapshot, an Enum of each SKU's Item."""
+    global _ITEMS
+    table = STORE.snapshot.table
+    cached = _ITEMS
+    if cached is None or cached[0] is not table:
+        items = Enum(
+            "Items", [(sku, Item(sku, price)) for sku, price in zip(SKUS, table.prices)]
+        )
+        cached = _ITEMS = (table, items)
+    return cached[1]
+
+
+# The current catalogue snapshot and what is built from it; each access
+# reads STORE.snapshot, so a module-level import keeps the value of that time.
+_SNAPSHOT_ATTRIBUTES = {
+    "CATALOGUE": lambda: STORE.snapshot,
+    "PRICE_TABLE": lambda: STORE.snapshot.table,
+    "DISCOUNTS": _discounts,
+    "Items": _items,
+}
+
+
+def __getattr__(name):
+    attribute = _SNAPSHOT_ATTRIBUTES.get(name)
+    if attribute is not None:
+        return attribute()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def checkout(skus: str, optimal: bool = False) -> int:
     """Compute skus checkout value given discounts
 
     Parameters
     ----------
     skus: string representing skus
+    optimal: find the lowest possible price rather than applying offers greedily
 
     Returns
     -------
     int: > 0 or -1 for error.
     """
+    if METRICS.enabled:
+        return _checkout_instrumented(skus, optimal)
+    try:
+        counts, _ = scan_skus(skus)
+    except TypeError:
+        return -1
+    if counts is None:
+        return -1
+    return price_basket(counts, STORE.snapshot.table, optimal=optimal)
+
+
+def _checkout_instrumented(skus: str, optimal: bool = False) -> int:
+    """``checkout`` recording the latency of each stage in METRICS."""
+    clock = time.perf_counter
+    start = clock()
     try:
         validate_skus(skus)
     except TypeError:
+        METRICS.observe("checkout_stage_seconds", clock() - start, stage="validate")
+        METRICS.increment("checkout_requests_total", result="invalid")
+        return -1
+    validated = clock()
+    METRICS.observe("checkout_stage_seconds", validated - start, stage="validate")
+    counts = count_skus(skus)
+    counted = clock()
+    METRICS.observe("checkout_stage_seconds", counted - validated, stage="count")
+    table = STORE.snapshot.table
+    if optimal or CACHE is not None:
+        total = price_basket(counts, table, optimal=optimal)
+    else:
+        total = price_counts_instrumented(counts, table, METRICS)
+    priced = clock()
+    METRICS.observe("checkout_stage_seconds", priced - counted, stage="price")
+    METRICS.observe("checkout_seconds", priced - start)
+    METRICS.increment("checkout_requests_total", result="ok")
+    return total
+
+
+def checkout_with_version(skus: str, optimal: bool = False) -> Tuple[int, str]:
+    """Compute skus checkout value and the catalogue version that priced it
+
+    Parameters
+    ----------
+    skus: string representing skus
+    optimal: find the lowest possible price rather than applying offers greedily
+
+    Returns
+    -------
+    tuple: (checkout value as from checkout, catalogue version)
+    """
+    catalogue = STORE.snapshot
+    try:
+        counts, _ = scan_skus(skus)
+    except TypeError:
+        counts = None
+    if counts is None:
+        return -1, catalogue.version
+    return price_basket(counts, catalogue.table, optimal=optimal), catalogue.version
+
+
+def checkout_detailed(skus: str) -> Optional[PriceBreakdown]:
+    """Compute skus checkout value together with how it was reached
+
+    Offers are applied greedily as in checkout, and the breakdown is recorded
+    in the same pass as the total.
+
+    Parameters
+    ----------
+    skus: string representing skus
+
+    Returns
+    -------
+    PriceBreakdown: total, applications and savings per offer of the current
+    catalogue and the units charged at unit price (``to_dict`` gives a
+    receipt); None for invalid skus.
+    """
+    try:
+        counts, _ = scan_skus(skus)
+    except TypeError:
+        return None
+    if counts is None:
+        return None
+    return price_counts_detailed(counts, STORE.snapshot.table)
+
+
+def checkout_many(skus_batch: Iterable[str], optimal: bool = False) -> List[int]:
+    """Compute the checkout value of many skus strings at once
+
+    Each distinct string is validated and counted once, and each distinct
+    basket (by SKU counts) is priced once.
+
+    Parameters
+    ----------
+    skus_batch: iterable of strings representing skus
+    optimal: find the lowest possible price rather than applying offers greedily
+
+    Returns
+    -------
+    list of int: checkout value of each entry in order, -1 for invalid entries.
+    """
+    table = STORE.snapshot.table
+    totals_by_skus: Dict[str, int] = {}
+    totals_by_counts: Dict[tuple, int] = {}
+    totals = []
+    for skus in skus_batch:
+        if not isinstance(skus, str):
+            totals.append(-1)
+            continue
+        total = totals_by_skus.get(skus)
+        if total is None:
+            counts, _ = scan_skus(skus)
+            if counts is None:
+                total = -1
+            else:
+                key = tuple(counts)
+                total = totals_by_counts.get(key)
+                if total is None:
+                    total = price_basket(counts, table, optimal=optimal)
+                    totals_by_counts[key] = total
+            totals_by_skus[skus] = total
+        totals.append(total)
+    return totals
+
+
+def checkout_stream(source, optimal: bool = False, chunk_size: int = CHUNK_SIZE) -> int:
+    """Compute the checkout value of skus read from a stream
+
+    The skus are validated and counted one chunk at a time, so memory use does
+    not grow with the length of the stream.
+
+    Parameters
+    ----------
+    source: str, bytes, binary or text file object, or iterable of str/bytes
+    chunks. Binary files are read from their current position, not from the
+    start, into one buffer reused for every chunk.
+    optimal: find the lowest possible price rather than applying offers greedily
+    chunk_size: characters or bytes handled per chunk
+
+    Returns
+    -------
+    int: > 0 or -1 for error.
+    """
+    table = STORE.snapshot.table
+    try:
+        counts = count_stream(source, chunk_size)
+    except TypeError:
+        return -1
+    if counts is None:
         return -1
-    return compute_discounts(skus)
+    return price_basket(counts, table, optimal=optimal)
+
+
+if os.environ.get("CHK_METRICS"):
+    METRICS.enabled = True
+if os.environ.get("CHK_SHARED_CACHE"):
+    enable_shared_cache(
+        os.environ["CHK_SHARED_CACHE"],
+        int(os.environ.get("CHK_SHARED_CACHE_SLOTS", 65536)),
+    )
+elif os.environ.get("CHK_CACHE_SIZE"):
+    enable_cache(int(os.environ["CHK_CACHE_SIZE"]))
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import hashlib
+import importlib.machinery
+import importlib.util
+import linecache
+import os
+import tempfile
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .pricing import SKUS, CompiledOffer, PriceTable, offer_label
+
+# Generated modules are kept here as chk_price_<hash>.py, with their
+# bytecode cached by the import system; in memory only if unset.
+CACHE_DIR = os.environ.get("CHK_CODEGEN_CACHE") or os.environ.get("CHK_CATALOGUE_CACHE")
+
+PriceFunction = Callable[[Sequence[int]], int]
+
+_compiled: Dict[str, PriceFunction] = {}
+
+
+def _fixed_offer_block(offer: CompiledOffer) -> List[str]:
+    (first, quantity), *rest = offer.removed
+    lines = [f"times = {SKUS[first]}" + (f" // {quantity}" if quantity > 1 else "")]
+    for index, quantity in rest:
+        if quantity > 1:
+            lines.append(f"limit = {SKUS[index]} // {quantity}")
+        else:
+            lines.append(f"limit = {SKUS[index]}")
+        lines += ["if limit < times:", "    times = limit"]
+    lines += ["if times:", f"    total += times * {offer.price}"]
+    for index, quantity in offer.removed:
+        lines.append(
+            f"    {SKUS[index]} -= times" + (f" * {quantity}" if quantity > 1 else "")
+        )
+    return lines
+
+
+def _group_offer_block(offer: CompiledOffer) -> List[str]:
+    members = [SKUS[index] for index in offer.members]
+    lines = [
+        f"times = ({' + '.join(members)}) // {offer.choose}",
+        "if times:",
+        f"    total += times * {offer.price}",
+        f"    remaining = times * {offer.choose}",
+    ]
+    # Most expensive members first, as offer.members is ordered
+    for sku in members[:-1]:
+        lines += [
+            f"    if {sku} >= remaining:",
+            f"        {sku} -= remaining",
+            "        remaining = 0",
+            "    else:",
+            f"        remaining -= {sku}",
+            f"        {sku} = 0",
+        ]
+    lines.append(f"    {members[-1]} -= remaining")
+    return lines
+
+
+def generate_source(table: PriceTable) -> str:
+    """Python source of ``price(counts)`` specialized to ``table``.
+
+    The function applies the offers greedily in table order like
+    ``price_counts``, as one block of integer arithmetic per offer on a local
+    variable per SKU, then adds the unit prices of what is left.
+    """
+    lines = [
+        "# Generated by solutions.CHK.codegen, do not edit.",
+        "",
+        "",
+        "def price(counts):",
+        f"    {', '.join(SKUS)} = counts",
+        "    total = 0",
+    ]
+    for offer in table.offers:
+        block = _group_offer_block(offer) if offer.choose else _fixed_offer_block(offer)
+        lines.append(f"    # {offer_label(offer)}")
+        lines += [f"    {line}" for line in block]
+    units = [f"{price} * {sku}" for sku, price in zip(SKUS, table.prices) if price != 0]
+    lines.append(f"    return total + {' + '.join(units) if units else '0'}")
+    return "\n".join(lines) + "\n"
+
+
+class _CheckedSourceLoader(importlib.machinery.SourceFileLoader):
+    """Imports the source it was given instead of reading the file again.
+
+    The file may have changed since it was checked against that source.
+    """
+
+    def __init__(self, name: str, path: str, source: bytes):
+        super().__init__(name, path)
+        self._source = source
+
+    def get_data(self, path: str) -> bytes:
+        if path == self.path:
+            return self._source
+        return super().get_data(path)
+
+
+def _load_from_cache(name: str, source: str, cache_dir: str) -> PriceFunction:
+    path = os.path.join(cache_dir, f"{name}.py")
+    data = source.encode()
+    try:
+        with open(path, "rb") as f:
+            cached = f.read()
+    except FileNotFoundError:
+        cached = None
+    if cached != data:
+        # Missing, truncated or changed by someone else: written afresh
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", prefix=name, dir=cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    loader = _CheckedSourceLoader(name, path, data)
+    spec = importlib.util.spec_from_file_location(name, path, loader=loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module.price
+
+
+def _load_in_memory(name: str, source: str) -> PriceFunction:
+    filename = f"<{name}>"
+    # Lets tracebacks and profilers show the generated lines
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    namespace: Dict[str, object] = {}
+    exec(compile(source, filename, "exec"), namespace)
+    return namespace["price"]
+
+
+def compile_table(table: PriceTable, cache_dir: Optional[str] = None) -> PriceFunction:
+    """The generated ``price(counts)`` of ``table``, compiled once.
+
+    Functions are cached by a hash of their source, in memory and, with
+    ``cache_dir`` (default ``CACHE_DIR``), as modules on disk so that other
+    processes skip compiling them. A module on disk is only imported if it
+    holds exactly the source generated for ``table``; otherwise it is
+    replaced.
+
+    Parameters
+    ----------
+    table : PriceTable
+    cache_dir : str, optional
+
+    Returns
+    -------
+    callable
+        Takes a 26-slot count vector and returns the same total as
+        ``price_counts(counts, table)``.
+    """
+    source = generate_source(table)
+    name = f"chk_price_{hashlib.sha256(source.encode()).hexdigest()[:16]}"
+    function = _compiled.get(name)
+    if function is None:
+        if cache_dir is None:
+            cache_dir = CACHE_DIR
+        if cache_dir is None:
+            function = _load_in_memory(name, source)
+        else:
+            function = _load_from_cache(name, source, cache_dir)
+        _compiled[name] = function
+    return function
@@ -0,0 +1,307 @@
+"""
+Differential testing of the CHK pricing engines against a brute-force minimum.
+
+    Check every engine on 2000 generated baskets:
+       PYTHONPATH=lib python -m solutions.CHK.differential --examples 2000
+
+    Report baskets per second per engine instead:
+       PYTHONPATH=lib python -m solutions.CHK.differential --throughput
+
+Baskets come from a seeded generator biased towards offer boundaries: each
+basket mixes a few fragments holding just under, exactly or just over a
+multiple of an offer (``AAAA``/``AAAAA``/``AAAAAA``, ``EEB``, ``NNNM``, mixed
+S/T/X/Y/Z around multiples of 3), plus stray SKUs and now and then an invalid
+character. A failing basket is shrunk to a minimal one before it is
+reported, and the same seed always gives the same baskets.
+
+Greedy engines are held to the minimum too: the offer order of the shipped
+catalogue is optimal, so any difference means an engine changed semantics.
+Use ``--reference greedy`` for a catalogue where that does not hold.
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .checkout_solution import (
+    STORE,
+    checkout,
+    checkout_detailed,
+    checkout_many,
+    compute_discounts_reference,
+    validate_skus,
+)
+from .pricing import SKUS, PriceTable, price_counts, scan_skus
+from .session import CheckoutSession
+
+Engine = Callable[[str], int]
+
+
+def brute_force_total(counts: Sequence[int], table: PriceTable) -> int:
+    """Lowest total of a count vector over every way of applying the offers.
+
+    Offers are taken in table order, each applied any feasible number of
+    times, and every choice of units is tried for group offers. Exponential,
+    so only meant for the small baskets of this harness.
+    """
+    offers = table.offers
+    prices = table.prices
+    memo: Dict[Tuple[int, Tuple[int, ...]], int] = {}
+
+    def takes(members: Sequence[int], counts: Tuple[int, ...], units: int):
+        if units == 0:
+            yield counts
+            return
+        if not members:
+            return
+        index, rest = members[0], members[1:]
+        for taken in range(min(counts[index], units), -1, -1):
+            remaining = list(counts)
+            remaining[index] -= taken
+            yield from takes(rest, tuple(remaining), units - taken)
+
+    def best(position: int, counts: Tuple[int, ...]) -> int:
+        if position == len(offers):
+            return sum(price * count for price, count in zip(prices, counts))
+        key = (position, counts)
+        if key in memo:
+            return memo[key]
+        offer = offers[position]
+        result = best(position + 1, counts)
+        if offer.choose:
+            times = sum(counts[index] for index in offer.members) // offer.choose
+            for applied in range(1, times + 1):
+                for remaining in takes(offer.members, counts, applied * offer.choose):
+                    result = min(
+                        result, applied * offer.price + best(position + 1, remaining)
+                    )
+        else:
+            times = min(counts[index] // quantity for index, quantity in offer.removed)
+            remaining = list(counts)
+            for applied in range(1, times + 1):
+                for index, quantity in offer.removed:
+                    remaining[index] -= quantity
+                result = min(
+                    result, applied * offer.price + best(position + 1, tuple(remaining))
+                )
+        memo[key] = result
+        return result
+
+    return best(0, tuple(counts))
+
+
+def reference_minimum(skus: str) -> int:
+    """``checkout`` semantics for invalid input, brute-force minimum otherwise."""
+    try:
+        counts, _ = scan_skus(skus)
+    except TypeError:
+        return -1
+    if counts is None:
+        return -1
+    return brute_force_total(counts, STORE.snapshot.table)
+
+
+def reference_greedy(skus: str) -> int:
+    """The Discount-model greedy pricing, ``compute_discounts_reference``."""
+    try:
+        validate_skus(skus)
+    except TypeError:
+        return -1
+    return compute_discounts_reference(skus)
+
+
+def _detailed(skus: str) -> int:
+    breakdown = checkout_detailed(skus)
+    return -1 if breakdown is None else breakdown.total
+
+
+def _interpreted(skus: str) -> int:
+    try:
+        counts, _ = scan_skus(skus)
+    except TypeError:
+        return -1
+    return -1 if counts is None else price_counts(counts, STORE.snapshot.table)
+
+
+def _session(skus: str) -> int:
+    try:
+        validate_skus(skus)
+    except TypeError:
+        return -1
+    session = CheckoutSession()
+    for sku in skus:
+        session.add(sku)
+    return session.total()
+
+
+ENGINES: Dict[str, Engine] = {
+    "checkout": checkout,
+    "checkout_optimal": lambda skus: checkout(skus, optimal=True),
+    "checkout_many": lambda skus: checkout_many([skus])[0],
+    "checkout_detailed": _detailed,
+    "interpreted": _interpreted,
+    "session": _session,
+    "discount_model": reference_greedy,
+}
+REFERENCES: Dict[str, Engine] = {
+    "minimum": reference_minimum,
+    "greedy": reference_greedy,
+}
+
+
+def _fragment(rng: random.Random, table: PriceTable) -> Dict[int, int]:
+    """Counts near a multiple of one offer: one unit short, exact or over."""
+    offer = rng.choice(table.offers)
+    times = rng.randint(0, 3)
+    counts: Dict[int, int] = {}
+    if offer.choose:
+        for _ in range(max(0, times * offer.choose + rng.choice((-1, 0, 0, 1)))):
+            index = rng.choice(offer.members)
+            counts[index] = counts.get(index, 0) + 1
+    else:
+        for index, quantity in offer.removed:
+            counts[index] = max(0, times * quantity + rng.choice((-1, 0, 0, 1)))
+    return counts
+
+
+def generate_baskets(
+    seed: int = 0, examples: int = 1000, table: Optional[PriceTable] = None
+) -> List[str]:
+    """Seeded baskets biased towards offer boundaries, see module docstring."""
+    rng = random.Random(seed)
+    if table is None:
+        table = STORE.snapshot.table
+    baskets = []
+    for _ in range(examples):
+        counts = [0] * len(SKUS)
+        for _ in range(rng.randint(1, 3)):
+            for index, count in _fragment(rng, table).items():
+                counts[index] += count
+        for _ in range(rng.choice((0, 0, 1, 2))):
+            counts[rng.randrange(len(SKUS))] += 1
+        units = [
+            SKUS[index] for index, count in enumerate(counts) for _ in range(count)
+        ]
+        rng.shuffle(units)
+        if rng.random() < 0.03:
+            units.insert(rng.randint(0, len(units)), rng.choice("a-1 "))
+        baskets.append("".join(units))
+    return baskets
+
+
+@dataclasses.dataclass(frozen=True)
+class Mismatch:
+    engine: str
+    skus: str
+    expected: int
+    actual: object
+
+
+def _result(engine: Engine, skus: str) -> object:
+    try:
+        return engine(skus)
+    except Exception as e:
+        return e
+
+
+def shrink(skus: str, fails: Callable[[str], bool]) -> str:
+    """Smallest basket found by dropping SKUs while ``fails`` stays True.
+
+    Whole runs of one SKU are dropped first, then single units, until no
+    single removal still fails; the result is sorted when that still fails.
+    """
+    changed = True
+    while changed:
+        changed = False
+        for sku in sorted(set(skus)):
+            for candidate in (skus.replace(sku, ""), skus.replace(sku, "", 1)):
+                if candidate != skus and fails(candidate):
+                    skus = candidate
+                    changed = True
+                    break
+    ordered = "".join(sorted(skus))
+    return ordered if fails(ordered) else skus
+
+
+def check(
+    baskets: Sequence[str],
+    engines: Optional[Dict[str, Engine]] = None,
+    reference: Engine = reference_minimum,
+) -> List[Mismatch]:
+    """Compares every engine with ``reference`` on every basket.
+
+    Returns
+    -------
+    list of Mismatch
+        At most one per engine, for the shrunk first failing basket.
+    """
+    if engines is None:
+        engines = ENGINES
+    mismatches = []
+    for name, engine in engines.items():
+        for skus in baskets:
+            if _result(engine, skus) != reference(skus):
+
+                def fails(candidate: str, engine: Engine = engine) -> bool:
+                    return _result(engine, candidate) != reference(candidate)
+
+                skus = shrink(skus, fails)
+                mismatches.append(
+                    Mismatch(name, skus, reference(skus), _result(engine, skus))
+                )
+                break
+    return mismatches
+
+
+def throughput(
+    baskets: Sequence[str], engines: Optional[Dict[str, Engine]] = None
+) -> Dict[str, float]:
+    """Baskets per second of each engine over ``baskets``."""
+    if engines is None:
+        engines = ENGINES
+    rates = {}
+    for name, engine in engines.items():
+        start = time.perf_counter()
+        for skus in baskets:
+            engine(skus)
+        rates[name] = len(baskets) / max(time.perf_counter() - start, 1e-9)
+    return rates
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--examples", type=int, default=1000)
+    parser.add_argument("--engine", action="append", choices=sorted(ENGINES))
+    parser.add_argument("--reference", choices=sorted(REFERENCES), default="minimum")
+    parser.add_argument("--throughput", action="store_true")
+    args = parser.parse_args(argv)
+    engines = ENGINES
+    if args.engine:
+        engines = {name: ENGINES[name] for name in args.engine}
+    baskets = generate_baskets(args.seed, args.examples)
+    if args.throughput:
+        engines = {
+            **engines,
+            f"reference[{args.reference}]": REFERENCES[args.reference],
+        }
+        for name, rate in throughput(baskets, engines).items():
+            print(f"{name:<24} {rate:>12.0f} baskets/s")
+        return 0
+    mismatches = check(baskets, engines, REFERENCES[args.reference])
+    for mismatch in mismatches:
+        print(
+            f"{mismatch.engine}: {mismatch.skus!r} priced {mismatch.actual!r},"
+            f" expected {mismatch.expected}"
+        )
+    if not mismatches:
+        print(f"{len(engines)} engines agree on {len(baskets)} baskets")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import bisect
+import collections
+import json
+import math
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Sequence, Tuple
+
+from .pricing import PriceTable, apply_offer, offer_label, reachable_offers
+
+if TYPE_CHECKING:
+    import pstats
+
+# Upper bounds in seconds; checkout stages take microseconds.
+DEFAULT_BUCKETS = (
+    1e-6,
+    2.5e-6,
+    5e-6,
+    1e-5,
+    2.5e-5,
+    5e-5,
+    1e-4,
+    2.5e-4,
+    1e-3,
+    1e-2,
+    math.inf,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, as exposed to Prometheus."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[int]:
+        cumulative, total = [], 0
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+
+class Metrics:
+    """In-process histograms and counters for checkout.
+
+    Nothing is recorded while ``enabled`` is False; ``checkout`` then only
+    pays for reading that attribute.
+
+    Parameters
+    ----------
+    buckets : sequence of float
+        Histogram bucket upper bounds in seconds, ending with ``inf``.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.enabled = False
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.counters: Dict[Tuple[str, Labels], int] = collections.Counter()
+
+    def observe(self, name: str, seconds: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def increment(self, name: str, amount: int = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] += amount
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Snapshot of every metric, for ``json.dumps``."""
+        with self._lock:
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "buckets": [
+                        [_format_bound(bound), count]
+                        for bound, count in zip(
+                            histogram.buckets, histogram.cumulative_counts()
+                        )
+                    ],
+                    "sum": histogram.sum,
+                    "count": histogram.count,
+                }
+                for (name, labels), histogram in sorted(self.histograms.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+        return {"histograms": histograms, "counters": counters}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        snapshot = self.to_dict()
+        lines = []
+        typed = set()
+        for histogram in snapshot["histograms"]:
+            name = histogram["name"]
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            for bound, count in histogram["buckets"]:
+                labels = dict(histogram["labels"], le=bound)
+                lines.append(f"{name}_bucket{_format_labels(labels)} {count}")
+            labels = _format_labels(histogram["labels"])
+            lines.append(f"{name}_sum{labels} {histogram['sum']!r}")
+            lines.append(f"{name}_count{labels} {histogram['count']}")
+        for counter in snapshot["counters"]:
+            name = counter["name"]
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(
+                f"{name}{_format_labels(counter['labels'])} {counter['value']}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == math.inf else repr(bound)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for key, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+METRICS = Metrics()
+
+
+def enable():
+    METRICS.enabled = True
+
+
+def disable():
+    METRICS.enabled = False
+
+
+def price_counts_instrumented(
+    counts: Sequence[int], table: PriceTable, metrics: Metrics = METRICS
+) -> int:
+    """``price_counts`` that records every offer attempt in ``metrics``.
+
+    Each reachable offer is timed under ``checkout_offer_seconds``, and counted
+    under ``checkout_offer_fired_total`` (with the number of applications in
+    ``checkout_offer_applications_total``) or ``checkout_offer_failed_total``.
+    """
+    clock = time.perf_counter
+    counts = list(counts)
+    offers = table.offers
+    total = 0
+    for position in reachable_offers(counts, table):
+        offer = offers[position]
+        start = clock()
+        times = apply_offer(offer, counts)
+        elapsed = clock() - start
+        label = offer_label(offer)
+        metrics.observe("checkout_offer_seconds", elapsed, offer=label)
+        if times:
+            metrics.increment("checkout_offer_fired_total", offer=label)
+            metrics.increment("checkout_offer_applications_total", times, offer=label)
+            total += times * offer.price
+        else:
+            metrics.increment("checkout_offer_failed_total", offer=label)
+    prices = table.prices
+    for index, count in enumerate(counts):
+        if count:
+            total += prices[index] * count
+    return total
+
+
+def profile_call(fn: Callable, *args, **kwargs) -> Tuple[Any, pstats.Stats]:
+    """Runs ``fn(*args, **kwargs)`` under cProfile.
+
+    Returns
+    -------
+    tuple
+        (return value of ``fn``, ``pstats.Stats`` of the call)
+    """
+    # Imported here to keep them off the import time of checkout
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args, **kwargs)
+    return result, pstats.Stats(profiler)
+
+
+class SamplingProfiler:
+    """Samples the stack of the thread that entered it every ``interval`` s.
+
+    Cheaper than cProfile on long runs since the profiled code is not traced.
+    ``samples`` counts collapsed stacks (outermost frame first), which
+    ``collapsed`` writes in the format flame graph tools read.
+
+    Examples
+    --------
+    >>> with SamplingProfiler() as profiler:
+    ...     checkout_many(baskets)
+    >>> print(profiler.collapsed())
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples: Dict[str, int] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._target = None
+
+    def __enter__(self) -> SamplingProfiler:
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample, name="chk-sampler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.samples.most_common()
+        )
+
+
+def sample_call(
+    fn: Callable, *args, interval: float = 0.001, **kwargs
+) -> Tuple[Any, SamplingProfiler]:
+    """Runs ``fn(*args, **kwargs)`` under a ``SamplingProfiler``."""
+    with SamplingProfiler(interval) as profiler:
+        result = fn(*args, **kwargs)
+    return result, profiler
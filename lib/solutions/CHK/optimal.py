@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import itertools
+from typing import Dict, List, Sequence, Tuple
+
+from .pricing import CompiledOffer, PriceTable
+
+
+def _group_cost(offer: CompiledOffer, counts: List[int], prices: Sequence[int]):
+    """Cheapest price of the ``offer.members`` units using only ``offer``.
+
+    Units are grouped from the most expensive down; each further group costs
+    no more at unit prices than the previous one, so applying stops at the
+    first complete group whose unit prices add up to no more than the offer.
+    """
+    total = 0
+    carry = 0  # units of a partly filled group
+    carry_cost = 0  # and their unit prices
+    applying = True
+    for index in offer.members:
+        count, price = counts[index], prices[index]
+        if not applying:
+            total += count * price
+            continue
+        take = min(count, offer.choose - carry)
+        carry += take
+        carry_cost += take * price
+        count -= take
+        if carry == offer.choose:
+            if carry_cost > offer.price:
+                total += offer.price
+            else:
+                applying = False
+                total += carry_cost
+            carry = carry_cost = 0
+        if not count:
+            continue
+        # The group is closed, so the rest form groups of this SKU alone
+        if applying and offer.choose * price > offer.price:
+            groups, count = divmod(count, offer.choose)
+            total += groups * offer.price
+            carry, carry_cost = count, count * price
+        else:
+            applying = False
+            total += count * price
+    return total + carry_cost
+
+
+def _peel_single_sku(
+    count: int, price: int, offers: Sequence[CompiledOffer]
+) -> Tuple[int, int]:
+    """Reduces a large single-SKU count before searching.
+
+    With ``best`` the offer of lowest price per unit (cheaper than ``price``),
+    some optimal solution applies every other offer fewer than ``q_best``
+    times and leaves fewer than ``q_best`` units at unit price; otherwise
+    swapping those units into ``best`` would not cost more. Every unit beyond
+    that bound therefore goes into ``best``.
+
+    Returns
+    -------
+    tuple
+        ``(remaining count, price of the peeled units)``
+    """
+    best = min(offers, key=lambda offer: offer.price / offer.removed[0][1])
+    quantity = best.removed[0][1]
+    if best.price >= quantity * price:
+        return count, 0
+    bound = (quantity - 1) * (
+        1 + sum(offer.removed[0][1] for offer in offers if offer is not best)
+    )
+    if count <= bound:
+        return count, 0
+    times = -(-(count - bound) // quantity)
+    return count - times * quantity, times * best.price
+
+
+class _ComponentSolver:
+    """Memoized search over the offers of one component."""
+
+    def __init__(self, table: PriceTable, skus: Sequence[int], offers: Sequence[int]):
+        self.prices = table.prices
+        self.skus = skus
+        compiled = [table.offers[position] for position in offers]
+        self.fixed = [offer for offer in compiled if not offer.choose]
+        self.groups = [offer for offer in compiled if offer.choose]
+        self.memo: Dict[Tuple, int] = {}
+
+    def unit_cost(self, counts: List[int]) -> int:
+        return sum(counts[index] * self.prices[index] for index in self.skus)
+
+    def solve(self, counts: List[int]) -> int:
+        base = 0
+        if len(self.skus) == 1 and not self.groups:
+            index = self.skus[0]
+            counts[index], base = _peel_single_sku(
+                counts[index], self.prices[index], self.fixed
+            )
+        return base + self._fixed_cost(0, counts)
+
+    def _fixed_cost(self, position: int, counts: List[int]) -> int:
+        if position == len(self.fixed):
+            return self._group_cost(counts)
+        key = (position, *(counts[index] for index in self.skus))
+        if key in self.memo:
+            return self.memo[key]
+        offer = self.fixed[position]
+        most = min(counts[index] // quantity for index, quantity in offer.removed)
+        if position == len(self.fixed) - 1 and not self.groups:
+            # Nothing else competes for the units, so the cost is linear in
+            # the number of applications and an end point is optimal.
+            choices = (0, most)
+        else:
+            choices = range(most, -1, -1)
+        best = None
+        for times in choices:
+            for index, quantity in offer.removed:
+                counts[index] -= times * quantity
+            cost = times * offer.price + self._fixed_cost(position + 1, counts)
+            for index, quantity in offer.removed:
+                counts[index] += times * quantity
+            if best is None or cost < best:
+                best = cost
+        self.memo[key] = best
+        return best
+
+    def _group_cost(self, counts: List[int]) -> int:
+        if not self.groups:
+            return self.unit_cost(counts)
+        if len(self.groups) == 1:
+            offer = self.groups[0]
+            members = set(offer.members)
+            return _group_cost(offer, counts, self.prices) + sum(
+                counts[index] * self.prices[index]
+                for index in self.skus
+                if index not in members
+            )
+        return self._overlapping_group_cost(counts)
+
+    def _overlapping_group_cost(self, counts: List[int]) -> int:
+        """Exhaustive search for components with several group offers."""
+        key = (len(self.fixed), *(counts[index] for index in self.skus))
+        if key in self.memo:
+            return self.memo[key]
+        best = self.unit_cost(counts)
+        for offer in self.groups:
+            for chosen in itertools.combinations_with_replacement(
+                offer.members, offer.choose
+            ):
+                if any(counts[index] < chosen.count(index) for index in chosen):
+                    continue
+                for index in chosen:
+                    counts[index] -= 1
+                best = min(best, offer.price + self._overlapping_group_cost(counts))
+                for index in chosen:
+                    counts[index] += 1
+        self.memo[key] = best
+        return best
+
+
+def price_counts_optimal(counts: Sequence[int], table: PriceTable) -> int:
+    """Prices a count vector at the lowest total any mix of offers allows.
+
+    Unlike ``price_counts`` the offer order does not matter. The basket is
+    split into components of SKUs linked by offers and each component is
+    searched on its own: fixed offers by memoized enumeration of how often
+    each applies, group offers in closed form (several overlapping group
+    offers fall back to exhaustive search).
+
+    Parameters
+    ----------
+    counts : sequence of int
+        26-slot count vector, see ``count_skus``.
+    table : PriceTable
+
+    Returns
+    -------
+    int
+        Minimal total price of the basket.
+    """
+    counts = list(counts)
+    total = 0
+    covered = set()
+    for skus, offers in table.components:
+        covered.update(skus)
+        if any(counts[index] for index in skus):
+            total += _ComponentSolver(table, skus, offers).solve(counts)
+    for index, (price, count) in enumerate(zip(table.prices, counts)):
+        if index not in covered:
+            total += price * count
+    return total
@@ -0,0 +1,422 @@
+from __future__ import annotations
+
+import dataclasses
+import functools
+import string
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+SKUS = string.ascii_uppercase
+SKU_COUNT = len(SKUS)
+SKU_INDEX = {sku: index for index, sku in enumerate(SKUS)}
+
+
+@dataclasses.dataclass(frozen=True)
+class CompiledOffer:
+    """An offer reduced to integer indices into the count vector.
+
+    A fixed offer removes ``quantity`` units of every ``(index, quantity)`` pair
+    in ``removed`` for ``price``. A group offer (``choose`` > 0) removes any
+    ``choose`` units of ``members``, which are ordered by unit price descending
+    so the most expensive units are taken first.
+    """
+
+    price: int
+    removed: Tuple[Tuple[int, int], ...] = ()
+    choose: int = 0
+    members: Tuple[int, ...] = ()
+
+    @property
+    def skus(self) -> Tuple[int, ...]:
+        """Indices of every SKU the offer can consume."""
+        if self.choose:
+            return self.members
+        return tuple(index for index, _ in self.removed)
+
+
+def offer_label(offer: CompiledOffer) -> str:
+    """Short name of an offer, e.g. ``1B+2E for 80`` or ``3 of STXYZ for 45``."""
+    if offer.choose:
+        members = "".join(sorted(SKUS[index] for index in offer.members))
+        return f"{offer.choose} of {members} for {offer.price}"
+    removed = "+".join(f"{quantity}{SKUS[index]}" for index, quantity in offer.removed)
+    return f"{removed} for {offer.price}"
+
+
+@dataclasses.dataclass(frozen=True)
+class PriceTable:
+    """Unit prices for A-Z and the offers to apply, in priority order."""
+
+    prices: Tuple[int, ...]
+    offers: Tuple[CompiledOffer, ...]
+
+    @functools.cached_property
+    def components(self) -> Tuple[Tuple[Tuple[int, ...], Tuple[int, ...]], ...]:
+        """Groups of SKUs linked by shared offers.
+
+        Offers in different groups never compete for the same units, so each
+        group can be priced on its own. Returns ``(sku indices, offer indices)``
+        pairs; SKUs that no offer references are left out.
+        """
+        parent = list(range(SKU_COUNT))
+
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        for offer in self.offers:
+            first, *rest = offer.skus
+            for index in rest:
+                parent[find(index)] = find(first)
+        groups: Dict[int, Tuple[List[int], List[int]]] = {}
+        for position, offer in enumerate(self.offers):
+            groups.setdefault(find(offer.skus[0]), ([], []))[1].append(position)
+        for index in range(SKU_COUNT):
+            if find(index) in groups:
+                groups[find(index)][0].append(index)
+        return tuple(
+            (tuple(indices), tuple(positions)) for indices, positions in groups.values()
+        )
+
+    @functools.cached_property
+    def sku_offers(self) -> Tuple[Tuple[int, ...], ...]:
+        """Positions in ``offers`` of the offers that use each SKU."""
+        positions: List[List[int]] = [[] for _ in range(SKU_COUNT)]
+        for position, offer in enumerate(self.offers):
+            for index in offer.skus:
+                positions[index].append(position)
+        return tuple(tuple(offer_positions) for offer_positions in positions)
+
+    @functools.cached_property
+    def component_tables(self) -> Tuple[PriceTable, ...]:
+        """A table per entry of ``components`` with only its offers and prices.
+
+        Prices of SKUs outside the component are zero, so pricing a full count
+        vector against it gives the component's share of the total.
+        """
+        tables = []
+        for indices, positions in self.components:
+            prices = [0] * SKU_COUNT
+            for index in indices:
+                prices[index] = self.prices[index]
+            offers = tuple(self.offers[position] for position in positions)
+            tables.append(PriceTable(prices=tuple(prices), offers=offers))
+        return tuple(tables)
+
+    @functools.cached_property
+    def sku_components(self) -> Tuple[int, ...]:
+        """Position in ``components`` of each SKU, -1 if no offer uses it."""
+        positions = [-1] * SKU_COUNT
+        for position, (indices, _) in enumerate(self.components):
+            for index in indices:
+                positions[index] = position
+        return tuple(positions)
+
+    @functools.cached_property
+    def price_function(self) -> Callable[[Sequence[int]], int]:
+        """``price_counts`` specialized to this table, see ``codegen``."""
+        from .codegen import compile_table
+
+        return compile_table(self)
+
+    @functools.cached_property
+    def offer_savings(self) -> Tuple[int, ...]:
+        """What one application of each fixed offer saves, 0 for group offers.
+
+        Group offers save depending on which units they take.
+        """
+        savings = []
+        for offer in self.offers:
+            value = 0
+            if not offer.choose:
+                for index, quantity in offer.removed:
+                    value += self.prices[index] * quantity
+                value -= offer.price
+            savings.append(value)
+        return tuple(savings)
+
+
+def count_skus(skus: str) -> List[int]:
+    """Counts each SKU of ``skus`` into a 26-slot vector indexed A-Z.
+
+    Only the distinct characters of ``skus`` are counted, each with one
+    ``str.count``, so short baskets cost a handful of C-level scans.
+
+    Parameters
+    ----------
+    skus : str
+        A string of uppercase SKUs [A-Z]. Other characters are ignored.
+
+    Returns
+    -------
+    list
+        ``counts[i]`` is the number of occurrences of ``SKUS[i]``.
+
+    Examples
+    --------
+    >>> count_skus('AAB')[:3]
+    [2, 1, 0]
+    """
+    counts = [0] * SKU_COUNT
+    for sku in set(skus):
+        index = SKU_INDEX.get(sku)
+        if index is not None:
+            counts[index] = skus.count(sku)
+    return counts
+
+
+_DELETE_SKUS = str.maketrans("", "", SKUS)
+
+
+def first_invalid_index(skus: str) -> int:
+    """Position of the first character of ``skus`` that is not a SKU, or -1."""
+    invalid = skus.translate(_DELETE_SKUS)
+    return skus.index(invalid[0]) if invalid else -1
+
+
+def scan_skus(skus: str) -> Tuple[Optional[List[int]], int]:
+    """Validates and counts ``skus`` in a single pass.
+
+    Like ``count_skus``, but a character that is not a SKU fails the lookup
+    into ``SKU_INDEX``; no regex or per-character loop is involved.
+
+    Parameters
+    ----------
+    skus : str
+
+    Returns
+    -------
+    tuple
+        ``(counts, -1)`` if every character is a SKU [A-Z], otherwise
+        ``(None, index)`` with the position of the first invalid character.
+
+    Raises
+    ------
+    TypeError
+        ``skus`` is not a str.
+
+    Examples
+    --------
+    >>> scan_skus('AAB')[0][:3]
+    [2, 1, 0]
+    >>> scan_skus('AxB')
+    (None, 1)
+    """
+    if not isinstance(skus, str):
+        raise TypeError(f"Expected str, got {type(skus)}")
+    counts = [0] * SKU_COUNT
+    try:
+        for sku in set(skus):
+            counts[SKU_INDEX[sku]] = skus.count(sku)
+    except KeyError:
+        return None, first_invalid_index(skus)
+    return counts, -1
+
+
+def compile_discounts(discounts: Iterable, prices: Dict[str, int]) -> PriceTable:
+    """Compiles ``Discount`` objects into a ``PriceTable``.
+
+    Parameters
+    ----------
+    discounts : iterable of Discount
+        Offers in the order they should be applied.
+    prices : dict
+        Unit price for every SKU.
+
+    Returns
+    -------
+    PriceTable
+    """
+    offers = []
+    for discount in discounts:
+        if discount.choose:
+            members = sorted(
+                discount.required_items.items, key=lambda sku: -prices[sku]
+            )
+            offers.append(
+                CompiledOffer(
+                    price=discount.discounted_price,
+                    choose=discount.choose,
+                    members=tuple(SKU_INDEX[sku] for sku in members),
+                )
+            )
+        else:
+            offers.append(
+                CompiledOffer(
+                    price=discount.discounted_price,
+                    removed=tuple(
+                        (SKU_INDEX[sku], item.quantity)
+                        for sku, item in discount.removed_items.items.items()
+                    ),
+                )
+            )
+    return PriceTable(prices=tuple(prices[sku] for sku in SKUS), offers=tuple(offers))
+
+
+def reachable_offers(counts: Sequence[int], table: PriceTable) -> List[int]:
+    """Positions, in application order, of the offers using a SKU of ``counts``."""
+    sku_offers = table.sku_offers
+    present = [index for index, count in enumerate(counts) if count]
+    if len(present) == 1:
+        return list(sku_offers[present[0]])
+    reachable = set()
+    for index in present:
+        reachable.update(sku_offers[index])
+    return sorted(reachable)
+
+
+def apply_offer(offer: CompiledOffer, counts: List[int]) -> int:
+    """Applies ``offer`` to ``counts`` in place as often as it fits.
+
+    The number of applications is worked out with floor division on the
+    remaining counts, so nothing is raised or allocated per application.
+
+    Parameters
+    ----------
+    offer : CompiledOffer
+    counts : list of int
+        26-slot count vector, updated in place.
+
+    Returns
+    -------
+    int
+        Number of times the offer was applied, 0 if it did not fit.
+    """
+    if offer.choose:
+        available = 0
+        for index in offer.members:
+            available += counts[index]
+        times = available // offer.choose
+        to_remove = times * offer.choose
+        for index in offer.members:
+            if not to_remove:
+                break
+            count = counts[index]
+            if count >= to_remove:
+                counts[index] = count - to_remove
+                break
+            counts[index] = 0
+            to_remove -= count
+        return times
+    times = min(counts[index] // quantity for index, quantity in offer.removed)
+    if times:
+        for index, quantity in offer.removed:
+            counts[index] -= times * quantity
+    return times
+
+
+def price_counts(counts: Sequence[int], table: PriceTable) -> int:
+    """Prices a count vector by applying each offer as often as it fits.
+
+    Offers are applied greedily in ``table.offers`` order with
+    ``apply_offer``. Only offers that use a SKU of the basket are looked at
+    (see ``reachable_offers``).
+
+    Parameters
+    ----------
+    counts : sequence of int
+        26-slot count vector, see ``count_skus``.
+    table : PriceTable
+
+    Returns
+    -------
+    int
+        Total price of the basket.
+    """
+    counts = list(counts)
+    offers = table.offers
+    total = 0
+    for position in reachable_offers(counts, table):
+        offer = offers[position]
+        total += apply_offer(offer, counts) * offer.price
+    prices = table.prices
+    for index, count in enumerate(counts):
+        if count:
+            total += prices[index] * count
+    return total
+
+
+@dataclasses.dataclass(slots=True)
+class PriceBreakdown:
+    """How a basket was priced with ``table``.
+
+    ``applied[i]`` and ``savings[i]`` are the number of applications of
+    ``table.offers[i]`` and what they saved against unit prices, and
+    ``leftover`` is the count vector of the units charged at unit price.
+    """
+
+    total: int
+    applied: List[int]
+    savings: List[int]
+    leftover: List[int]
+    table: PriceTable = dataclasses.field(repr=False, compare=False)
+
+    def to_dict(self) -> Dict[str, object]:
+        """Receipt of the offers applied and leftover units, for display."""
+        table = self.table
+        return {
+            "total": self.total,
+            "offers": [
+                {
+                    "offer": offer_label(table.offers[position]),
+                    "times": times,
+                    "savings": self.savings[position],
+                }
+                for position, times in enumerate(self.applied)
+                if times
+            ],
+            "leftover": {
+                SKUS[index]: {"quantity": count, "price": table.prices[index] * count}
+                for index, count in enumerate(self.leftover)
+                if count
+            },
+        }
+
+
+def price_counts_detailed(counts: Sequence[int], table: PriceTable) -> PriceBreakdown:
+    """``price_counts`` that also records what each offer did.
+
+    The breakdown is filled in during the single greedy pass, into lists
+    allocated once per call.
+
+    Parameters
+    ----------
+    counts : sequence of int
+        26-slot count vector, see ``count_skus``.
+    table : PriceTable
+
+    Returns
+    -------
+    PriceBreakdown
+    """
+    counts = list(counts)
+    offers = table.offers
+    prices = table.prices
+    applied = [0] * len(offers)
+    savings = [0] * len(offers)
+    total = 0
+    offer_savings = table.offer_savings
+    for position in reachable_offers(counts, table):
+        offer = offers[position]
+        if offer.choose:
+            value = 0
+            for index in offer.members:
+                value += prices[index] * counts[index]
+            times = apply_offer(offer, counts)
+            if not times:
+                continue
+            for index in offer.members:
+                value -= prices[index] * counts[index]
+            savings[position] = value - times * offer.price
+        else:
+            times = apply_offer(offer, counts)
+            if not times:
+                continue
+            savings[position] = times * offer_savings[position]
+        applied[position] = times
+        total += times * offer.price
+    for index, count in enumerate(counts):
+        if count:
+            total += prices[index] * count
+    return PriceBreakdown(total, applied, savings, counts, table)
@@ -0,0 +1,377 @@
+"""
+Re-prices a file of baskets on every core.
+
+    PYTHONPATH=lib python -m solutions.CHK.reprice orders.txt totals.txt
+
+The input holds one basket per line, either as plain SKUs or as JSON lines
+(a JSON string, or an object whose ``--field`` holds the SKUs). It is
+memory-mapped and cut into shards of about ``--chunk-bytes`` on line
+boundaries, which worker processes price with ``checkout_many``. The output
+gets one total per input line, in input order, -1 for invalid baskets.
+
+After each shard is written and synced to disk a checkpoint is saved next to
+the output, so an interrupted run picks up where it stopped when started again
+with the same arguments. A run whose output is shorter than its checkpoint
+records starts over.
+"""
+from __future__ import annotations
+
+import argparse
+import collections
+import dataclasses
+import itertools
+import json
+import mmap
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Deque, Iterator, List, Optional, Tuple
+
+from .checkout_solution import STORE, checkout_many
+
+CHUNK_BYTES = 4 << 20
+FORMATS = ("auto", "lines", "jsonl")
+
+
+@dataclasses.dataclass(frozen=True)
+class RepriceStats:
+    lines: int
+    shards: int
+    resumed_shards: int
+    seconds: float
+    catalogue_version: str
+
+
+def detect_format(mapped) -> str:
+    """``jsonl`` if the first non-blank line looks like JSON, else ``lines``."""
+    for line in iter(mapped.readline, b""):
+        line = line.strip()
+        if line:
+            return "jsonl" if line[:1] in (b"{", b'"') else "lines"
+    return "lines"
+
+
+def shard_bounds(mapped, chunk_bytes: int = CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """Splits a mapped file into ``(start, end)`` ranges of whole lines."""
+    if chunk_bytes <= 0:
+        raise ValueError(f"Expected positive chunk_bytes, got {chunk_bytes}")
+    bounds = []
+    start, size = 0, len(mapped)
+    while start < size:
+        newline = mapped.find(b"\n", min(start + chunk_bytes, size) - 1)
+        end = size if newline < 0 else newline + 1
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def _parse_jsonl(line: str, field: str):
+    try:
+        value = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(value, dict):
+        return value.get(field)
+    return value
+
+
+def parse_shard(data: bytes, input_format: str, field: str = "skus") -> List:
+    """The basket of each line of ``data``; non-str entries price as invalid."""
+    text = data.decode("ascii", errors="replace")
+    if text.endswith("\n"):
+        text = text[:-1]
+    if "\r" in text:
+        text = text.replace("\r\n", "\n")
+    lines = text.split("\n")
+    if input_format == "jsonl":
+        return [_parse_jsonl(line, field) for line in lines]
+    return lines
+
+
+def price_shard(
+    path: str,
+    start: int,
+    end: int,
+    input_format: str,
+    field: str = "skus",
+    optimal: bool = False,
+) -> Tuple[str, int, bytes]:
+    """Prices bytes ``[start, end)`` of ``path``.
+
+    Runs in the worker processes, which map the file themselves so only the
+    bounds and the encoded totals cross the process boundary.
+
+    Returns
+    -------
+    tuple
+        (catalogue version, number of lines, one total per line as bytes)
+    """
+    version = STORE.snapshot.version
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            data = mapped[start:end]
+    totals = checkout_many(parse_shard(data, input_format, field), optimal=optimal)
+    output = "".join(f"{total}\n" for total in totals).encode("ascii")
+    return version, len(totals), output
+
+
+class _Checkpoint:
+    """Progress of one run, saved atomically next to the output file."""
+
+    def __init__(self, output_path: str, identity: dict):
+        self.path = output_path + ".ckpt"
+        self.identity = identity
+        self.reset()
+
+    def reset(self):
+        self.shards = 0
+        self.lines = 0
+        self.output_bytes = 0
+
+    def load(self) -> bool:
+        """Restores saved progress; False if there is none for this run."""
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if saved.get("identity") != self.identity:
+            print(f"Ignoring checkpoint {self.path} of a different run")
+            return False
+        self.shards = saved["shards"]
+        self.lines = saved["lines"]
+        self.output_bytes = saved["output_bytes"]
+        return True
+
+    def save(self):
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(
+                {
+                    "identity": self.identity,
+                    "shards": self.shards,
+                    "lines": self.lines,
+                    "output_bytes": self.output_bytes,
+                },
+                f,
+            )
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class ProgressReport:
+    """Prints shards, lines and throughput at most every ``interval`` s."""
+
+    def __init__(self, total_bytes: int, interval: float = 1.0, stream=None):
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.stream = stream if stream is not None else sys.stderr
+        self._start = time.monotonic()
+        self._last = 0.0
+
+    def __call__(self, shards: int, lines: int, done_bytes: int, final=False):
+        now = time.monotonic()
+        if not final and now - self._last < self.interval:
+            return
+        self._last = now
+        elapsed = max(now - self._start, 1e-9)
+        percent = 100.0 * done_bytes / self.total_bytes if self.total_bytes else 100.0
+        print(
+            f"{shards} shards, {lines} lines, {percent:.1f}%,"
+            f" {lines / elapsed:.0f} lines/s",
+            file=self.stream,
+            flush=True,
+        )
+
+
+def _ordered_results(
+    path: str,
+    bounds: List[Tuple[int, int]],
+    workers: int,
+    args: tuple,
+) -> Iterator[Tuple[str, int, bytes]]:
+    """Results of ``price_shard`` over ``bounds`` in order.
+
+    At most two shards per worker are queued, so memory use does not grow
+    with the size of the input.
+    """
+    if workers == 0:
+        for start, end in bounds:
+            yield price_shard(path, start, end, *args)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Future] = collections.deque()
+        shards = iter(bounds)
+
+        def submit_next():
+            for start, end in itertools.islice(shards, 1):
+                pending.append(executor.submit(price_shard, path, start, end, *args))
+
+        for _ in range(2 * workers):
+            submit_next()
+        while pending:
+            result = pending.popleft().result()
+            submit_next()
+            yield result
+
+
+def reprice_file(
+    input_path: str,
+    output_path: str,
+    workers: Optional[int] = None,
+    chunk_bytes: int = CHUNK_BYTES,
+    input_format: str = "auto",
+    field: str = "skus",
+    optimal: bool = False,
+    resume: bool = True,
+    progress: Optional[Callable[..., None]] = None,
+) -> RepriceStats:
+    """Writes the checkout total of each line of ``input_path`` to ``output_path``.
+
+    Parameters
+    ----------
+    input_path : str
+    output_path : str
+    workers : int, optional
+        Worker processes, ``os.cpu_count()`` if None; 0 prices in-process.
+    chunk_bytes : int
+        Approximate size of the shard a worker prices at a time.
+    input_format : {'auto', 'lines', 'jsonl'}
+    field : str
+        Key of the SKUs in JSON object lines.
+    optimal : bool
+        Price with the cheapest combination of offers, see ``checkout``.
+    resume : bool
+        Continue from a checkpoint of an interrupted run with the same
+        arguments, input file and catalogue.
+    progress : callable, optional
+        Called as ``progress(shards, lines, done_bytes, final=False)`` after
+        each shard is written, e.g. a ``ProgressReport``.
+
+    Raises
+    ------
+    ValueError
+        Unknown ``input_format``.
+    RuntimeError
+        A worker priced with a different catalogue than the run started with.
+    """
+    if input_format not in FORMATS:
+        raise ValueError(f"Expected input_format in {FORMATS}, got {input_format}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    version = STORE.snapshot.version
+    stat = os.stat(input_path)
+    start_time = time.monotonic()
+    with open(input_path, "rb") as f:
+        if stat.st_size == 0:
+            bounds = []
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if input_format == "auto":
+                    input_format = detect_format(mapped)
+                bounds = shard_bounds(mapped, chunk_bytes)
+    checkpoint = _Checkpoint(
+        output_path,
+        {
+            "input": os.path.abspath(input_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "chunk_bytes": chunk_bytes,
+            "format": input_format,
+            "field": field,
+            "optimal": optimal,
+            "catalogue": version,
+        },
+    )
+    resumed = resume and os.path.exists(output_path) and checkpoint.load()
+    if resumed and os.path.getsize(output_path) < checkpoint.output_bytes:
+        # Padding the output up to the checkpoint would write NUL totals
+        print(f"Ignoring checkpoint {checkpoint.path}, the output is shorter")
+        checkpoint.reset()
+        resumed = False
+    resumed_shards = checkpoint.shards
+    with open(output_path, "r+b" if resumed else "wb") as output:
+        output.truncate(checkpoint.output_bytes)
+        output.seek(checkpoint.output_bytes)
+        results = _ordered_results(
+            input_path,
+            bounds[checkpoint.shards :],
+            workers,
+            (input_format, field, optimal),
+        )
+        for shard_version, lines, totals in results:
+            if shard_version != version:
+                raise RuntimeError(
+                    f"Expected catalogue {version} in workers, got {shard_version}"
+                )
+            output.write(totals)
+            output.flush()
+            # On disk before the checkpoint that points past it
+            os.fsync(output.fileno())
+            checkpoint.shards += 1
+            checkpoint.lines += lines
+            checkpoint.output_bytes += len(totals)
+            checkpoint.save()
+            if progress is not None:
+                progress(
+                    checkpoint.shards,
+                    checkpoint.lines,
+                    bounds[checkpoint.shards - 1][1],
+                )
+    checkpoint.remove()
+    if progress is not None:
+        progress(checkpoint.shards, checkpoint.lines, stat.st_size, final=True)
+    return RepriceStats(
+        lines=checkpoint.lines,
+        shards=len(bounds),
+        resumed_shards=resumed_shards,
+        seconds=time.monotonic() - start_time,
+        catalogue_version=version,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("input", help="File of baskets, one per line")
+    parser.add_argument("output", help="File the totals are written to")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--chunk-bytes", type=int, default=CHUNK_BYTES)
+    parser.add_argument("--format", choices=FORMATS, default="auto")
+    parser.add_argument("--field", default="skus")
+    parser.add_argument("--optimal", action="store_true")
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignore any saved checkpoint"
+    )
+    parser.add_argument("-q", "--quiet", action="store_true")
+    args = parser.parse_args(argv)
+    progress = None
+    if not args.quiet:
+        progress = ProgressReport(os.path.getsize(args.input))
+    stats = reprice_file(
+        args.input,
+        args.output,
+        workers=args.workers,
+        chunk_bytes=args.chunk_bytes,
+        input_format=args.format,
+        field=args.field,
+        optimal=args.optimal,
+        resume=not args.restart,
+        progress=progress,
+    )
+    if not args.quiet:
+        print(
+            f"Repriced {stats.lines} lines with catalogue"
+            f" {stats.catalogue_version} in {stats.seconds:.1f}s",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from .checkout_solution import STORE, Basket, validate_skus
+from .optimal import price_counts_optimal
+from .pricing import PriceTable, price_counts
+
+
+class CheckoutSession:
+    """A basket priced incrementally as SKUs are scanned.
+
+    Offers only compete for units within a component of SKUs linked by
+    offers (``PriceTable.components``), so after each change only the
+    components of the changed SKUs are priced again. The total always equals
+    ``checkout`` of the scanned SKUs.
+
+    Parameters
+    ----------
+    skus : str
+        SKUs already in the basket.
+    optimal : bool
+        Price with ``price_counts_optimal`` instead of greedily.
+    table : PriceTable, optional
+        Defaults to the catalogue snapshot when the session starts; the
+        session keeps pricing against it even if the catalogue is reloaded.
+    """
+
+    def __init__(
+        self, skus: str = "", optimal: bool = False, table: Optional[PriceTable] = None
+    ):
+        self.table = table if table is not None else STORE.snapshot.table
+        self._price = price_counts_optimal if optimal else price_counts
+        self.basket = Basket("")
+        self._component_totals = [0] * len(self.table.components)
+        self._total = 0
+        if skus:
+            self.add(skus)
+
+    def add(self, skus: str) -> int:
+        """Scans one or more SKUs into the basket and returns the new total.
+
+        Raises
+        ------
+        TypeError
+            ``skus`` is not a string of [A-Z].
+        """
+        validate_skus(skus)
+        changed = Basket(skus)
+        self.basket += changed
+        return self._reprice(changed, 1)
+
+    def remove(self, skus: str) -> int:
+        """Takes one or more SKUs out of the basket and returns the new total.
+
+        Raises
+        ------
+        TypeError, ValueError
+            ``skus`` is not a string of [A-Z] or not all in the basket.
+        """
+        validate_skus(skus)
+        changed = Basket(skus)
+        self.basket -= changed
+        return self._reprice(changed, -1)
+
+    def total(self) -> int:
+        return self._total
+
+    def _reprice(self, changed: Basket, sign: int) -> int:
+        sku_components = self.table.sku_components
+        touched = set()
+        for index, count in enumerate(changed.counts):
+            if not count:
+                continue
+            component = sku_components[index]
+            if component < 0:
+                self._total += sign * count * self.table.prices[index]
+            else:
+                touched.add(component)
+        for component in touched:
+            total = self._price(
+                self.basket.counts, self.table.component_tables[component]
+            )
+            self._total += total - self._component_totals[component]
+            self._component_totals[component] = total
+        return self._total
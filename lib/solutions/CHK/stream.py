@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from .pricing import SKU_COUNT, SKUS
+
+CHUNK_SIZE = 1 << 20
+
+_SKU_BYTE_VALUES = [bytes([sku]) for sku in SKUS.encode("ascii")]
+
+Chunk = Union[str, bytes, bytearray, memoryview]
+Window = Tuple[Chunk, int, Optional[int]]
+
+
+def _countable(view: memoryview, start: int, end: int) -> Tuple[Chunk, int, int]:
+    """What to count ``view[start:end]`` on, a copy only if it must be."""
+    obj = view.obj
+    if (
+        isinstance(obj, (bytes, bytearray))
+        and view.contiguous
+        and view.nbytes == len(obj)
+    ):
+        return obj, start, end
+    return view[start:end].tobytes(), 0, end - start
+
+
+class SkuStreamCounter:
+    """Validates and counts SKUs chunk by chunk.
+
+    ``chunk[start:end]`` is counted in place with ``count``, so chunks are not
+    copied and memory use is bounded by the chunk size however long the stream
+    is. A chunk is valid if its SKU counts add up to its length.
+    """
+
+    def __init__(self):
+        self.counts = [0] * SKU_COUNT
+        self.valid = True
+
+    def update(self, chunk: Chunk, start: int = 0, end: Optional[int] = None):
+        if end is None:
+            end = len(chunk)
+        if not self.valid or start >= end:
+            return
+        if isinstance(chunk, memoryview):
+            chunk, start, end = _countable(chunk, start, end)
+        skus = SKUS if isinstance(chunk, str) else _SKU_BYTE_VALUES
+        chunk_counts = [chunk.count(sku, start, end) for sku in skus]
+        if sum(chunk_counts) != end - start:
+            self.valid = False
+            return
+        self.counts = [a + b for a, b in zip(self.counts, chunk_counts)]
+
+
+def _read_into(f, chunk_size: int) -> Iterator[Window]:
+    """Reads ``f`` into one buffer, reused for every chunk."""
+    buffer = bytearray(chunk_size)
+    while True:
+        size = f.readinto(buffer)
+        if not size:
+            return
+        yield buffer, 0, size
+
+
+def iter_windows(source, chunk_size: int = CHUNK_SIZE) -> Iterable[Window]:
+    """Splits a SKU source into ``(chunk, start, end)`` windows.
+
+    Each window covers at most ``chunk_size`` characters of ``chunk``; an
+    ``end`` of None means the end of the chunk. In-memory sources are not
+    copied: every window refers to the source itself.
+
+    Parameters
+    ----------
+    source : str, bytes-like, file object or iterable of chunks
+        Binary files are read from their current position into one reused
+        buffer, other file objects are read ``chunk_size`` at a time.
+    chunk_size : int
+
+    Raises
+    ------
+    TypeError
+        ``source`` is none of the above.
+    """
+    if isinstance(source, (str, bytes, bytearray, memoryview)):
+        size = len(source)
+        return (
+            (source, start, min(start + chunk_size, size))
+            for start in range(0, size, chunk_size)
+        )
+    if hasattr(source, "read"):
+        if hasattr(source, "readinto"):
+            return _read_into(source, chunk_size)
+        chunks = iter(lambda: source.read(chunk_size), source.read(0))
+        return ((chunk, 0, None) for chunk in chunks)
+    try:
+        return ((chunk, 0, None) for chunk in iter(source))
+    except TypeError:
+        raise TypeError(f"Expected SKUs, a file or chunks, got {type(source)}")
+
+
+def count_stream(source, chunk_size: int = CHUNK_SIZE) -> Optional[List[int]]:
+    """Counts the SKUs of a stream.
+
+    Returns
+    -------
+    list of int or None
+        26-slot count vector, or None if the stream holds anything but [A-Z].
+
+    Raises
+    ------
+    TypeError
+        ``source`` is not a supported source, see ``iter_windows``.
+    """
+    counter = SkuStreamCounter()
+    for chunk, start, end in iter_windows(source, chunk_size):
+        if not isinstance(chunk, (str, bytes, bytearray, memoryview)):
+            return None
+        counter.update(chunk, start, end)
+        if not counter.valid:
+            return None
+    return counter.counts
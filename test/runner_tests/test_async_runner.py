@@ -0,0 +1,52 @@
+import json
+import threading
+
+import pytest
+import send_command_to_server
+from runner.async_runner import BatchingConfig
+from runner.local_broker import LocalBroker
+from runner.utils import Utils
+from solutions.CHK import checkout_solution
+
+
+@pytest.fixture
+def async_config(monkeypatch):
+    monkeypatch.setattr(Utils, "get_batching_config", lambda: BatchingConfig())
+    monkeypatch.setattr(Utils, "get_concurrency_config", lambda: None)
+    monkeypatch.setattr(Utils, "get_tracing_config", lambda: None)
+    yield
+    checkout_solution.STORE.stop_polling()
+
+
+class TestAsyncRunner:
+    def test_watches_catalogue(self, async_config):
+        # ARRANGE
+        responses = []
+        answered = threading.Event()
+
+        def on_response(headers, body):
+            responses.append(json.loads(body))
+            answered.set()
+
+        with LocalBroker(port=0) as broker:
+            broker.subscribe("responses", on_response)
+            runner = send_command_to_server.build_runner(
+                Utils.get_runner_config()
+                .set_hostname("localhost")
+                .set_port(broker.port)
+                .set_request_queue_name("requests")
+                .set_response_queue_name("responses")
+                .set_time_to_wait_for_request(500)
+            )
+            thread = threading.Thread(target=runner.run, daemon=True)
+            thread.start()
+            assert broker.wait_for_subscriber("requests", timeout=10)
+            # ACT
+            broker.send(
+                "requests", '{"method":"checkout","params":["AAB"],"id":"CHK_R1_001"}'
+            )
+            assert answered.wait(10)
+            thread.join(10)
+        # ASSERT
+        assert responses[0]["result"] == 130
+        assert "catalogue-poll" in [thread.name for thread in threading.enumerate()]
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+from runner.batching import MicroBatcher
+
+
+def _double_all(items):
+    return [item * 2 for item in items]
+
+
+class TestMicroBatcher:
+    def test_batches_concurrent_submissions(self):
+        # ARRANGE
+        batch_sizes = []
+
+        def batch_fn(items):
+            batch_sizes.append(len(items))
+            return _double_all(items)
+
+        batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait=0.01)
+
+        async def main():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+        # ACT
+        results = asyncio.run(main())
+        # ASSERT
+        assert results == [i * 2 for i in range(10)]
+        assert batch_sizes == [4, 4, 2]
+
+    def test_flushes_after_max_wait(self):
+        batcher = MicroBatcher(_double_all, max_batch_size=100, max_wait=0.001)
+        assert asyncio.run(batcher.submit(21)) == 42
+        assert batcher.batches == 1
+
+    def test_batch_error_reaches_every_caller(self):
+        batcher = MicroBatcher(lambda items: [], max_batch_size=2)
+
+        async def main():
+            return await asyncio.gather(
+                batcher.submit(1), batcher.submit(2), return_exceptions=True
+            )
+
+        results = asyncio.run(main())
+        assert all(isinstance(result, ValueError) for result in results)
+
+    def test_invalid_max_batch_size(self):
+        with pytest.raises(ValueError):
+            MicroBatcher(_double_all, max_batch_size=0)
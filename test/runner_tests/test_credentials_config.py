@@ -0,0 +1,105 @@
+import os
+
+import pytest
+from runner import credentials_config_file
+from runner.credentials_config_file import (
+    get_config,
+    load_config,
+    read_from_config_file,
+    read_from_config_file_with_default,
+    reload_config,
+)
+
+CONFIG = """# Runner specific configuration
+tdl_hostname=example.com
+tdl_require_rec=false
+tdl_journey_id=abc\\=\\=
+runner_threads=4
+runner_max_batch_wait_ms=0.5
+other_key=value
+aws_access_key_id=from-file
+"""
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "credentials.config"
+    path.write_text(CONFIG)
+    return path
+
+
+@pytest.fixture
+def cached_config(config_file, monkeypatch):
+    monkeypatch.setattr(
+        credentials_config_file, "_config", load_config(str(config_file), environ={})
+    )
+    return config_file
+
+
+class TestLoadConfig:
+    def test_values_are_typed(self, config_file):
+        config = load_config(str(config_file), environ={})
+        assert config["tdl_hostname"] == "example.com"
+        assert config["tdl_require_rec"] is False
+        assert config["tdl_journey_id"] == "abc=="
+        assert config["runner_threads"] == 4
+        assert config["runner_max_batch_wait_ms"] == 0.5
+        assert config["other_key"] == "value"
+        assert config.get("missing", 1) == 1
+
+    def test_immutable(self, config_file):
+        config = load_config(str(config_file), environ={})
+        with pytest.raises(TypeError):
+            config.properties["tdl_hostname"] = "other"
+
+    def test_environment_overrides(self, config_file):
+        config = load_config(
+            str(config_file),
+            environ={"TDL_HOSTNAME": "override", "RUNNER_PROCESSES": "2"},
+        )
+        assert config["tdl_hostname"] == "override"
+        assert config["runner_processes"] == 2
+
+    def test_only_runner_keys_overridden(self, config_file):
+        config = load_config(
+            str(config_file),
+            environ={"AWS_ACCESS_KEY_ID": "from-env", "OTHER_KEY": "other"},
+        )
+        assert config["aws_access_key_id"] == "from-file"
+        assert config["other_key"] == "value"
+
+    @pytest.mark.parametrize(
+        "key, value",
+        [("runner_threads", "four"), ("runner_async", "yes"), ("tdl_require_rec", "1")],
+    )
+    def test_rejects_wrong_types(self, config_file, key, value):
+        with pytest.raises(ValueError, match=key):
+            load_config(str(config_file), environ={key.upper(): value})
+
+
+class TestCachedConfig:
+    def test_read_once(self, cached_config, monkeypatch):
+        # ARRANGE: fail if the file were parsed again
+        def fail(*_):
+            raise AssertionError("config file read again")
+
+        monkeypatch.setattr(credentials_config_file, "load_properties", fail)
+        # ACT / ASSERT
+        assert read_from_config_file("tdl_hostname") == "example.com"
+        assert read_from_config_file_with_default("runner_threads", 0) == 4
+        assert read_from_config_file_with_default("runner_async", False) is False
+        with pytest.raises(KeyError):
+            read_from_config_file("missing")
+
+    def test_reload_on_change(self, cached_config):
+        # ARRANGE
+        before = get_config()
+        assert reload_config() is before
+        cached_config.write_text(CONFIG.replace("example.com", "changed.example.com"))
+        stat = os.stat(cached_config)
+        os.utime(cached_config, ns=(stat.st_atime_ns, before.mtime_ns + 10**9))
+        # ACT
+        after = reload_config()
+        # ASSERT
+        assert after is not before
+        assert get_config()["tdl_hostname"] == "changed.example.com"
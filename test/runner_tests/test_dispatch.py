@@ -0,0 +1,66 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from runner.dispatch import OrderedDispatcher
+
+
+def _sleep_and_return(value):
+    time.sleep(random.random() / 200)
+    return value
+
+
+class TestOrderedDispatcher:
+    def test_publishes_in_submission_order(self):
+        # ARRANGE
+        dispatcher = OrderedDispatcher(max_in_flight=4)
+        published = []
+        # ACT
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for i in range(50):
+                dispatcher.submit(
+                    executor,
+                    _sleep_and_return,
+                    (i,),
+                    lambda future: published.append(future.result()),
+                )
+            assert dispatcher.drain(timeout=5)
+        # ASSERT
+        assert published == list(range(50))
+        assert dispatcher.in_flight == 0
+
+    def test_inline_exception(self):
+        dispatcher = OrderedDispatcher()
+        published = []
+        dispatcher.submit(None, lambda: 1 / 0, (), published.append)
+        assert isinstance(published[0].exception(), ZeroDivisionError)
+
+    def test_bounds_in_flight(self):
+        # ARRANGE
+        dispatcher = OrderedDispatcher(max_in_flight=1)
+        release = threading.Event()
+        submitted = []
+        executor = ThreadPoolExecutor(max_workers=2)
+        dispatcher.submit(executor, release.wait, (), lambda _: None)
+
+        def submit_second():
+            dispatcher.submit(executor, int, (), lambda _: None)
+            submitted.append(True)
+
+        # ACT
+        thread = threading.Thread(target=submit_second)
+        thread.start()
+        thread.join(timeout=0.1)
+        blocked = not submitted
+        release.set()
+        thread.join(timeout=5)
+        executor.shutdown()
+        # ASSERT
+        assert blocked
+        assert submitted == [True]
+
+    def test_invalid_max_in_flight(self):
+        with pytest.raises(ValueError):
+            OrderedDispatcher(max_in_flight=0)
@@ -0,0 +1,116 @@
+import json
+import math
+
+import pytest
+from runner.load_generator import (
+    arrival_offsets,
+    load_payloads,
+    main,
+    percentile,
+    run_load,
+)
+from runner.local_broker import LocalBroker
+
+PAYLOADS = [
+    {"method": "checkout", "params": ["AAB"]},
+    {"method": "sum", "params": [1, 2]},
+]
+
+
+def echo_runner(broker, request_queue="requests", response_queue="responses"):
+    """Answers each request with its first parameter, in-process."""
+
+    def respond(headers, body):
+        request = json.loads(body)
+        broker.send(
+            response_queue,
+            json.dumps({"result": request["params"][0], "id": request["id"]}),
+        )
+
+    broker.subscribe(request_queue, respond)
+
+
+class TestArrivalOffsets:
+    def test_burst(self):
+        assert list(arrival_offsets(3, rate=None)) == [0.0, 0.0, 0.0]
+
+    def test_uniform(self):
+        assert list(arrival_offsets(3, rate=10)) == [0.0, 0.1, 0.2]
+
+    def test_poisson(self):
+        offsets = list(arrival_offsets(10000, rate=100, arrival="poisson", seed=1))
+        assert offsets == sorted(offsets)
+        assert offsets[-1] == pytest.approx(100, rel=0.05)
+        assert offsets == list(arrival_offsets(10000, 100, "poisson", seed=1))
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            arrival_offsets(1, rate=0)
+        with pytest.raises(ValueError):
+            arrival_offsets(1, rate=1, arrival="bursty")
+
+
+class TestPercentile:
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([7], 95) == 7
+        assert math.isnan(percentile([], 50))
+
+
+class TestLoadPayloads:
+    def test_drops_ids(self, tmp_path):
+        path = tmp_path / "payloads.jsonl"
+        path.write_text('{"method": "sum", "params": [1, 2], "id": "SUM_R1_001"}\n\n')
+        assert load_payloads(str(path)) == [{"method": "sum", "params": [1, 2]}]
+
+    def test_rejects_other_lines(self, tmp_path):
+        path = tmp_path / "payloads.jsonl"
+        path.write_text('{"request_id": "user-001"}\n')
+        with pytest.raises(ValueError, match="line 1"):
+            load_payloads(str(path))
+
+
+class TestRunLoad:
+    def test_every_response_timed(self):
+        with LocalBroker(port=0) as broker:
+            echo_runner(broker)
+            report = run_load(
+                broker, PAYLOADS, "requests", "responses", count=50, rate=2000
+            )
+        assert (report.sent, report.received, report.lost) == (50, 50, 0)
+        assert 0 <= report.latencies[50] <= report.latencies[99] <= report.max_latency
+        assert report.throughput > 0
+        assert set(report.to_dict()) >= {"p50_seconds", "p95_seconds", "p99_seconds"}
+
+    def test_reports_lost_requests(self):
+        with LocalBroker(port=0) as broker:
+            broker.subscribe("requests", lambda headers, body: None)
+            report = run_load(
+                broker, PAYLOADS, "requests", "responses", count=3, timeout=0.01
+            )
+        assert report.lost == 3
+        assert math.isnan(report.latencies[50])
+
+    def test_main_waits_for_runner(self, tmp_path, capsys, monkeypatch):
+        # ARRANGE: a runner that subscribes once the broker is up
+        path = tmp_path / "payloads.jsonl"
+        path.write_text("".join(json.dumps(payload) + "\n" for payload in PAYLOADS))
+        start = LocalBroker.start
+
+        def start_with_runner(broker):
+            start(broker)
+            echo_runner(broker, "req", "resp")
+            return broker
+
+        monkeypatch.setattr(LocalBroker, "start", start_with_runner)
+        # ACT
+        exit_code = main(
+            [str(path), "--port", "0", "--count", "10", "--json"]
+            + ["--request-queue", "req", "--response-queue", "resp"]
+        )
+        # ASSERT
+        assert exit_code == 0
+        report = json.loads(capsys.readouterr().out.splitlines()[-1])
+        assert report["received"] == 10
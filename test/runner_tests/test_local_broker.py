@@ -0,0 +1,113 @@
+import socket
+
+import pytest
+from runner.local_broker import LocalBroker, decode_frames, encode_frame
+
+
+@pytest.fixture
+def broker():
+    with LocalBroker(port=0) as broker:
+        yield broker
+
+
+class StompClient:
+    """Just enough of a STOMP client to talk to the broker."""
+
+    def __init__(self, port):
+        self.sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+        self.buffer = bytearray()
+        self.frames = []
+
+    def send(self, command, headers, body=""):
+        self.sock.sendall(encode_frame(command, headers, body))
+
+    def receive(self):
+        while not self.frames:
+            self.buffer += self.sock.recv(65536)
+            self.frames += decode_frames(self.buffer)
+        return self.frames.pop(0)
+
+    def close(self):
+        self.sock.close()
+
+
+class TestFrames:
+    def test_round_trip(self):
+        buffer = bytearray(
+            encode_frame("SEND", {"destination": "a:b"}, "héllo\0")
+            + b"\n"
+            + encode_frame("ACK", {"id": "1"})
+        )
+        assert decode_frames(buffer) == [
+            ("SEND", {"destination": "a:b", "content-length": "7"}, "héllo\0"),
+            ("ACK", {"id": "1"}, ""),
+        ]
+        assert buffer == b""
+
+    def test_keeps_incomplete_frame(self):
+        frame = encode_frame("SEND", {"destination": "q"}, "body")
+        buffer = bytearray(frame[:-3])
+        assert decode_frames(buffer) == []
+        buffer += frame[-3:]
+        assert decode_frames(buffer) == [
+            ("SEND", {"destination": "q", "content-length": "4"}, "body")
+        ]
+
+
+class TestLocalBroker:
+    def test_stomp_request_response(self, broker):
+        # ARRANGE
+        responses = []
+        broker.subscribe("responses", lambda headers, body: responses.append(body))
+        client = StompClient(broker.port)
+        client.send("CONNECT", {"accept-version": "1.1", "host": "localhost"})
+        assert client.receive()[0] == "CONNECTED"
+        client.send("SUBSCRIBE", {"destination": "requests", "id": "this"})
+        # ACT: queued before the subscription took effect, if it had not
+        broker.wait_for_subscriber("requests", timeout=5)
+        broker.send("requests", '{"id":"X1"}')
+        command, headers, body = client.receive()
+        client.send(
+            "ACK", {"message-id": headers["message-id"], "subscription": "this"}
+        )
+        client.send("SEND", {"destination": "responses", "receipt": "r1"}, "done")
+        # ASSERT
+        assert (command, headers["subscription"], body) == (
+            "MESSAGE",
+            "this",
+            '{"id":"X1"}',
+        )
+        assert client.receive() == ("RECEIPT", {"receipt-id": "r1"}, "")
+        assert responses == ["done"]
+        client.close()
+
+    def test_keeps_messages_until_subscribed(self, broker):
+        received = []
+        broker.send("requests", "first")
+        broker.subscribe("requests", lambda headers, body: received.append(body))
+        broker.send("requests", "second")
+        assert received == ["first", "second"]
+
+    def test_subscribers_take_turns(self, broker):
+        received = {"a": [], "b": []}
+        for name in received:
+            broker.subscribe(
+                "q", lambda h, body, name=name: received[name].append(body)
+            )
+        for body in "1234":
+            broker.send("q", body)
+        assert received == {"a": ["1", "3"], "b": ["2", "4"]}
+
+    def test_disconnect_unsubscribes(self, broker):
+        client = StompClient(broker.port)
+        client.send("CONNECT", {"accept-version": "1.2"})
+        client.receive()
+        client.send("SUBSCRIBE", {"destination": "requests", "id": "0"})
+        assert broker.wait_for_subscriber("requests", timeout=5)
+        client.send("DISCONNECT", {"receipt": "bye"})
+        assert client.receive()[0] == "RECEIPT"
+        client.close()
+        received = []
+        broker.subscribe("requests", lambda headers, body: received.append(body))
+        broker.send("requests", "after")
+        assert received == ["after"]
@@ -0,0 +1,73 @@
+import importlib
+import pickle
+import sys
+import uuid
+
+import pytest
+from runner.registry import LazySolution, SolutionRegistry
+
+
+@pytest.fixture
+def solution_module(tmp_path, monkeypatch):
+    """A module never imported before defining ``double``."""
+    name = f"lazy_solution_{uuid.uuid4().hex}"
+    (tmp_path / f"{name}.py").write_text("def double(x):\n    return 2 * x\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield name
+    sys.modules.pop(name, None)
+
+
+class TestSolutionRegistry:
+    def test_imports_on_first_call(self, solution_module):
+        # ARRANGE
+        loaded = []
+        solutions = SolutionRegistry().register(
+            "double", solution_module, "double", on_load=loaded.append
+        )
+        assert solution_module not in sys.modules
+        # ACT
+        result = solutions["double"](21)
+        solutions["double"](1)
+        # ASSERT
+        assert result == 42
+        assert [module.__name__ for module in loaded] == [solution_module]
+        assert set(solutions.import_times) == {solution_module}
+        assert solution_module in solutions.report()
+
+    def test_on_load_once_per_module(self, solution_module):
+        # ARRANGE
+        loaded = []
+        solutions = (
+            SolutionRegistry()
+            .register("double", solution_module, "double", on_load=loaded.append)
+            .register("twice", solution_module, "double")
+        )
+        importlib.import_module(solution_module)
+        # ACT
+        solutions["twice"](1)
+        solutions["double"](1)
+        # ASSERT
+        assert [module.__name__ for module in loaded] == [solution_module]
+        assert solutions.import_times == {}
+
+    def test_prewarm(self, solution_module):
+        solutions = SolutionRegistry().register("double", solution_module, "double")
+        solutions.prewarm()
+        assert solution_module in sys.modules
+        assert "double" in solutions
+        with pytest.raises(KeyError):
+            solutions.prewarm(["missing"])
+
+    def test_missing_attribute(self, solution_module):
+        solutions = SolutionRegistry().register("triple", solution_module, "triple")
+        with pytest.raises(AttributeError):
+            solutions["triple"](1)
+
+
+class TestLazySolution:
+    def test_pickle_round_trip(self):
+        solution = LazySolution("solutions.SUM.sum_solution", "compute")
+        copy = pickle.loads(pickle.dumps(solution))
+        assert copy.module == solution.module
+        assert copy(1, 2) == 3
+        assert pickle.loads(pickle.dumps(copy))(2, 3) == 5
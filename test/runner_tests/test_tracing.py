@@ -0,0 +1,154 @@
+import json
+import multiprocessing
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from runner import tracing
+from runner.tracing import TracedSolution, Tracer, TracingConfig
+
+
+def double(x):
+    return 2 * x
+
+
+def worker_tracer_state():
+    return tracing.TRACER.enabled, len(tracing.TRACER.spans())
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    tracer = Tracer()
+    tracer.enabled = True
+    monkeypatch.setattr(tracing, "TRACER", tracer)
+    yield tracer
+    tracer.stop_exporting()
+
+
+class TestTracer:
+    def test_records_only_when_enabled(self):
+        tracer = Tracer()
+        with tracer.span("solution", "checkout", "CHK_R1_001"):
+            pass
+        assert tracer.spans() == []
+        tracer.enabled = True
+        with tracer.span("solution", "checkout", "CHK_R1_001"):
+            pass
+        (span,) = tracer.spans()
+        assert (span.name, span.method, span.request_id) == (
+            "solution",
+            "checkout",
+            "CHK_R1_001",
+        )
+        assert span.duration_ns >= 0
+        assert span.thread_id == threading.get_ident()
+
+    def test_ring_buffer_keeps_latest(self):
+        tracer = Tracer(capacity=3)
+        for index in range(5):
+            tracer.record("decode", index, index + 1)
+        assert [span.start_ns for span in tracer.spans()] == [2, 3, 4]
+        tracer.resize(2)
+        assert [span.start_ns for span in tracer.spans()] == [3, 4]
+
+    def test_chrome_trace(self):
+        # ARRANGE
+        tracer = Tracer()
+        tracer.record("publish", 2_000, 5_000, "sum", "SUM_R1_001")
+        # ACT
+        trace = tracer.to_chrome_trace()
+        # ASSERT
+        metadata, event = trace["traceEvents"]
+        assert metadata["ph"] == "M"
+        assert metadata["args"]["name"] == threading.current_thread().name
+        assert event["name"] == "publish"
+        assert (event["ph"], event["ts"], event["dur"]) == ("X", 2.0, 3.0)
+        assert event["args"] == {"method": "sum", "id": "SUM_R1_001"}
+
+    @pytest.mark.parametrize("format", ["chrome", "json"])
+    def test_export(self, tmp_path, format):
+        tracer = Tracer()
+        tracer.record("decode", 0, 10)
+        path = tmp_path / "trace.json"
+        tracer.export(str(path), format)
+        assert json.loads(path.read_text())
+
+    def test_export_rejects_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            Tracer().export(str(tmp_path / "trace.txt"), "text")
+
+    def test_exports_periodically_and_on_stop(self, tmp_path, tracer):
+        # ARRANGE
+        path = tmp_path / "trace.json"
+        tracer.start_exporting(str(path), interval=60, format="json")
+        tracer.record("decode", 0, 10)
+        # ACT
+        tracer.stop_exporting()
+        # ASSERT
+        assert len(json.loads(path.read_text())["spans"]) == 1
+
+
+class TestTracing:
+    def test_start_and_stop(self, tmp_path, tracer):
+        path = tmp_path / "trace.json"
+        tracing.start_tracing(TracingConfig(path=str(path), capacity=10))
+        assert tracer.enabled and tracer.capacity == 10
+        tracing.stop_tracing()
+        assert not tracer.enabled
+        assert "traceEvents" in json.loads(path.read_text())
+
+    def test_forked_workers_do_not_trace(self, tracer):
+        # ARRANGE
+        tracer.record("decode", 0, 10)
+        context = multiprocessing.get_context("fork")
+        # ACT
+        with ProcessPoolExecutor(
+            1, context, initializer=tracing.disable_inherited_tracing
+        ) as workers:
+            state = workers.submit(worker_tracer_state).result()
+        # ASSERT
+        assert state == (False, 0)
+        assert tracer.enabled
+
+
+class TestTracedSolution:
+    def test_records_calls(self, tracer):
+        solution = TracedSolution("double", double)
+        assert solution(21) == 42
+        (span,) = tracer.spans()
+        assert (span.name, span.method) == ("solution", "double")
+
+    def test_records_request_ids(self, tracer):
+        solution = TracedSolution("double", double).for_requests("DBL_R1_001")
+        assert solution(21) == 42
+        (span,) = tracer.spans()
+        assert (span.method, span.request_id) == ("double", "DBL_R1_001")
+
+    def test_records_batch_per_request(self, tracer):
+        # ARRANGE
+        solution = TracedSolution("double", lambda items: items, "batch")
+        # ACT
+        solution.for_requests("DBL_R1_001", "DBL_R1_002")([1, 2])
+        # ASSERT
+        first, second = tracer.spans()
+        assert (first.request_id, second.request_id) == ("DBL_R1_001", "DBL_R1_002")
+        assert (first.start_ns, first.duration_ns) == (
+            second.start_ns,
+            second.duration_ns,
+        )
+
+    def test_records_failures(self, tracer):
+        solution = TracedSolution("fail", lambda: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            solution()
+        assert len(tracer.spans()) == 1
+
+    def test_untraced_when_disabled(self, tracer):
+        tracer.enabled = False
+        assert TracedSolution("double", double)(1) == 2
+        assert tracer.spans() == []
+
+    def test_picklable(self):
+        solution = pickle.loads(pickle.dumps(TracedSolution("double", double)))
+        assert solution(2) == 4
@@ -0,0 +1,155 @@
+import multiprocessing
+
+import pytest
+from solutions.CHK import checkout_solution
+from solutions.CHK.cache import CheckoutCache, SharedCheckoutCache
+from solutions.CHK.pricing import count_skus
+
+
+@pytest.fixture
+def checkout_cache():
+    cache = checkout_solution.enable_cache(maxsize=8)
+    yield cache
+    checkout_solution.disable_cache()
+
+
+class TestCheckoutCache:
+    def test_hit_and_miss(self):
+        cache = CheckoutCache(maxsize=2)
+        assert cache.get("A", "v1") is None
+        cache.put("A", "v1", 50)
+        assert cache.get("A", "v1") == 50
+        assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    def test_evicts_least_recently_used(self):
+        # ARRANGE
+        cache = CheckoutCache(maxsize=2)
+        cache.put("A", "v1", 50)
+        cache.put("B", "v1", 30)
+        cache.get("A", "v1")
+        # ACT
+        cache.put("C", "v1", 20)
+        # ASSERT
+        assert cache.get("B", "v1") is None
+        assert cache.get("A", "v1") == 50
+        assert cache.stats.evictions == 1
+        assert cache.stats.size == 2
+
+    def test_invalidated_by_new_catalogue(self):
+        cache = CheckoutCache()
+        cache.put("A", "v1", 50)
+        assert cache.get("A", "v2") is None
+        assert cache.stats.invalidations == 1
+        assert cache.stats.size == 0
+
+    def test_invalid_maxsize(self):
+        with pytest.raises(ValueError):
+            CheckoutCache(maxsize=0)
+
+
+def key(skus, optimal=False):
+    return (optimal, *count_skus(skus))
+
+
+def put_in_child(path):
+    SharedCheckoutCache(path).put(key("AB"), "v1", 80)
+
+
+class TestSharedCheckoutCache:
+    def test_hit_and_miss(self, tmp_path):
+        cache = SharedCheckoutCache(str(tmp_path / "cache"), slots=16)
+        assert cache.get(key("A"), "v1") is None
+        cache.put(key("A"), "v1", 50)
+        assert cache.get(key("A"), "v1") == 50
+        assert cache.get(key("A", optimal=True), "v1") is None
+        assert (cache.stats.hits, cache.stats.misses, cache.stats.size) == (1, 2, 1)
+
+    def test_shared_between_processes(self, tmp_path):
+        # ARRANGE
+        path = str(tmp_path / "cache")
+        cache = SharedCheckoutCache(path)
+        child = multiprocessing.get_context("fork").Process(
+            target=put_in_child, args=(path,)
+        )
+        # ACT
+        child.start()
+        child.join()
+        # ASSERT
+        assert child.exitcode == 0
+        assert cache.get(key("AB"), "v1") == 80
+
+    def test_reopened_file_is_warm(self, tmp_path):
+        path = str(tmp_path / "cache")
+        SharedCheckoutCache(path, slots=16).put(key("A"), "v1", 50)
+        reopened = SharedCheckoutCache(path, slots=1024)
+        assert reopened.maxsize == 16
+        assert reopened.get(key("A"), "v1") == 50
+
+    def test_entries_tagged_with_catalogue(self, tmp_path):
+        cache = SharedCheckoutCache(str(tmp_path / "cache"))
+        cache.put(key("A"), "v1", 50)
+        assert cache.get(key("A"), "v2") is None
+        assert cache.stats.invalidations == 1
+        assert cache.get(key("A"), "v1") == 50
+
+    def test_torn_entry_is_a_miss(self, tmp_path):
+        # ARRANGE: corrupt the total as a concurrent writer could
+        cache = SharedCheckoutCache(str(tmp_path / "cache"), slots=1)
+        cache.put(key("A"), "v1", 50)
+        offset = len(cache._map) - 16
+        cache._map[offset : offset + 8] = (51).to_bytes(8, "little")
+        # ACT / ASSERT
+        assert cache.get(key("A"), "v1") is None
+
+    def test_overwrites_and_clears(self, tmp_path):
+        cache = SharedCheckoutCache(str(tmp_path / "cache"), slots=1)
+        cache.put(key("A"), "v1", 50)
+        cache.put(key("B"), "v1", 30)
+        assert cache.get(key("A"), "v1") is None
+        assert cache.stats.evictions == 1
+        cache.clear()
+        assert cache.get(key("B"), "v1") is None
+        assert cache.stats.size == 0
+
+    def test_rewrite_is_not_an_eviction(self, tmp_path):
+        cache = SharedCheckoutCache(str(tmp_path / "cache"), slots=1)
+        cache.put(key("A"), "v1", 50)
+        cache.put(key("A"), "v1", 50)
+        assert cache.stats.evictions == 0
+        cache.put(key("A"), "v2", 60)
+        assert cache.stats.evictions == 1
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "cache"
+        path.write_bytes(b"not a cache")
+        with pytest.raises(ValueError):
+            SharedCheckoutCache(str(path))
+
+
+class TestCheckoutWithCache:
+    def test_keyed_on_counts(self, checkout_cache):
+        assert checkout_solution.checkout("ABBA") == 145
+        assert checkout_solution.checkout("AABB") == 145
+        assert (checkout_cache.stats.hits, checkout_cache.stats.misses) == (1, 1)
+
+    def test_modes_cached_separately(self, checkout_cache):
+        assert checkout_solution.checkout("AAAAAAAA") == 330
+        assert checkout_solution.checkout("AAAAAAAA", optimal=True) == 330
+        assert checkout_cache.stats.misses == 2
+
+    def test_invalid_not_cached(self, checkout_cache):
+        assert checkout_solution.checkout("a") == -1
+        assert checkout_cache.stats.size == 0
+
+    def test_checkout_many(self, checkout_cache):
+        assert checkout_solution.checkout_many(["AB", "BA", "AB"]) == [80, 80, 80]
+        assert checkout_cache.stats.misses == 1
+
+    def test_shared(self, tmp_path):
+        try:
+            cache = checkout_solution.enable_shared_cache(str(tmp_path / "cache"))
+            assert checkout_solution.checkout("ABBA") == 145
+            assert checkout_solution.checkout("AABB") == 145
+            assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+        finally:
+            checkout_solution.disable_cache()
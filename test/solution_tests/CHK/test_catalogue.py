@@ -0,0 +1,217 @@
+import functools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from solutions.CHK import checkout_solution
+from solutions.CHK.catalogue import (
+    DEFAULT_CATALOGUE,
+    CatalogueStore,
+    dump_compiled,
+    load_catalogue,
+    load_compiled,
+    parse_catalogue,
+)
+from solutions.CHK.checkout_solution import (
+    CATALOGUE,
+    DISCOUNTS,
+    Basket,
+    Items,
+    checkout_with_version,
+    compute_discounts_reference,
+    discounts_from_table,
+)
+from solutions.CHK.pricing import (
+    SKU_INDEX,
+    SKUS,
+    compile_discounts,
+    count_skus,
+    price_counts,
+)
+
+
+def _data(*offers):
+    return {"prices": {sku: 10 for sku in SKUS}, "offers": list(offers)}
+
+
+class TestCatalogue:
+    def test_default_catalogue(self):
+        catalogue = load_catalogue()
+        assert catalogue == CATALOGUE
+        assert Items.K.value.price == 70
+        for skus in ["AAAAAAAA", "EEB", "NNNM", "RRRQ", "FFF", "UUUU", "SSSZ"]:
+            assert price_counts(
+                count_skus(skus), catalogue.table
+            ) == compute_discounts_reference(skus)
+
+    @pytest.mark.parametrize("skus", ["ABCD", "SSTTXXAB", "ZZZZDDDDCCBBA" * 7, "X"])
+    def test_several_group_offers(self, skus):
+        # ARRANGE: a second group offer of a different size over other SKUs
+        with open(DEFAULT_CATALOGUE) as f:
+            data = json.load(f)
+        data["offers"].insert(
+            0, {"type": "group", "skus": "ABCDZ", "quantity": 4, "price": 60}
+        )
+        table = parse_catalogue(data, "test").table
+        basket = Basket(skus)
+        # ACT
+        discounted = sum(
+            discount.apply_all(basket) for discount in discounts_from_table(table)
+        )
+        # ASSERT
+        assert discounted + basket.value == price_counts(count_skus(skus), table)
+
+    def test_discounts_round_trip(self):
+        prices = {item.name: item.value.price for item in Items}
+        assert compile_discounts(DISCOUNTS, prices) == CATALOGUE.table
+
+    def test_compiled_round_trip(self):
+        assert load_compiled(dump_compiled(CATALOGUE)) == CATALOGUE
+
+    def test_compiled_cache(self, tmp_path):
+        # ARRANGE
+        source = tmp_path / "catalogue.json"
+        source.write_text(open(DEFAULT_CATALOGUE).read())
+        cache_dir = tmp_path / "cache"
+        # ACT
+        first = load_catalogue(str(source), cache_dir=str(cache_dir))
+        second = load_catalogue(str(source), cache_dir=str(cache_dir))
+        # ASSERT
+        assert (cache_dir / f"{first.version}.chkc").exists()
+        assert first == second == CATALOGUE
+
+    def test_version_follows_contents(self, tmp_path):
+        source = tmp_path / "catalogue.json"
+        source.write_text(json.dumps(_data()))
+        version = load_catalogue(str(source)).version
+        source.write_text(
+            json.dumps(
+                _data({"type": "group", "skus": "AB", "quantity": 2, "price": 15})
+            )
+        )
+        assert load_catalogue(str(source)).version != version
+
+    def test_get_free_same_sku(self):
+        catalogue = parse_catalogue(
+            _data({"type": "get_free", "sku": "F", "quantity": 2, "free_sku": "F"}),
+            "test",
+        )
+        (offer,) = catalogue.table.offers
+        assert offer.removed == ((SKU_INDEX["F"], 3),)
+        assert offer.price == 20
+
+    @pytest.mark.parametrize(
+        "offer",
+        [
+            {"type": "bogof", "sku": "A"},
+            {"type": "multi_buy", "sku": "a", "quantity": 2, "price": 10},
+            {"type": "multi_buy", "sku": "A", "quantity": 0, "price": 10},
+            {"type": "get_free", "sku": "A", "quantity": 2, "free_sku": "1"},
+            {"type": "group", "skus": "", "quantity": 2, "price": 10},
+        ],
+    )
+    def test_invalid_offer(self, offer):
+        with pytest.raises(ValueError):
+            parse_catalogue(_data(offer), "test")
+
+    def test_missing_price(self):
+        with pytest.raises(ValueError):
+            parse_catalogue({"prices": {"A": 10}, "offers": []}, "test")
+
+
+class TestCatalogueStore:
+    def setup_method(self):
+        self.data = json.load(open(DEFAULT_CATALOGUE))
+
+    def _write(self, path, price_a):
+        self.data["prices"]["A"] = price_a
+        path.write_text(json.dumps(self.data))
+
+    def test_reload(self, tmp_path):
+        # ARRANGE
+        source = tmp_path / "catalogue.json"
+        self._write(source, 50)
+        store = CatalogueStore(str(source))
+        in_flight = store.snapshot
+        # ACT
+        self._write(source, 60)
+        reloaded = store.reload()
+        # ASSERT
+        assert reloaded
+        assert store.snapshot.table.prices[0] == 60
+        assert in_flight.table.prices[0] == 50
+        assert store.snapshot.version != in_flight.version
+        assert not store.reload()
+
+    def test_poll(self, tmp_path):
+        source = tmp_path / "catalogue.json"
+        self._write(source, 50)
+        store = CatalogueStore(str(source))
+        assert not store.poll()
+        self._write(source, 55)
+        os.utime(source, ns=(0, 0))
+        assert store.poll()
+        assert store.snapshot.table.prices[0] == 55
+
+    def test_poll_keeps_snapshot_on_error(self, tmp_path):
+        source = tmp_path / "catalogue.json"
+        self._write(source, 50)
+        store = CatalogueStore(str(source))
+        snapshot = store.snapshot
+        source.write_text("{")
+        os.utime(source, ns=(0, 0))
+        assert not store.poll()
+        assert store.snapshot is snapshot
+
+    def test_discount_model_follows_reload(self, tmp_path, monkeypatch):
+        # ARRANGE
+        source = tmp_path / "catalogue.json"
+        self._write(source, 50)
+        store = CatalogueStore(str(source))
+        monkeypatch.setattr(checkout_solution, "STORE", store)
+        assert Basket("AAA").value == 150
+        # ACT
+        self._write(source, 60)
+        store.reload()
+        # ASSERT
+        assert Basket("AAA").value == 180
+        assert Basket("A").items["A"].price == 60
+        assert checkout_solution.Items.A.value.price == 60
+        assert checkout_solution.PRICE_TABLE is store.snapshot.table
+        assert compute_discounts_reference("AAAA") == checkout_solution.checkout("AAAA")
+
+    def test_process_pool_workers_watch_catalogue(self, tmp_path, monkeypatch):
+        # ARRANGE: workers forked from a parent that does not poll
+        source = tmp_path / "catalogue.json"
+        self._write(source, 50)
+        monkeypatch.setattr(checkout_solution, "STORE", CatalogueStore(str(source)))
+        pool = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=functools.partial(checkout_solution.watch_catalogue, 0.05),
+        )
+        with pool:
+            assert pool.submit(checkout_solution.checkout, "A").result() == 50
+            # ACT
+            self._write(source, 99)
+            os.utime(source, ns=(0, 0))
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                total = pool.submit(checkout_solution.checkout, "A").result()
+                if total == 99:
+                    break
+                time.sleep(0.05)
+        # ASSERT
+        assert total == 99
+        assert checkout_solution.STORE.snapshot.table.prices[0] == 50
+
+
+class TestCheckoutWithVersion:
+    def test_checkout_with_version(self):
+        assert checkout_with_version("AAA") == (130, CATALOGUE.version)
+
+    def test_checkout_with_version_err(self):
+        assert checkout_with_version("a") == (-1, CATALOGUE.version)
@@ -0,0 +1,95 @@
+import random
+
+import pytest
+from solutions.CHK import codegen
+from solutions.CHK.checkout_solution import PRICE_TABLE
+from solutions.CHK.codegen import compile_table, generate_source
+from solutions.CHK.pricing import (
+    SKU_COUNT,
+    SKUS,
+    CompiledOffer,
+    PriceTable,
+    count_skus,
+    price_counts,
+)
+
+BASKETS = ["", "AAAAAAAA", "BBEEB", "NNNMM", "RRRQQQQ", "UUUU", "STXSZZ", "FFFFFF"]
+
+
+def _random_baskets(count=300):
+    rng = random.Random(0)
+    return [
+        "".join(rng.choice(SKUS) for _ in range(rng.randint(0, 40)))
+        for _ in range(count)
+    ]
+
+
+class TestGeneratedPrice:
+    @pytest.mark.parametrize("skus", BASKETS)
+    def test_matches_price_counts(self, skus):
+        price = compile_table(PRICE_TABLE)
+        assert price(count_skus(skus)) == price_counts(count_skus(skus), PRICE_TABLE)
+
+    def test_matches_price_counts_on_random_baskets(self):
+        price = PRICE_TABLE.price_function
+        for skus in _random_baskets():
+            counts = count_skus(skus)
+            assert price(counts) == price_counts(counts, PRICE_TABLE), skus
+
+    def test_several_group_offers(self):
+        # ARRANGE: overlapping group offers of different sizes, then a fixed one
+        table = PriceTable(
+            prices=tuple([10, 20, 30, 40] + [5] * (SKU_COUNT - 4)),
+            offers=(
+                CompiledOffer(price=50, choose=2, members=(3, 2, 1)),
+                CompiledOffer(price=45, choose=3, members=(2, 1, 0)),
+                CompiledOffer(price=15, removed=((0, 2),)),
+            ),
+        )
+        price = compile_table(table)
+        # ACT / ASSERT
+        for skus in _random_baskets():
+            counts = count_skus(skus)
+            assert price(counts) == price_counts(counts, table), skus
+
+    def test_one_block_per_offer(self):
+        source = generate_source(PRICE_TABLE)
+        assert not any(line.strip().startswith("for ") for line in source.splitlines())
+        for offer in PRICE_TABLE.offers:
+            assert f"total += times * {offer.price}\n" in source
+
+
+class TestCompileCache:
+    def test_cached_in_memory(self):
+        assert compile_table(PRICE_TABLE) is compile_table(PRICE_TABLE)
+
+    def test_cached_on_disk(self, tmp_path, monkeypatch):
+        # ARRANGE
+        monkeypatch.setattr(codegen, "_compiled", {})
+        first = compile_table(PRICE_TABLE, cache_dir=str(tmp_path))
+        (module,) = tmp_path.glob("chk_price_*.py")
+        monkeypatch.setattr(codegen, "_compiled", {})
+        # ACT
+        second = compile_table(PRICE_TABLE, cache_dir=str(tmp_path))
+        # ASSERT
+        assert second is not first
+        assert second.__code__.co_filename == str(module)
+        assert second(count_skus("AAAAA")) == 200
+
+    @pytest.mark.parametrize(
+        "cached", ["def price(counts):\n    return -1\n", "# Generated by"]
+    )
+    def test_replaces_changed_module(self, tmp_path, monkeypatch, cached):
+        # ARRANGE
+        monkeypatch.setattr(codegen, "_compiled", {})
+        compile_table(PRICE_TABLE, cache_dir=str(tmp_path))
+        (module,) = tmp_path.glob("chk_price_*.py")
+        module.write_text(cached)
+        monkeypatch.setattr(codegen, "_compiled", {})
+        # ACT
+        price = compile_table(PRICE_TABLE, cache_dir=str(tmp_path))
+        # ASSERT
+        assert price(count_skus("AAAAA")) == 200
+        assert module.read_text() == generate_source(PRICE_TABLE)
+        files = [path.name for path in tmp_path.iterdir() if path.is_file()]
+        assert files == [module.name]
@@ -0,0 +1,93 @@
+import pytest
+from solutions.CHK.checkout_solution import PRICE_TABLE, checkout
+from solutions.CHK.differential import (
+    ENGINES,
+    brute_force_total,
+    check,
+    generate_baskets,
+    main,
+    reference_minimum,
+    shrink,
+    throughput,
+)
+from solutions.CHK.pricing import SKU_COUNT, CompiledOffer, PriceTable, count_skus
+
+
+class TestBruteForceTotal:
+    def test_finds_cheaper_order_than_greedy(self):
+        # ARRANGE: 2A+2A beats 3A for 100 + A
+        table = PriceTable(
+            prices=tuple([40] + [0] * (SKU_COUNT - 1)),
+            offers=(
+                CompiledOffer(price=100, removed=((0, 3),)),
+                CompiledOffer(price=65, removed=((0, 2),)),
+            ),
+        )
+        # ACT
+        total = brute_force_total(count_skus("AAAA"), table)
+        # ASSERT
+        assert total == 130
+
+    @pytest.mark.parametrize("skus", ["", "AAAAAAAA", "EEB", "NNNM", "STXYZZ"])
+    def test_matches_checkout(self, skus):
+        assert brute_force_total(count_skus(skus), PRICE_TABLE) == checkout(skus)
+
+
+class TestGenerateBaskets:
+    def test_seeded(self):
+        assert generate_baskets(seed=3, examples=50) == generate_baskets(
+            seed=3, examples=50
+        )
+        assert generate_baskets(seed=3, examples=50) != generate_baskets(
+            seed=4, examples=50
+        )
+
+    def test_hits_offer_boundaries(self):
+        counts = [count_skus(skus) for skus in generate_baskets(examples=500)]
+        a, e, b = 0, 4, 1
+        assert any(c[a] == 5 for c in counts)
+        assert any(c[a] == 4 for c in counts)
+        assert any(c[e] == 2 and c[b] == 1 for c in counts)
+        assert any(-1 == checkout(skus) for skus in generate_baskets(examples=500))
+
+
+class TestCheck:
+    def test_engines_agree(self):
+        assert check(generate_baskets(seed=1, examples=300)) == []
+
+    def test_reports_shrunk_mismatch(self):
+        # ARRANGE: an engine that forgets the free B of 2E
+        def broken(skus):
+            total = checkout(skus)
+            return total + 30 if skus.count("E") >= 2 and "B" in skus else total
+
+        # ACT
+        (mismatch,) = check(generate_baskets(examples=300), {"broken": broken})
+        # ASSERT
+        assert mismatch.engine == "broken"
+        assert mismatch.skus == "BEE"
+        assert mismatch.expected == reference_minimum("BEE")
+
+    def test_reports_exceptions(self):
+        def raising(skus):
+            raise RuntimeError("boom")
+
+        (mismatch,) = check(["AB"], {"raising": raising})
+        assert mismatch.skus == ""
+        assert isinstance(mismatch.actual, RuntimeError)
+
+
+class TestShrink:
+    def test_shrink(self):
+        assert shrink("ZAQAZA", lambda skus: skus.count("A") >= 2) == "AA"
+
+
+class TestThroughput:
+    def test_throughput(self):
+        rates = throughput(generate_baskets(examples=20))
+        assert set(rates) == set(ENGINES)
+        assert all(rate > 0 for rate in rates.values())
+
+    def test_main(self, capsys):
+        assert main(["--examples", "50", "--engine", "checkout"]) == 0
+        assert "1 engines agree on 50 baskets" in capsys.readouterr().out
@@ -1,10 +1,12 @@
 import pytest
 from solutions.CHK.checkout_solution import (
+    SKU_INDEX,
     Basket,
     Discount,
     Item,
     Items,
     checkout,
+    checkout_many,
     combine_skus_duplicates,
     compute_discounts,
     validate_skus,
@@ -83,6 +85,32 @@ class TestBasket:
         with pytest.raises(TypeError):
             basket1 - basket2
 
+    def test_basket_subtraction_negative(self):
+        basket1 = Basket("AB")
+        with pytest.raises(ValueError):
+            basket1 - Basket("AA")
+        assert basket1.items["A"].quantity == 1
+
+    def test_basket_copy(self):
+        basket = Basket("AAB")
+        basket_copy = basket.__copy__()
+        basket_copy - Basket("A")
+        assert basket.items["A"].quantity == 2
+        assert basket_copy.items["A"].quantity == 1
+
+    def test_basket_from_counts(self):
+        basket = Basket.from_counts([2, 1] + [0] * 24)
+        assert basket.value == Basket("AAB").value
+        assert repr(basket) == "Basket('AAB')"
+
+    def test_basket_invalid_sku(self):
+        with pytest.raises(KeyError):
+            Basket("Aa")
+
+    def test_basket_slots(self):
+        assert not hasattr(Basket("A"), "__dict__")
+        assert not hasattr(Item("A", 50), "__dict__")
+
 
 class TestDiscount:
     def setup_method(self):
@@ -105,6 +133,45 @@ class TestDiscount:
         assert discounted_price == 130
         assert "A" not in self.basket.items
 
+    def test_discount_apply_all(self):
+        basket = Basket("AAAAAAAB")
+        assert self.discount.apply_all(basket) == 2 * 130
+        assert basket.counts[0] == 1
+        assert self.discount.apply_all(basket) == 0
+
+    @pytest.mark.parametrize("skus, times", [("EEEEB", 1), ("EEEE", 0)])
+    def test_free_item_discount_apply_all(self, skus, times):
+        # ARRANGE: 2E get one B free
+        free_b = Discount(
+            required_items=Basket("EE"),
+            removed_items=Basket("EEB"),
+            discounted_price=80,
+        )
+        basket = Basket(skus)
+        # ACT
+        total = free_b.apply_all(basket)
+        # ASSERT
+        assert total == times * 80
+        assert basket.counts[SKU_INDEX["E"]] == 4 - 2 * times
+        assert basket.counts[SKU_INDEX["B"]] == skus.count("B") - times
+
+    def test_group_discount_apply_all(self):
+        # ARRANGE
+        group = Discount(
+            required_items=Basket("STXYZ"),
+            removed_items=Basket(""),
+            discounted_price=45,
+            choose=3,
+        )
+        basket = Basket("S" * 1000 + "Z" * 1000 + "X" * 1001 + "A")
+        # ACT
+        total = group.apply_all(basket)
+        # ASSERT: the cheapest group unit (X) is left over
+        assert total == 1000 * 45
+        assert basket.items["X"].quantity == 1
+        assert basket.items["A"].quantity == 1
+        assert sum(basket.counts) == 2
+
     def test_discount_comparison(self):
         other_discount = Discount(
             required_items=Basket("BB"),
@@ -133,6 +200,15 @@ class TestCHK:
         with pytest.raises(TypeError):
             validate_skus(input_skus)
 
+    @pytest.mark.parametrize("input_skus", [None, 1, ["A"]])
+    def test_validate_skus_not_str(self, input_skus):
+        with pytest.raises(TypeError):
+            validate_skus(input_skus)
+
+    def test_validate_skus_reports_position(self):
+        with pytest.raises(TypeError, match="'b' at 2"):
+            validate_skus("AAbB")
+
     @pytest.mark.parametrize("input_skus", ["AA", "AB", ""])
     def test_validate_skus_valid(self, input_skus):
         # ARRANGE
@@ -167,3 +243,19 @@ class TestCHK:
 
     def test_checkout_err(self):
         assert checkout("invalid") == -1
+
+
+class TestCheckoutMany:
+    def test_checkout_many(self):
+        _, cases = _get_sku_parametrization()
+        skus, expected = zip(*cases)
+        assert checkout_many(skus) == list(expected)
+
+    def test_checkout_many_generator(self):
+        assert checkout_many(skus for skus in ["ABBA", "AABB", ""]) == [145, 145, 0]
+
+    def test_checkout_many_err(self):
+        assert checkout_many(["A", "invalid", "", None, "A B"]) == [50, -1, 0, -1, -1]
+
+    def test_checkout_many_optimal(self):
+        assert checkout_many(["AAAAAAAA"], optimal=True) == [200 + 130]
@@ -0,0 +1,125 @@
+import json
+import time
+
+import pytest
+from solutions.CHK import checkout_solution, instrumentation
+from solutions.CHK.instrumentation import (
+    METRICS,
+    Metrics,
+    SamplingProfiler,
+    offer_label,
+    price_counts_instrumented,
+    profile_call,
+)
+from solutions.CHK.pricing import count_skus, price_counts
+
+
+@pytest.fixture
+def metrics():
+    METRICS.reset()
+    instrumentation.enable()
+    yield METRICS
+    instrumentation.disable()
+    METRICS.reset()
+
+
+def _counter(metrics, name, **labels):
+    return metrics.counters[(name, tuple(sorted(labels.items())))]
+
+
+class TestMetrics:
+    def test_histogram_buckets(self):
+        # ARRANGE
+        metrics = Metrics(buckets=(1.0, 2.0, float("inf")))
+        # ACT
+        metrics.observe("latency", 0.5, stage="a")
+        metrics.observe("latency", 1.5, stage="a")
+        metrics.observe("latency", 5.0, stage="a")
+        # ASSERT
+        (histogram,) = metrics.to_dict()["histograms"]
+        assert histogram["buckets"] == [["1.0", 1], ["2.0", 2], ["+Inf", 3]]
+        assert histogram["count"] == 3
+        assert histogram["sum"] == 7.0
+
+    def test_prometheus_text(self):
+        metrics = Metrics(buckets=(1.0, float("inf")))
+        metrics.observe("latency", 0.5)
+        metrics.increment("requests_total", result="ok")
+        text = metrics.to_prometheus()
+        assert "# TYPE latency histogram" in text
+        assert 'latency_bucket{le="+Inf"} 1' in text
+        assert "latency_count 1" in text
+        assert '# TYPE requests_total counter\nrequests_total{result="ok"} 1' in text
+
+    def test_json_dump(self):
+        metrics = Metrics()
+        metrics.increment("requests_total", 2, result="ok")
+        assert json.loads(metrics.to_json())["counters"] == [
+            {"name": "requests_total", "labels": {"result": "ok"}, "value": 2}
+        ]
+
+
+class TestInstrumentedCheckout:
+    def test_disabled_records_nothing(self):
+        METRICS.reset()
+        assert checkout_solution.checkout("AAA") == 130
+        assert not METRICS.histograms
+        assert not METRICS.counters
+
+    @pytest.mark.parametrize(
+        "skus", ["", "AAAAAAAA", "EEB", "STXYZ", "ABCDEFGHIJKLMNOP"]
+    )
+    def test_totals_unchanged(self, metrics, skus):
+        expected = price_counts(count_skus(skus), checkout_solution.PRICE_TABLE)
+        assert checkout_solution.checkout(skus) == expected
+        assert (
+            price_counts_instrumented(
+                count_skus(skus), checkout_solution.PRICE_TABLE, Metrics()
+            )
+            == expected
+        )
+
+    def test_records_stages_and_offers(self, metrics):
+        # ACT
+        checkout_solution.checkout("AAAAAAAA")
+        # ASSERT
+        stages = {
+            dict(labels)["stage"]
+            for name, labels in metrics.histograms
+            if name == "checkout_stage_seconds"
+        }
+        assert stages == {"validate", "count", "price"}
+        assert _counter(metrics, "checkout_offer_fired_total", offer="5A for 200") == 1
+        assert _counter(metrics, "checkout_offer_fired_total", offer="3A for 130") == 1
+        assert _counter(metrics, "checkout_requests_total", result="ok") == 1
+
+    def test_records_failed_offers(self, metrics):
+        checkout_solution.checkout("AA")
+        assert _counter(metrics, "checkout_offer_failed_total", offer="5A for 200") == 1
+        assert _counter(metrics, "checkout_offer_fired_total", offer="5A for 200") == 0
+
+    def test_records_invalid_requests(self, metrics):
+        assert checkout_solution.checkout("a") == -1
+        assert _counter(metrics, "checkout_requests_total", result="invalid") == 1
+
+
+class TestOfferLabel:
+    def test_labels(self):
+        labels = [offer_label(offer) for offer in checkout_solution.PRICE_TABLE.offers]
+        assert "1B+2E for 80" in labels
+        assert "3 of STXYZ for 45" in labels
+
+
+class TestProfiling:
+    def test_profile_call(self):
+        total, stats = profile_call(checkout_solution.checkout, "AAA")
+        assert total == 130
+        assert stats.total_calls > 0
+
+    def test_sampling_profiler(self):
+        deadline = time.monotonic() + 0.05
+        with SamplingProfiler(interval=0.0005) as profiler:
+            while time.monotonic() < deadline:
+                checkout_solution.checkout("ABCDEFGH")
+        assert profiler.samples
+        assert "checkout" in profiler.collapsed()
@@ -0,0 +1,102 @@
+import pytest
+from solutions.CHK.checkout_solution import PRICE_TABLE, checkout
+from solutions.CHK.differential import brute_force_total
+from solutions.CHK.optimal import price_counts_optimal
+from solutions.CHK.pricing import (
+    SKU_COUNT,
+    CompiledOffer,
+    PriceTable,
+    count_skus,
+    price_counts,
+)
+
+
+def _table(prices, *offers):
+    return PriceTable(
+        prices=tuple(prices + [0] * (SKU_COUNT - len(prices))), offers=offers
+    )
+
+
+class TestPriceCountsOptimal:
+    @pytest.mark.parametrize(
+        "skus",
+        ["", "A", "AAAAAAAA", "BBEEB", "NNNM", "RRRQQQQ", "SSSZ", "STXS", "WWW"],
+    )
+    def test_matches_greedy_on_balanced_offers(self, skus):
+        counts = count_skus(skus)
+        assert price_counts_optimal(counts, PRICE_TABLE) == price_counts(
+            counts, PRICE_TABLE
+        )
+
+    def test_beats_greedy_order(self):
+        # ARRANGE: 3A for 100 saves the most per application, but 2A+2A is
+        # cheaper for four units
+        table = _table(
+            [40],
+            CompiledOffer(price=100, removed=((0, 3),)),
+            CompiledOffer(price=65, removed=((0, 2),)),
+        )
+        counts = count_skus("AAAA")
+        # ACT
+        greedy = price_counts(counts, table)
+        optimal = price_counts_optimal(counts, table)
+        # ASSERT
+        assert greedy == 140
+        assert optimal == 130
+
+    def test_free_item_offer_not_forced(self):
+        # ARRANGE: 2A get one B free would swallow the B needed for 2B for 10
+        table = _table(
+            [10, 20],
+            CompiledOffer(price=20, removed=((0, 2), (1, 1))),
+            CompiledOffer(price=10, removed=((1, 2),)),
+        )
+        # ACT
+        total = price_counts_optimal(count_skus("AABB"), table)
+        # ASSERT
+        assert total == 20 + 10
+
+    def test_group_offer_skips_unprofitable_groups(self):
+        # ARRANGE: any 2 of (A, B) for 30
+        table = _table([20, 10], CompiledOffer(price=30, choose=2, members=(0, 1)))
+        # ACT
+        total = price_counts_optimal(count_skus("AABB"), table)
+        # ASSERT
+        assert total == 30 + 10 + 10
+
+    @pytest.mark.parametrize(
+        "skus", ["ABC", "AABC", "ABCC", "AAABBBCCC", "BCC", "AACCC"]
+    )
+    def test_group_offer_closes_mixed_group(self, skus):
+        # ARRANGE: any 3 of (A, B, C) for 45, where three Cs alone (42) would
+        # not save but a group with a dearer unit does
+        table = _table(
+            [30, 15, 14], CompiledOffer(price=45, choose=3, members=(0, 1, 2))
+        )
+        counts = count_skus(skus)
+        # ACT
+        total = price_counts_optimal(counts, table)
+        # ASSERT
+        assert total == brute_force_total(counts, table)
+
+    def test_overlapping_group_offers(self):
+        table = _table(
+            [20, 20, 20],
+            CompiledOffer(price=30, choose=2, members=(0, 1)),
+            CompiledOffer(price=25, choose=2, members=(1, 2)),
+        )
+        assert price_counts_optimal(count_skus("ABBC"), table) == 30 + 25
+
+    def test_large_basket(self):
+        counts = count_skus("A" * 10001 + "EB" * 5000)
+        assert price_counts_optimal(counts, PRICE_TABLE) == price_counts(
+            counts, PRICE_TABLE
+        )
+
+
+class TestCheckoutOptimal:
+    def test_checkout_optimal(self):
+        assert checkout("AAAAAAAA", optimal=True) == 200 + 130
+
+    def test_checkout_optimal_err(self):
+        assert checkout("a", optimal=True) == -1
@@ -0,0 +1,161 @@
+import pytest
+from solutions.CHK.checkout_solution import (
+    PRICE_TABLE,
+    checkout,
+    checkout_detailed,
+    compute_discounts,
+    compute_discounts_reference,
+)
+from solutions.CHK.pricing import (
+    SKU_COUNT,
+    SKU_INDEX,
+    CompiledOffer,
+    PriceTable,
+    count_skus,
+    first_invalid_index,
+    price_counts,
+    price_counts_detailed,
+    scan_skus,
+)
+
+BASKETS = [
+    "",
+    "A",
+    "AAA",
+    "AAAAA",
+    "AAAAAAAA",
+    "BBEE",
+    "BBEEB",
+    "EEEEBB",
+    "FFFFFF",
+    "HHHHHHHHHHHHHHH",
+    "NNNMM",
+    "RRRQQQQ",
+    "UUUUUUUU",
+    "VVVVV",
+    "STXS",
+    "SSSZ",
+    "XXXXYZ",
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZABCDEFGHIJKLMNOPQRSTUVWXYZ",
+]
+
+
+class TestCountSkus:
+    def test_count_skus(self):
+        counts = count_skus("AABZ")
+        assert len(counts) == SKU_COUNT
+        assert counts[0] == 2
+        assert counts[1] == 1
+        assert counts[25] == 1
+        assert sum(counts) == 4
+
+    def test_count_skus_empty(self):
+        assert count_skus("") == [0] * SKU_COUNT
+
+
+class TestScanSkus:
+    @pytest.mark.parametrize("skus", ["", "A", "AABZ", "ZZZZYX" * 50])
+    def test_counts_valid_skus(self, skus):
+        assert scan_skus(skus) == (count_skus(skus), -1)
+
+    @pytest.mark.parametrize(
+        "skus, index",
+        [("a", 0), ("AxB", 1), ("AAB-", 3), ("AB C", 2), ("ABÄ", 2), ("A\n", 1)],
+    )
+    def test_reports_first_invalid_index(self, skus, index):
+        assert scan_skus(skus) == (None, index)
+        assert first_invalid_index(skus) == index
+
+    @pytest.mark.parametrize("skus", [None, 1, b"AB", ["A", "B"]])
+    def test_rejects_non_str(self, skus):
+        with pytest.raises(TypeError):
+            scan_skus(skus)
+
+
+class TestPriceCounts:
+    @pytest.mark.parametrize("skus", BASKETS)
+    def test_matches_reference(self, skus):
+        assert compute_discounts(skus) == compute_discounts_reference(skus)
+
+    def test_does_not_modify_counts(self):
+        counts = count_skus("AAAAA")
+        price_counts(counts, PRICE_TABLE)
+        assert counts == count_skus("AAAAA")
+
+    def test_group_offer_takes_most_expensive_units(self):
+        # ARRANGE
+        prices = tuple([10, 20, 30] + [0] * (SKU_COUNT - 3))
+        table = PriceTable(
+            prices=prices,
+            offers=(CompiledOffer(price=25, choose=2, members=(2, 1, 0)),),
+        )
+        # ACT
+        total = price_counts(count_skus("ABC"), table)
+        # ASSERT
+        assert total == 25 + 10
+
+
+class TestSkuOffers:
+    def test_sku_offers(self):
+        sku_offers = PRICE_TABLE.sku_offers
+        offers = PRICE_TABLE.offers
+        assert len(sku_offers) == SKU_COUNT
+        assert sku_offers[SKU_INDEX["C"]] == ()
+        assert [offers[position].price for position in sku_offers[0]] == [200, 130]
+        # 2E get one B free is reachable from both E and B
+        (free_b,) = sku_offers[SKU_INDEX["E"]]
+        assert free_b in sku_offers[SKU_INDEX["B"]]
+        assert len(sku_offers[SKU_INDEX["B"]]) == 2
+
+    def test_offers_applied_in_table_order(self):
+        # ARRANGE: the offer on the later SKU comes first and takes the B
+        table = PriceTable(
+            prices=tuple([10, 20, 30] + [0] * (SKU_COUNT - 3)),
+            offers=(
+                CompiledOffer(price=35, removed=((1, 1), (2, 1))),
+                CompiledOffer(price=25, removed=((0, 1), (1, 1))),
+            ),
+        )
+        # ACT
+        total = price_counts(count_skus("ABC"), table)
+        # ASSERT
+        assert total == 35 + 10
+
+
+class TestPriceCountsDetailed:
+    @pytest.mark.parametrize("skus", BASKETS)
+    def test_breakdown_adds_up(self, skus):
+        # ACT
+        breakdown = price_counts_detailed(count_skus(skus), PRICE_TABLE)
+        # ASSERT
+        full_price = sum(
+            count * price for count, price in zip(count_skus(skus), PRICE_TABLE.prices)
+        )
+        assert breakdown.total == price_counts(count_skus(skus), PRICE_TABLE)
+        assert breakdown.total == full_price - sum(breakdown.savings)
+        leftover = sum(
+            count * price
+            for count, price in zip(breakdown.leftover, PRICE_TABLE.prices)
+        )
+        offers = sum(
+            times * offer.price
+            for times, offer in zip(breakdown.applied, PRICE_TABLE.offers)
+        )
+        assert breakdown.total == leftover + offers
+
+    def test_receipt(self):
+        # ACT
+        receipt = checkout_detailed("AAAAAAAAEEBSTXYZC").to_dict()
+        # ASSERT
+        assert receipt["total"] == checkout("AAAAAAAAEEBSTXYZC")
+        assert receipt["offers"] == [
+            {"offer": "5A for 200", "times": 1, "savings": 50},
+            {"offer": "1B+2E for 80", "times": 1, "savings": 30},
+            {"offer": "3A for 130", "times": 1, "savings": 20},
+            {"offer": "3 of STXYZ for 45", "times": 1, "savings": 16},
+        ]
+        assert set(receipt["leftover"]) == {"C", "X", "Y"}
+
+    @pytest.mark.parametrize("skus", ["a", "A-", None])
+    def test_invalid(self, skus):
+        assert checkout_detailed(skus) is None
@@ -0,0 +1,129 @@
+import json
+import mmap
+
+import pytest
+from solutions.CHK.checkout_solution import checkout
+from solutions.CHK.reprice import main, parse_shard, reprice_file, shard_bounds
+
+BASKETS = ["AAA", "", "abc", "STXYZ", "EEB", "A" * 50, "FFF", "HHHHHHHHHH"] * 25
+
+
+def _expected(baskets):
+    return "".join(f"{checkout(skus)}\n" for skus in baskets)
+
+
+@pytest.fixture
+def orders(tmp_path):
+    path = tmp_path / "orders.txt"
+    path.write_text("\n".join(BASKETS) + "\n")
+    return path
+
+
+class TestShardBounds:
+    @pytest.mark.parametrize("chunk_bytes", [1, 7, 64, 1 << 20])
+    def test_shards_cover_whole_lines(self, orders, chunk_bytes):
+        with open(orders, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                bounds = shard_bounds(mapped, chunk_bytes)
+                data = mapped[:]
+        assert bounds[0][0] == 0
+        assert bounds[-1][1] == len(data)
+        for (_, end), (start, _) in zip(bounds, bounds[1:]):
+            assert end == start
+            assert data[end - 1 : end] == b"\n"
+
+
+class TestParseShard:
+    def test_lines(self):
+        assert parse_shard(b"AB\r\n\nC\n", "lines") == ["AB", "", "C"]
+
+    def test_jsonl(self):
+        data = b'{"skus": "AB"}\n"C"\n{"other": 1}\nnot json\n'
+        assert parse_shard(data, "jsonl") == ["AB", "C", None, None]
+
+    def test_non_ascii_is_invalid(self):
+        (skus,) = parse_shard("AÄ".encode(), "lines")
+        assert checkout(skus) == -1
+
+
+class TestRepriceFile:
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_totals_in_input_order(self, orders, tmp_path, workers):
+        # ARRANGE
+        output = tmp_path / "totals.txt"
+        # ACT
+        stats = reprice_file(str(orders), str(output), workers=workers, chunk_bytes=64)
+        # ASSERT
+        assert output.read_text() == _expected(BASKETS)
+        assert stats.lines == len(BASKETS)
+        assert stats.shards > 1
+        assert not (tmp_path / "totals.txt.ckpt").exists()
+
+    def test_jsonl(self, tmp_path):
+        source = tmp_path / "orders.jsonl"
+        source.write_text("".join(json.dumps({"basket": s}) + "\n" for s in BASKETS))
+        output = tmp_path / "totals.txt"
+        reprice_file(str(source), str(output), workers=0, field="basket")
+        assert output.read_text() == _expected(BASKETS)
+
+    def test_empty_input(self, tmp_path):
+        source = tmp_path / "empty.txt"
+        source.write_text("")
+        output = tmp_path / "totals.txt"
+        assert reprice_file(str(source), str(output), workers=0).lines == 0
+        assert output.read_text() == ""
+
+    def test_resumes_from_checkpoint(self, orders, tmp_path):
+        # ARRANGE: interrupt the run after the third shard is written
+        output = tmp_path / "totals.txt"
+
+        def interrupt(shards, lines, done_bytes, final=False):
+            if shards == 3:
+                raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            reprice_file(
+                str(orders), str(output), workers=0, chunk_bytes=64, progress=interrupt
+            )
+        assert (tmp_path / "totals.txt.ckpt").exists()
+        # ACT
+        stats = reprice_file(str(orders), str(output), workers=0, chunk_bytes=64)
+        # ASSERT
+        assert stats.resumed_shards == 3
+        assert output.read_text() == _expected(BASKETS)
+
+    def test_restarts_when_output_shorter_than_checkpoint(self, orders, tmp_path):
+        # ARRANGE: a checkpoint whose last shard never reached the output
+        output = tmp_path / "totals.txt"
+
+        def interrupt(shards, lines, done_bytes, final=False):
+            if shards == 3:
+                raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            reprice_file(
+                str(orders), str(output), workers=0, chunk_bytes=64, progress=interrupt
+            )
+        with open(output, "r+b") as f:
+            f.truncate(output.stat().st_size - 2)
+        # ACT
+        stats = reprice_file(str(orders), str(output), workers=0, chunk_bytes=64)
+        # ASSERT
+        assert stats.resumed_shards == 0
+        assert output.read_text() == _expected(BASKETS)
+
+    def test_restart_ignores_checkpoint_of_other_run(self, orders, tmp_path):
+        output = tmp_path / "totals.txt"
+        output.write_text("stale\n")
+        (tmp_path / "totals.txt.ckpt").write_text(
+            json.dumps({"identity": {}, "shards": 1, "lines": 1, "output_bytes": 6})
+        )
+        stats = reprice_file(str(orders), str(output), workers=0)
+        assert stats.resumed_shards == 0
+        assert output.read_text() == _expected(BASKETS)
+
+    def test_main(self, orders, tmp_path, capsys):
+        output = tmp_path / "totals.txt"
+        assert main([str(orders), str(output), "-j", "0"]) == 0
+        assert output.read_text() == _expected(BASKETS)
+        assert "Repriced 200 lines" in capsys.readouterr().err
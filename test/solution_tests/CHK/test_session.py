@@ -0,0 +1,43 @@
+import random
+
+import pytest
+from solutions.CHK.checkout_solution import checkout
+from solutions.CHK.session import CheckoutSession
+
+
+class TestCheckoutSession:
+    def test_add_matches_checkout(self):
+        # ARRANGE
+        rng = random.Random(9)
+        session = CheckoutSession()
+        scanned = ""
+        for _ in range(200):
+            sku = rng.choice("ABCEFHKMNPQRSTUVXYZ")
+            # ACT
+            total = session.add(sku)
+            scanned += sku
+            # ASSERT
+            assert total == session.total() == checkout(scanned)
+
+    def test_remove_matches_checkout(self):
+        session = CheckoutSession("AAAEEBBRRRQ")
+        assert session.total() == checkout("AAAEEBBRRRQ")
+        assert session.remove("B") == checkout("AAAEEBRRRQ")
+        assert session.remove("AR") == checkout("AAEEBRRQ")
+
+    def test_remove_missing(self):
+        session = CheckoutSession("AB")
+        with pytest.raises((TypeError, ValueError)):
+            session.remove("C")
+        with pytest.raises(ValueError):
+            session.remove("AA")
+        assert session.total() == checkout("AB")
+
+    def test_invalid_sku(self):
+        session = CheckoutSession()
+        with pytest.raises(TypeError):
+            session.add("a")
+
+    def test_optimal(self):
+        session = CheckoutSession("AAAAAAA", optimal=True)
+        assert session.add("A") == checkout("AAAAAAAA", optimal=True)
@@ -0,0 +1,70 @@
+import io
+
+import pytest
+from solutions.CHK.checkout_solution import checkout, checkout_stream
+from solutions.CHK.stream import count_stream
+
+SKUS = "ABCDEFGHIJKLMNOPQRSTUVWXYZABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+class TestCountStream:
+    @pytest.mark.parametrize("chunk_size", [1, 3, 1 << 20])
+    def test_chunk_sizes(self, chunk_size):
+        counts = count_stream(SKUS.encode(), chunk_size=chunk_size)
+        assert counts == [2] * 26
+
+    def test_invalid_in_later_chunk(self):
+        assert count_stream(["AAA", b"BBx"]) is None
+
+    def test_unsupported_source(self):
+        with pytest.raises(TypeError):
+            count_stream(42)
+
+
+class TestCheckoutStream:
+    @pytest.mark.parametrize(
+        "source",
+        [
+            SKUS,
+            SKUS.encode(),
+            bytearray(SKUS.encode()),
+            memoryview(SKUS.encode()),
+            memoryview(b"xx" + SKUS.encode())[2:],
+            [SKUS[:10], SKUS[10:].encode()],
+            io.StringIO(SKUS),
+            io.BytesIO(SKUS.encode()),
+        ],
+    )
+    def test_sources(self, source):
+        assert checkout_stream(source, chunk_size=7) == checkout(SKUS)
+
+    def test_binary_file(self, tmp_path):
+        # ARRANGE
+        path = tmp_path / "skus.txt"
+        path.write_bytes(b"AAAAA" * 2000 + b"EEB" * 3)
+        # ACT
+        with open(path, "rb") as f:
+            total = checkout_stream(f, chunk_size=4096)
+        # ASSERT
+        assert total == 200 * 2000 + 80 * 3
+
+    def test_file_from_current_position(self, tmp_path):
+        # ARRANGE
+        path = tmp_path / "skus.txt"
+        path.write_bytes(b"header\n" + SKUS.encode())
+        # ACT
+        with open(path, "rb") as f:
+            f.seek(len(b"header\n"))
+            total = checkout_stream(f, chunk_size=7)
+        # ASSERT
+        assert total == checkout(SKUS)
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "skus.txt"
+        path.write_bytes(b"")
+        with open(path, "rb") as f:
+            assert checkout_stream(f) == 0
+
+    @pytest.mark.parametrize("source", ["AAa", b"AA\n", [b"AA", None], 42])
+    def test_invalid(self, source):
+        assert checkout_stream(source) == -1